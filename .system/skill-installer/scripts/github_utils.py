@@ -3,19 +3,207 @@
 
 from __future__ import annotations
 
+from dataclasses import dataclass
+import email.utils
 import os
+import random
+import threading
+import time
+import urllib.error
 import urllib.request
 
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD"})
 
-def github_request(url: str, user_agent: str) -> bytes:
+
+@dataclass
+class SchedulerStats:
+    requests: int = 0
+    retries: int = 0
+    wait_seconds: float = 0.0
+    rate_limit_remaining: int | None = None
+    rate_limit_reset: float | None = None
+
+
+class RequestScheduler:
+    """Rate-limit-aware GitHub request scheduler.
+
+    Tracks ``X-RateLimit-Remaining``/``X-RateLimit-Reset`` across calls and
+    spreads the remaining quota over the reset window once it drops below
+    ``low_watermark``: each request reserves one unit of quota and the next
+    free send slot, so concurrent callers stay spaced out instead of waking
+    up together. Idempotent requests are retried on transient failures
+    (5xx, 429, rate-limited 403, network errors) with jittered exponential
+    backoff, honouring ``Retry-After`` when present. Retries whose required
+    wait exceeds ``max_wait`` surface the original error instead of sleeping.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 30.0,
+        low_watermark: int = 10,
+        max_wait: float = 300.0,
+        sleep=time.sleep,
+        clock=time.time,
+    ) -> None:
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.low_watermark = low_watermark
+        self.max_wait = max_wait
+        self._sleep = sleep
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._stats = SchedulerStats()
+        self._next_slot = 0.0
+
+    def stats(self) -> SchedulerStats:
+        with self._lock:
+            return SchedulerStats(**vars(self._stats))
+
+    def request(
+        self,
+        url: str,
+        headers: dict[str, str],
+        timeout: float | None = None,
+        method: str = "GET",
+    ) -> bytes:
+        retryable = method.upper() in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            self._throttle()
+            req = urllib.request.Request(url, headers=headers, method=method)
+            with self._lock:
+                self._stats.requests += 1
+            try:
+                with urllib.request.urlopen(req, timeout=timeout) as resp:
+                    self._record_headers(resp.headers)
+                    return resp.read()
+            except urllib.error.HTTPError as exc:
+                self._record_headers(exc.headers)
+                delay = self._retry_delay(exc, attempt)
+                if not retryable or delay is None or attempt >= self.max_retries:
+                    raise
+                if delay > self.max_wait:
+                    raise
+            except (urllib.error.URLError, TimeoutError, ConnectionError):
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+            attempt += 1
+            with self._lock:
+                self._stats.retries += 1
+            self._wait(delay)
+
+    def _throttle(self) -> None:
+        with self._lock:
+            remaining = self._stats.rate_limit_remaining
+            reset = self._stats.rate_limit_reset
+            if remaining is None or reset is None or remaining > self.low_watermark:
+                return
+            now = self._clock()
+            window = reset - now
+            if window <= 0:
+                return
+            # Spread what is left of the quota evenly over the reset window:
+            # reserve one unit and the next free slot before releasing the
+            # lock, so threads that saw the same quota do not fire together.
+            # The next response's headers replace the estimate.
+            self._stats.rate_limit_remaining = max(0, remaining - 1)
+            start = max(now, self._next_slot) + window / (remaining + 1)
+            self._next_slot = start
+        # Past the reset the quota is refilled, so never wait beyond it.
+        self._wait(min(start - now, window, self.max_wait))
+
+    def _wait(self, seconds: float) -> None:
+        if seconds <= 0:
+            return
+        with self._lock:
+            self._stats.wait_seconds += seconds
+        self._sleep(seconds)
+
+    def _backoff(self, attempt: int) -> float:
+        ceiling = min(self.backoff_cap, self.backoff_base * (2**attempt))
+        return random.uniform(0, ceiling)
+
+    def _retry_delay(self, exc: urllib.error.HTTPError, attempt: int) -> float | None:
+        headers = exc.headers
+        retry_after = _parse_retry_after(
+            headers.get("Retry-After") if headers is not None else None, self._clock
+        )
+        if exc.code == 403:
+            rate_limited = retry_after is not None or (
+                headers is not None and headers.get("X-RateLimit-Remaining") == "0"
+            )
+            if not rate_limited:
+                return None
+        elif exc.code not in RETRY_STATUS_CODES:
+            return None
+        if retry_after is not None:
+            return retry_after
+        if headers is not None and headers.get("X-RateLimit-Remaining") == "0":
+            reset = _parse_int(headers.get("X-RateLimit-Reset"))
+            if reset is not None:
+                return max(0.0, reset - self._clock()) + random.uniform(0, 1)
+        return self._backoff(attempt)
+
+    def _record_headers(self, headers) -> None:
+        if headers is None:
+            return
+        remaining = _parse_int(headers.get("X-RateLimit-Remaining"))
+        if remaining is None:
+            return
+        reset = _parse_int(headers.get("X-RateLimit-Reset"))
+        with self._lock:
+            self._stats.rate_limit_remaining = remaining
+            self._stats.rate_limit_reset = float(reset) if reset is not None else None
+
+
+def _parse_int(value: str | None) -> int | None:
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _parse_retry_after(value: str | None, clock) -> float | None:
+    if not value:
+        return None
+    seconds = _parse_int(value.strip())
+    if seconds is not None:
+        return float(max(0, seconds))
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, parsed.timestamp() - clock())
+
+
+_default_scheduler = RequestScheduler()
+
+
+def default_scheduler() -> RequestScheduler:
+    return _default_scheduler
+
+
+def github_request(
+    url: str,
+    user_agent: str,
+    timeout: float | None = None,
+    scheduler: RequestScheduler | None = None,
+) -> bytes:
     headers = {"User-Agent": user_agent}
     token = os.environ.get("GITHUB_TOKEN") or os.environ.get("GH_TOKEN")
     if token:
         headers["Authorization"] = f"token {token}"
-    req = urllib.request.Request(url, headers=headers)
-    with urllib.request.urlopen(req) as resp:
-        return resp.read()
+    return (scheduler or _default_scheduler).request(url, headers, timeout=timeout)
 
 
 def github_api_contents_url(repo: str, path: str, ref: str) -> str:
     return f"https://api.github.com/repos/{repo}/contents/{path}?ref={ref}"
+
+
+def github_raw_url(repo: str, path: str, ref: str) -> str:
+    return f"https://raw.githubusercontent.com/{repo}/{ref}/{path}"
@@ -5,6 +5,8 @@ from __future__ import annotations
 
 import argparse
 from dataclasses import dataclass
+import hashlib
+import json
 import os
 import shutil
 import subprocess
@@ -14,8 +16,10 @@ import urllib.error
 import urllib.parse
 import zipfile
 
-from github_utils import github_request
+from github_utils import default_scheduler, github_request
 DEFAULT_REF = "main"
+BUNDLE_FORMAT_VERSION = 1
+BUNDLE_MANIFEST = "manifest.json"
 
 
 @dataclass
@@ -27,6 +31,8 @@ class Args:
     dest: str | None = None
     name: str | None = None
     method: str = "auto"
+    mirror: str | None = None
+    export_bundle: str | None = None
 
 
 @dataclass
@@ -36,6 +42,8 @@ class Source:
     ref: str
     paths: list[str]
     repo_url: str | None = None
+    local_root: str | None = None
+    bundle: str | None = None
 
 
 class InstallError(Exception):
@@ -56,6 +64,16 @@ def _request(url: str) -> bytes:
     return github_request(url, "codex-skill-install")
 
 
+def _report_request_stats() -> None:
+    stats = default_scheduler().stats()
+    if stats.retries or stats.wait_seconds:
+        print(
+            f"GitHub requests: {stats.requests} "
+            f"(retries: {stats.retries}, waited: {stats.wait_seconds:.1f}s)",
+            file=sys.stderr,
+        )
+
+
 def _parse_github_url(url: str, default_ref: str) -> tuple[str, str, str, str | None]:
     parsed = urllib.parse.urlparse(url)
     if parsed.netloc != "github.com":
@@ -169,11 +187,37 @@ def _validate_skill(path: str) -> None:
         raise InstallError("SKILL.md not found in selected skill directory.")
 
 
+def _skill_symlinks(skill_src: str) -> dict[str, dict[str, str]]:
+    """Symlinks inside a skill as {relative path: {"target", "kind"}}."""
+    links: dict[str, dict[str, str]] = {}
+    for dirpath, dirnames, filenames in os.walk(skill_src):
+        dirnames[:] = sorted(d for d in dirnames if d != "__pycache__")
+        for entry in sorted(dirnames + filenames):
+            full_path = os.path.join(dirpath, entry)
+            if not os.path.islink(full_path):
+                continue
+            rel_path = os.path.relpath(full_path, skill_src).replace(os.sep, "/")
+            target = os.readlink(full_path)
+            _validate_symlink(skill_src, rel_path, target)
+            kind = "dir" if os.path.isdir(full_path) else "file"
+            links[rel_path] = {"target": target.replace(os.sep, "/"), "kind": kind}
+    return links
+
+
+def _validate_symlink(skill_root: str, rel_path: str, target: str) -> None:
+    link_dir = os.path.dirname(os.path.join(skill_root, rel_path))
+    resolved = os.path.normpath(os.path.join(link_dir, target))
+    root = os.path.normpath(skill_root)
+    if os.path.isabs(target) or not resolved.startswith(root + os.sep):
+        raise InstallError(f"Symlink {rel_path} points outside the skill: {target}")
+
+
 def _copy_skill(src: str, dest_dir: str) -> None:
     os.makedirs(os.path.dirname(dest_dir), exist_ok=True)
     if os.path.exists(dest_dir):
         raise InstallError(f"Destination already exists: {dest_dir}")
-    shutil.copytree(src, dest_dir)
+    _skill_symlinks(src)
+    shutil.copytree(src, dest_dir, symlinks=True)
 
 
 def _build_repo_url(owner: str, repo: str) -> str:
@@ -206,7 +250,163 @@ def _prepare_repo(source: Source, method: str, tmp_dir: str) -> str:
     raise InstallError("Unsupported method.")
 
 
+def _local_path_from_location(location: str) -> str:
+    if location.startswith("file://"):
+        parsed = urllib.parse.urlparse(location)
+        if parsed.netloc not in ("", "localhost"):
+            raise InstallError("file:// mirrors must point to a local path.")
+        location = urllib.parse.unquote(parsed.path)
+    return os.path.abspath(os.path.expanduser(location))
+
+
+def _resolve_mirror(location: str, paths: list[str] | None) -> Source:
+    local_path = _local_path_from_location(location)
+    if os.path.isdir(local_path):
+        if not paths:
+            raise InstallError("Missing --path for local mirror directory.")
+        return Source(
+            owner="", repo="", ref="", paths=list(paths), local_root=local_path
+        )
+    if os.path.isfile(local_path):
+        if not paths:
+            paths = sorted(_read_bundle_manifest(local_path)["skills"])
+        return Source(owner="", repo="", ref="", paths=list(paths), bundle=local_path)
+    raise InstallError(f"Mirror not found: {location}")
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file_handle:
+        for chunk in iter(lambda: file_handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _bundle_object_name(digest: str) -> str:
+    return f"objects/{digest[:2]}/{digest}"
+
+
+def _read_bundle_manifest(bundle_path: str) -> dict:
+    try:
+        with zipfile.ZipFile(bundle_path, "r") as zip_file:
+            manifest = json.loads(zip_file.read(BUNDLE_MANIFEST).decode("utf-8"))
+    except (KeyError, ValueError, zipfile.BadZipFile) as exc:
+        raise InstallError(f"Not a skill bundle: {bundle_path}") from exc
+    if manifest.get("version") != BUNDLE_FORMAT_VERSION:
+        raise InstallError("Unsupported skill bundle version.")
+    if not isinstance(manifest.get("skills"), dict):
+        raise InstallError("Skill bundle manifest is missing skills.")
+    return manifest
+
+
+def _extract_bundle_skills(bundle_path: str, names: list[str], dest_dir: str) -> str:
+    manifest = _read_bundle_manifest(bundle_path)
+    root = os.path.join(dest_dir, "bundle")
+    with zipfile.ZipFile(bundle_path, "r") as zip_file:
+        for name in names:
+            _validate_skill_name(name)
+            entry = manifest["skills"].get(name)
+            if entry is None:
+                raise InstallError(f"Skill not found in bundle: {name}")
+            skill_root = os.path.join(root, name)
+            for rel_path, digest in entry["files"].items():
+                _validate_relative_path(rel_path)
+                target = os.path.join(skill_root, rel_path)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                try:
+                    payload = zip_file.read(_bundle_object_name(digest))
+                except KeyError as exc:
+                    raise InstallError(
+                        f"Bundle is missing object for {name}/{rel_path}"
+                    ) from exc
+                if hashlib.sha256(payload).hexdigest() != digest:
+                    raise InstallError(f"Checksum mismatch for {name}/{rel_path}")
+                with open(target, "wb") as file_handle:
+                    file_handle.write(payload)
+            for rel_path in entry.get("executable", []):
+                target = os.path.join(skill_root, rel_path)
+                if rel_path in entry["files"]:
+                    os.chmod(target, os.stat(target).st_mode | 0o111)
+            for rel_path, link in entry.get("symlinks", {}).items():
+                _validate_relative_path(rel_path)
+                _validate_symlink(skill_root, rel_path, link["target"])
+                target = os.path.join(skill_root, rel_path)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.symlink(
+                    link["target"].replace("/", os.sep),
+                    target,
+                    target_is_directory=link["kind"] == "dir",
+                )
+    return root
+
+
+def _export_bundle(
+    bundle_path: str, skills: list[tuple[str, str, str]]
+) -> tuple[int, int]:
+    manifest = {"version": BUNDLE_FORMAT_VERSION, "skills": {}}
+    existing: zipfile.ZipFile | None = None
+    if os.path.exists(bundle_path):
+        manifest = _read_bundle_manifest(bundle_path)
+        existing = zipfile.ZipFile(bundle_path, "r")
+    objects: dict[str, str] = {}
+    for name, skill_src, origin in skills:
+        files: dict[str, str] = {}
+        executable: list[str] = []
+        for dirpath, dirnames, filenames in os.walk(skill_src):
+            dirnames[:] = sorted(d for d in dirnames if d != "__pycache__")
+            for filename in sorted(filenames):
+                full_path = os.path.join(dirpath, filename)
+                if os.path.islink(full_path):
+                    # Recorded under "symlinks" instead of stored as content
+                    continue
+                rel_path = os.path.relpath(full_path, skill_src).replace(os.sep, "/")
+                digest = _file_sha256(full_path)
+                files[rel_path] = digest
+                if os.access(full_path, os.X_OK):
+                    executable.append(rel_path)
+                objects.setdefault(digest, full_path)
+        manifest["skills"][name] = {
+            "source": origin,
+            "files": files,
+            "executable": executable,
+            "symlinks": _skill_symlinks(skill_src),
+        }
+
+    referenced = {
+        digest
+        for entry in manifest["skills"].values()
+        for digest in entry["files"].values()
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(bundle_path)), exist_ok=True)
+    tmp_path = f"{bundle_path}.{os.getpid()}.tmp"
+    try:
+        with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as out:
+            out.writestr(BUNDLE_MANIFEST, json.dumps(manifest, indent=2, sort_keys=True))
+            for digest in sorted(referenced):
+                if digest in objects:
+                    out.write(objects[digest], _bundle_object_name(digest))
+                elif existing is not None:
+                    out.writestr(
+                        _bundle_object_name(digest),
+                        existing.read(_bundle_object_name(digest)),
+                    )
+                else:
+                    raise InstallError(f"Missing bundle object {digest}")
+        os.replace(tmp_path, bundle_path)
+    finally:
+        if existing is not None:
+            existing.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    file_count = sum(len(entry["files"]) for entry in manifest["skills"].values())
+    return file_count, len(referenced)
+
+
 def _resolve_source(args: Args) -> Source:
+    if args.mirror:
+        return _resolve_mirror(args.mirror, args.path)
+    if args.url and args.url.startswith("file://"):
+        return _resolve_mirror(args.url, args.path)
     if args.url:
         owner, repo, ref, url_path = _parse_github_url(args.url, args.ref)
         if args.path is not None:
@@ -263,9 +463,35 @@ def _parse_args(argv: list[str]) -> Args:
         choices=["auto", "download", "git"],
         default="auto",
     )
+    parser.add_argument(
+        "--mirror",
+        help="Install from a local skill bundle, directory or file:// mirror "
+        "instead of GitHub (--path selects skills; defaults to all in a bundle)",
+    )
+    parser.add_argument(
+        "--export-bundle",
+        metavar="BUNDLE",
+        help="Write the resolved skills into an offline bundle instead of installing",
+    )
     return parser.parse_args(argv, namespace=Args())
 
 
+def _prepare_source(source: Source, method: str, tmp_dir: str) -> str:
+    if source.bundle:
+        return _extract_bundle_skills(source.bundle, source.paths, tmp_dir)
+    if source.local_root:
+        return source.local_root
+    return _prepare_repo(source, method, tmp_dir)
+
+
+def _describe_origin(source: Source, path: str) -> str:
+    if source.local_root:
+        return f"file://{os.path.join(source.local_root, path)}"
+    if source.bundle:
+        return f"bundle:{source.bundle}#{path}"
+    return f"https://github.com/{source.owner}/{source.repo}/tree/{source.ref}/{path}"
+
+
 def main(argv: list[str]) -> int:
     args = _parse_args(argv)
     try:
@@ -278,26 +504,40 @@ def main(argv: list[str]) -> int:
         dest_root = args.dest or _default_dest()
         tmp_dir = tempfile.mkdtemp(prefix="skill-install-", dir=_tmp_root())
         try:
-            repo_root = _prepare_repo(source, args.method, tmp_dir)
+            repo_root = _prepare_source(source, args.method, tmp_dir)
             installed = []
+            exported = []
             for path in source.paths:
                 skill_name = args.name if len(source.paths) == 1 else None
                 skill_name = skill_name or os.path.basename(path.rstrip("/"))
                 _validate_skill_name(skill_name)
                 if not skill_name:
                     raise InstallError("Unable to derive skill name.")
+                skill_src = os.path.join(repo_root, path)
+                if args.export_bundle:
+                    _validate_skill(skill_src)
+                    exported.append(
+                        (skill_name, skill_src, _describe_origin(source, path))
+                    )
+                    continue
                 dest_dir = os.path.join(dest_root, skill_name)
                 if os.path.exists(dest_dir):
                     raise InstallError(f"Destination already exists: {dest_dir}")
-                skill_src = os.path.join(repo_root, path)
                 _validate_skill(skill_src)
                 _copy_skill(skill_src, dest_dir)
                 installed.append((skill_name, dest_dir))
+            if args.export_bundle:
+                file_count, object_count = _export_bundle(args.export_bundle, exported)
         finally:
             if os.path.isdir(tmp_dir):
                 shutil.rmtree(tmp_dir, ignore_errors=True)
         for skill_name, dest_dir in installed:
             print(f"Installed {skill_name} to {dest_dir}")
+        if args.export_bundle:
+            for skill_name, _, _ in exported:
+                print(f"Exported {skill_name} to {args.export_bundle}")
+            print(f"Bundle holds {file_count} files in {object_count} unique objects")
+        _report_request_stats()
         return 0
     except InstallError as exc:
         print(f"Error: {exc}", file=sys.stderr)
@@ -4,16 +4,21 @@
 from __future__ import annotations
 
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+import http.client
 import json
 import os
 import sys
 import urllib.error
 
-from github_utils import github_api_contents_url, github_request
+from github_utils import github_api_contents_url, github_raw_url, github_request
 
 DEFAULT_REPO = "openai/skills"
 DEFAULT_PATH = "skills/.curated"
 DEFAULT_REF = "main"
+DEFAULT_JOBS = 8
+DEFAULT_TIMEOUT = 10.0
+CATALOG_CACHE_VERSION = 1
 
 
 class ListError(Exception):
@@ -25,10 +30,14 @@ class Args(argparse.Namespace):
     path: str
     ref: str
     format: str
+    catalog: bool
+    jobs: int
+    timeout: float
+    refresh: bool
 
 
-def _request(url: str) -> bytes:
-    return github_request(url, "codex-skill-list")
+def _request(url: str, timeout: float | None = None) -> bytes:
+    return github_request(url, "codex-skill-list", timeout=timeout)
 
 
 def _codex_home() -> str:
@@ -47,7 +56,7 @@ def _installed_skills() -> set[str]:
     return entries
 
 
-def _list_curated(repo: str, path: str, ref: str) -> list[str]:
+def _fetch_listing(repo: str, path: str, ref: str) -> list[dict]:
     api_url = github_api_contents_url(repo, path, ref)
     try:
         payload = _request(api_url)
@@ -61,8 +70,144 @@ def _list_curated(repo: str, path: str, ref: str) -> list[str]:
     data = json.loads(payload.decode("utf-8"))
     if not isinstance(data, list):
         raise ListError("Unexpected curated listing response.")
-    skills = [item["name"] for item in data if item.get("type") == "dir"]
-    return sorted(skills)
+    entries = [item for item in data if item.get("type") == "dir"]
+    return sorted(entries, key=lambda item: item["name"])
+
+
+def _list_curated(repo: str, path: str, ref: str) -> list[str]:
+    return [item["name"] for item in _fetch_listing(repo, path, ref)]
+
+
+def _catalog_cache_path() -> str:
+    return os.path.join(_codex_home(), "cache", "curated-skills-catalog.json")
+
+
+def _load_catalog_cache() -> dict[str, dict]:
+    try:
+        with open(_catalog_cache_path(), encoding="utf-8") as file_handle:
+            data = json.load(file_handle)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != CATALOG_CACHE_VERSION:
+        return {}
+    entries = data.get("entries")
+    return entries if isinstance(entries, dict) else {}
+
+
+def _save_catalog_cache(entries: dict[str, dict]) -> None:
+    cache_path = _catalog_cache_path()
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as file_handle:
+            json.dump({"version": CATALOG_CACHE_VERSION, "entries": entries}, file_handle)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _parse_frontmatter(text: str) -> dict[str, str]:
+    lines = text.splitlines()
+    if not lines or lines[0].strip() != "---":
+        return {}
+    fields: dict[str, str] = {}
+    for line in lines[1:]:
+        if line.strip() == "---":
+            break
+        if line[:1].isspace() or ":" not in line:
+            continue
+        key, value = line.split(":", 1)
+        value = value.strip()
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+            value = value[1:-1]
+        fields[key.strip()] = value
+    return fields
+
+
+def _fetch_skill_meta(
+    repo: str, path: str, ref: str, name: str, timeout: float
+) -> dict:
+    url = github_raw_url(repo, f"{path}/{name}/SKILL.md", ref)
+    try:
+        payload = _request(url, timeout=timeout)
+    except urllib.error.HTTPError as exc:
+        return {"error": f"HTTP {exc.code}"}
+    except (OSError, http.client.HTTPException) as exc:
+        # URLError, timeouts and connections dropped while reading the body
+        # (ConnectionResetError, RemoteDisconnected, IncompleteRead)
+        reason = getattr(exc, "reason", exc)
+        return {"error": f"Fetch failed: {reason!s}"}
+    fields = _parse_frontmatter(payload.decode("utf-8", errors="replace"))
+    return {
+        "description": fields.get("description", ""),
+        "size": len(payload),
+    }
+
+
+def _build_catalog(
+    repo: str, path: str, ref: str, jobs: int, timeout: float, refresh: bool
+) -> list[dict]:
+    entries = _fetch_listing(repo, path, ref)
+    cache = {} if refresh else _load_catalog_cache()
+    results: dict[str, dict] = {}
+    pending: list[str] = []
+    for item in entries:
+        name = item["name"]
+        key = f"{repo}@{ref}:{path}/{name}"
+        cached = cache.get(key)
+        if cached and item.get("sha") and cached.get("sha") == item.get("sha"):
+            results[name] = cached
+        else:
+            pending.append(name)
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+            fetched = executor.map(
+                lambda name: _fetch_skill_meta(repo, path, ref, name, timeout),
+                pending,
+            )
+            for name, meta in zip(pending, fetched):
+                results[name] = meta
+
+    sha_by_name = {item["name"]: item.get("sha") for item in entries}
+    for name in pending:
+        meta = results[name]
+        if "error" not in meta and sha_by_name[name]:
+            meta["sha"] = sha_by_name[name]
+            cache[f"{repo}@{ref}:{path}/{name}"] = meta
+    if pending:
+        _save_catalog_cache(cache)
+
+    installed = _installed_skills()
+    catalog = []
+    for item in entries:
+        name = item["name"]
+        meta = results[name]
+        record = {
+            "name": name,
+            "description": meta.get("description", ""),
+            "size": meta.get("size"),
+            "installed": name in installed,
+        }
+        if "error" in meta:
+            record["error"] = meta["error"]
+        catalog.append(record)
+    return catalog
+
+
+def _print_catalog(catalog: list[dict], output_format: str) -> None:
+    if output_format == "json":
+        print(json.dumps(catalog))
+        return
+    for idx, record in enumerate(catalog, start=1):
+        suffix = " (already installed)" if record["installed"] else ""
+        if "error" in record:
+            print(f"{idx}. {record['name']}{suffix} [metadata unavailable: {record['error']}]")
+            continue
+        print(f"{idx}. {record['name']}{suffix} [{record['size']} bytes]")
+        if record["description"]:
+            print(f"   {record['description']}")
 
 
 def _parse_args(argv: list[str]) -> Args:
@@ -76,12 +221,40 @@ def _parse_args(argv: list[str]) -> Args:
         default="text",
         help="Output format",
     )
+    parser.add_argument(
+        "--catalog",
+        action="store_true",
+        help="Fetch each skill's SKILL.md frontmatter (description, size)",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=DEFAULT_JOBS,
+        help="Maximum concurrent metadata fetches in catalog mode",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=DEFAULT_TIMEOUT,
+        help="Per-request timeout in seconds for metadata fetches",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore the cached catalog and refetch all metadata",
+    )
     return parser.parse_args(argv, namespace=Args())
 
 
 def main(argv: list[str]) -> int:
     args = _parse_args(argv)
     try:
+        if args.catalog:
+            catalog = _build_catalog(
+                args.repo, args.path, args.ref, args.jobs, args.timeout, args.refresh
+            )
+            _print_catalog(catalog, args.format)
+            return 0
         skills = _list_curated(args.repo, args.path, args.ref)
         installed = _installed_skills()
         if args.format == "json":
@@ -0,0 +1,258 @@
+"""Tests for the shared GitHub request scheduler."""
+
+from __future__ import annotations
+
+import email.utils
+import sys
+import threading
+import urllib.error
+from email.message import Message
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+import github_utils  # noqa: E402
+from github_utils import RequestScheduler, github_request  # noqa: E402
+
+NOW = 1000.0
+URL = "https://api.github.com/repos/openai/skills/contents/skills"
+
+
+def _headers(values: dict[str, object]) -> Message:
+    headers = Message()
+    for name, value in values.items():
+        headers[name] = str(value)
+    return headers
+
+
+class FakeResponse:
+    def __init__(self, body: bytes = b"ok", headers: dict[str, object] | None = None):
+        self.headers = _headers(headers or {})
+        self._body = body
+
+    def read(self) -> bytes:
+        return self._body
+
+    def __enter__(self) -> "FakeResponse":
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+
+def http_error(code: int, headers: dict[str, object] | None = None) -> urllib.error.HTTPError:
+    return urllib.error.HTTPError(URL, code, "error", _headers(headers or {}), None)
+
+
+class FakeGitHub:
+    """Stands in for urlopen: answers with the queued outcomes, in order."""
+
+    def __init__(self, monkeypatch, outcomes):
+        self.outcomes = list(outcomes)
+        self.requests = []
+        self._lock = threading.Lock()
+        monkeypatch.setattr(github_utils.urllib.request, "urlopen", self.urlopen)
+
+    def urlopen(self, request, timeout=None):
+        with self._lock:
+            self.requests.append(request)
+            outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+
+class Sleeps(list):
+    """Records the scheduler's sleeps instead of sleeping."""
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+
+    def __call__(self, seconds: float) -> None:
+        with self._lock:
+            self.append(seconds)
+
+
+class AdvancingSleeps(Sleeps):
+    """Sleeps that move the fake clock forward, for waits that must outlast a reset."""
+
+    def __init__(self):
+        super().__init__()
+        self.now = NOW
+
+    def __call__(self, seconds: float) -> None:
+        super().__call__(seconds)
+        self.now += seconds
+
+    def clock(self) -> float:
+        return self.now
+
+
+def make_scheduler(sleeps: Sleeps, **options) -> RequestScheduler:
+    clock = sleeps.clock if isinstance(sleeps, AdvancingSleeps) else (lambda: NOW)
+    return RequestScheduler(sleep=sleeps, clock=clock, **options)
+
+
+def fetch(scheduler: RequestScheduler) -> bytes:
+    return github_request(URL, "skill-tests", scheduler=scheduler)
+
+
+def test_retries_server_errors_with_bounded_jittered_backoff(monkeypatch):
+    FakeGitHub(monkeypatch, [http_error(502), http_error(503), http_error(500), FakeResponse(b"done")])
+    sleeps = Sleeps()
+    scheduler = make_scheduler(sleeps, backoff_base=0.5, backoff_cap=1.5)
+
+    assert fetch(scheduler) == b"done"
+
+    stats = scheduler.stats()
+    assert (stats.requests, stats.retries) == (4, 3)
+    # Attempt n waits uniform(0, min(cap, base * 2**n))
+    for attempt, wait in enumerate(sleeps):
+        assert 0 <= wait <= min(1.5, 0.5 * 2 ** attempt)
+    assert stats.wait_seconds == pytest.approx(sum(sleeps))
+
+
+def test_gives_up_after_max_retries(monkeypatch):
+    FakeGitHub(monkeypatch, [http_error(500)] * 3)
+    scheduler = make_scheduler(Sleeps(), max_retries=2)
+
+    with pytest.raises(urllib.error.HTTPError) as excinfo:
+        fetch(scheduler)
+
+    assert excinfo.value.code == 500
+    stats = scheduler.stats()
+    assert (stats.requests, stats.retries) == (3, 2)
+
+
+def test_retries_network_errors(monkeypatch):
+    FakeGitHub(monkeypatch, [urllib.error.URLError("reset"), TimeoutError(), FakeResponse()])
+    scheduler = make_scheduler(Sleeps())
+
+    assert fetch(scheduler) == b"ok"
+    assert scheduler.stats().retries == 2
+
+
+def test_honours_retry_after_seconds_and_dates(monkeypatch):
+    retry_date = email.utils.formatdate(NOW + 12, usegmt=True)
+    FakeGitHub(monkeypatch, [
+        http_error(429, {"Retry-After": 7}),
+        http_error(503, {"Retry-After": retry_date}),
+        FakeResponse(),
+    ])
+    sleeps = Sleeps()
+    scheduler = make_scheduler(sleeps)
+
+    assert fetch(scheduler) == b"ok"
+    assert sleeps[0] == 7.0
+    assert sleeps[1] == pytest.approx(12.0, abs=1.0)
+
+
+def test_rate_limited_403_waits_for_the_reset(monkeypatch):
+    FakeGitHub(monkeypatch, [
+        http_error(403, {"X-RateLimit-Remaining": 0, "X-RateLimit-Reset": int(NOW) + 40}),
+        FakeResponse(headers={"X-RateLimit-Remaining": 4999, "X-RateLimit-Reset": int(NOW) + 3600}),
+    ])
+    sleeps = AdvancingSleeps()
+    scheduler = make_scheduler(sleeps)
+
+    assert fetch(scheduler) == b"ok"
+
+    # Reset time plus up to one second of jitter
+    assert len(sleeps) == 1 and 40.0 <= sleeps[0] <= 41.0
+    stats = scheduler.stats()
+    assert stats.retries == 1
+    assert (stats.rate_limit_remaining, stats.rate_limit_reset) == (4999, NOW + 3600)
+
+
+def test_forbidden_without_rate_limit_is_not_retried(monkeypatch):
+    FakeGitHub(monkeypatch, [http_error(403), FakeResponse()])
+    scheduler = make_scheduler(Sleeps())
+
+    with pytest.raises(urllib.error.HTTPError):
+        fetch(scheduler)
+    assert scheduler.stats().retries == 0
+
+
+def test_waits_longer_than_max_wait_surface_the_error(monkeypatch):
+    FakeGitHub(monkeypatch, [http_error(429, {"Retry-After": 600}), FakeResponse()])
+    sleeps = Sleeps()
+    scheduler = make_scheduler(sleeps, max_wait=300.0)
+
+    with pytest.raises(urllib.error.HTTPError):
+        fetch(scheduler)
+    assert sleeps == []
+
+
+def test_non_idempotent_requests_are_not_retried(monkeypatch):
+    FakeGitHub(monkeypatch, [http_error(503), FakeResponse()])
+    scheduler = make_scheduler(Sleeps())
+
+    with pytest.raises(urllib.error.HTTPError):
+        scheduler.request(URL, {"User-Agent": "skill-tests"}, method="POST")
+    assert scheduler.stats().retries == 0
+
+
+def quota_responses(start: int, window: float, count: int) -> list[FakeResponse]:
+    """Responses whose rate-limit headers count the quota down from start."""
+    reset = int(NOW + window)
+    return [FakeResponse(headers={"X-RateLimit-Remaining": start - i, "X-RateLimit-Reset": reset})
+            for i in range(count)]
+
+
+def test_concurrent_callers_get_distinct_slots(monkeypatch):
+    FakeGitHub(monkeypatch, quota_responses(start=4, window=50.0, count=5))
+    sleeps = Sleeps()
+    scheduler = make_scheduler(sleeps, low_watermark=10)
+    fetch(scheduler)
+    barrier = threading.Barrier(4)
+
+    def call() -> None:
+        barrier.wait()
+        fetch(scheduler)
+
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    waits = sorted(sleeps)
+    assert len(waits) == 4
+    # Every caller waits at least one interval longer than the previous one,
+    # instead of all of them sleeping window / (remaining + 1) and firing together.
+    assert all(later - earlier >= 9.999 for earlier, later in zip(waits, waits[1:]))
+    assert waits[-1] <= 50.0
+    assert scheduler.stats().requests == 5
+
+
+def test_first_caller_waits_one_interval(monkeypatch):
+    FakeGitHub(monkeypatch, quota_responses(start=0, window=30.0, count=2))
+    sleeps = Sleeps()
+    scheduler = make_scheduler(sleeps)
+    fetch(scheduler)
+    fetch(scheduler)
+    assert sleeps == [30.0]
+
+
+def test_waits_never_extend_past_the_reset(monkeypatch):
+    FakeGitHub(monkeypatch, [FakeResponse(headers={"X-RateLimit-Remaining": 1,
+                                                   "X-RateLimit-Reset": int(NOW + 20)})] * 6)
+    sleeps = Sleeps()
+    scheduler = make_scheduler(sleeps)
+    for _ in range(6):
+        fetch(scheduler)
+    assert len(sleeps) == 5
+    assert max(sleeps) <= 20.0
+
+
+def test_quota_above_watermark_is_not_throttled(monkeypatch):
+    FakeGitHub(monkeypatch, quota_responses(start=100, window=60.0, count=2))
+    sleeps = Sleeps()
+    scheduler = make_scheduler(sleeps)
+    fetch(scheduler)
+    fetch(scheduler)
+    assert sleeps == []
+    assert scheduler.stats().wait_seconds == 0.0
@@ -0,0 +1,78 @@
+"""Tests for offline skill bundles: export/import round trips against a direct install."""
+
+from __future__ import annotations
+
+import importlib.util
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[1] / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+_spec = importlib.util.spec_from_file_location("install_skill", SCRIPTS_DIR / "install-skill-from-github.py")
+installer = importlib.util.module_from_spec(_spec)
+sys.modules[_spec.name] = installer
+_spec.loader.exec_module(installer)
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    skill = tmp_path / "mirror" / "demo-skill"
+    (skill / "scripts").mkdir(parents=True)
+    (skill / "references").mkdir()
+    (skill / "SKILL.md").write_text("---\nname: demo-skill\n---\n")
+    (skill / "scripts" / "run.sh").write_text("#!/bin/sh\necho run\n")
+    (skill / "scripts" / "run.sh").chmod(0o755)
+    (skill / "references" / "api.md").write_text("# API\n")
+    os.symlink("references/api.md", skill / "API.md")
+    os.symlink("references", skill / "docs", target_is_directory=True)
+    os.symlink("../run.sh", skill / "scripts" / "dangling.sh")
+    return tmp_path / "mirror"
+
+
+def snapshot(root: Path) -> dict[str, tuple]:
+    """Every entry under root: links by target, files by content and exec bit."""
+    entries = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        for name in dirnames + filenames:
+            path = Path(dirpath) / name
+            rel_path = path.relative_to(root).as_posix()
+            if path.is_symlink():
+                entries[rel_path] = ("link", os.readlink(path))
+            elif path.is_file():
+                entries[rel_path] = ("file", path.read_bytes(), os.access(path, os.X_OK))
+            else:
+                entries[rel_path] = ("dir",)
+    return entries
+
+
+def install(*argv: str) -> None:
+    assert installer.main(list(argv)) == 0
+
+
+def test_bundle_round_trip_matches_direct_install(mirror, tmp_path):
+    bundle = tmp_path / "skills.zip"
+    install("--mirror", str(mirror), "--path", "demo-skill", "--export-bundle", str(bundle))
+    install("--mirror", str(bundle), "--dest", str(tmp_path / "from-bundle"))
+    install("--mirror", str(mirror), "--path", "demo-skill", "--dest", str(tmp_path / "direct"))
+
+    from_bundle = snapshot(tmp_path / "from-bundle" / "demo-skill")
+    assert from_bundle == snapshot(tmp_path / "direct" / "demo-skill")
+    assert from_bundle["API.md"] == ("link", "references/api.md")
+    assert from_bundle["docs"] == ("link", "references")
+    assert (tmp_path / "from-bundle" / "demo-skill" / "docs" / "api.md").read_text() == "# API\n"
+
+
+def test_symlink_outside_the_skill_fails_naming_the_link(mirror, tmp_path, capsys):
+    (mirror / "shared.md").write_text("shared\n")
+    os.symlink("../../shared.md", mirror / "demo-skill" / "references" / "shared.md")
+
+    code = installer.main(["--mirror", str(mirror), "--path", "demo-skill",
+                           "--export-bundle", str(tmp_path / "skills.zip")])
+
+    assert code == 1
+    assert "Symlink references/shared.md points outside the skill: ../../shared.md" in capsys.readouterr().err
+    assert not (tmp_path / "skills.zip").exists()
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""Load-testing harness for the MCP server templates - throughput and latency percentiles
+
+Starts a server locally (stdio subprocess, or the SSE template on a free port), drives
+concurrent tools/list and tools/call traffic through the official MCP client, and
+reports throughput and p50/p95/p99 latency per operation. Everything runs on this
+machine; no network access is needed.
+
+Usage:
+    python benchmark_mcp_server.py --transport stdio --concurrency 16 --requests 2000
+    python benchmark_mcp_server.py --transport sse --clients 4 --duration 20 --json sse.json
+    python benchmark_mcp_server.py --transport sse --json new.json --compare sse.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+from typing import Any, Optional
+
+try:
+    import anyio
+    from mcp import ClientSession, StdioServerParameters
+    from mcp.client.sse import sse_client
+    from mcp.client.stdio import stdio_client
+except ImportError:
+    print("Error: mcp package is not installed. Please install it with: pip install mcp", file=sys.stderr)
+    sys.exit(1)
+
+scripts_dir = Path(__file__).parent
+DEFAULT_SERVERS = {
+    "stdio": scripts_dir / "template_mcp_server.py",
+    "sse": scripts_dir / "template_mcp_server_sse.py",
+}
+OPERATIONS = ("tools/list", "tools/call")
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict[str, Any]:
+    """Latency statistics in milliseconds plus throughput for one operation"""
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "throughput": len(values) / elapsed if elapsed else 0.0,
+        "mean_ms": sum(values) / len(values) * 1000 if values else 0.0,
+        "p50_ms": percentile(values, 0.50) * 1000,
+        "p95_ms": percentile(values, 0.95) * 1000,
+        "p99_ms": percentile(values, 0.99) * 1000,
+        "max_ms": values[-1] * 1000 if values else 0.0,
+    }
+
+
+class LoadGenerator:
+    """Concurrent workers sharing a request budget (or deadline) across client sessions"""
+
+    def __init__(self, tool: str, arguments: dict[str, Any], list_ratio: float,
+                 vary: Optional[str], requests: Optional[int], duration: Optional[float]):
+        self.tool = tool
+        self.arguments = arguments
+        self.list_ratio = list_ratio
+        self.vary = vary
+        self.remaining = requests
+        self.deadline: Optional[float] = None
+        self.duration = duration
+        self.issued = 0
+        self.latencies: dict[str, list[float]] = {op: [] for op in OPERATIONS}
+        self.errors: dict[str, int] = {op: 0 for op in OPERATIONS}
+        self.error_samples: list[str] = []
+        self.recording = True
+
+    def _next(self) -> bool:
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            return False
+        if self.remaining is not None:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+        self.issued += 1
+        return True
+
+    def _arguments(self) -> dict[str, Any]:
+        if self.vary is None:
+            return self.arguments
+        # Make every call distinct so caching and coalescing do not hide the tool's cost
+        arguments = dict(self.arguments)
+        arguments[self.vary] = f"{arguments.get(self.vary, '')}{self.issued}"
+        return arguments
+
+    async def worker(self, session: ClientSession):
+        while self._next():
+            operation = "tools/list" if random.random() < self.list_ratio else "tools/call"
+            start = time.perf_counter()
+            try:
+                if operation == "tools/list":
+                    await session.list_tools()
+                    failed = None
+                else:
+                    result = await session.call_tool(self.tool, self._arguments())
+                    failed = result.content[0].text if result.isError and result.content else None
+                    if result.isError and failed is None:
+                        failed = "tool returned isError"
+            except (anyio.BrokenResourceError, anyio.ClosedResourceError) as e:
+                # The session is gone (server restarted or closed the stream): stop this worker
+                self.errors[operation] += 1
+                if len(self.error_samples) < 5:
+                    self.error_samples.append(f"{operation}: session closed ({type(e).__name__})")
+                return
+            except Exception as e:
+                failed = f"{type(e).__name__}: {e}"
+            latency = time.perf_counter() - start
+            if not self.recording:
+                continue
+            if failed is None:
+                self.latencies[operation].append(latency)
+            else:
+                self.errors[operation] += 1
+                if len(self.error_samples) < 5:
+                    self.error_samples.append(f"{operation}: {failed}")
+
+
+async def run_load(sessions: list[ClientSession], load: LoadGenerator, concurrency: int,
+                   warmup: int) -> float:
+    """Warm up, then run the measured load; returns the measured wall time"""
+    for session in sessions:
+        await session.initialize()
+    if warmup:
+        budget, load.remaining = load.remaining, warmup
+        load.recording = False
+        await asyncio.gather(*(load.worker(sessions[i % len(sessions)]) for i in range(concurrency)))
+        load.remaining, load.recording, load.issued = budget, True, 0
+
+    start = time.perf_counter()
+    if load.duration is not None:
+        load.deadline = start + load.duration
+    await asyncio.gather(*(load.worker(sessions[i % len(sessions)]) for i in range(concurrency)))
+    return time.perf_counter() - start
+
+
+async def bench_stdio(server: Path, env: dict[str, str], load: LoadGenerator, concurrency: int,
+                      warmup: int) -> float:
+    params = StdioServerParameters(command=sys.executable, args=[str(server)], env=env)
+    async with stdio_client(params) as (read, write):
+        async with ClientSession(read, write) as session:
+            return await run_load([session], load, concurrency, warmup)
+
+
+async def bench_sse(url: str, clients: int, load: LoadGenerator, concurrency: int, warmup: int) -> float:
+    async def open_sessions(count: int, sessions: list[ClientSession]) -> float:
+        if count == 0:
+            return await run_load(sessions, load, concurrency, warmup)
+        async with sse_client(url) as (read, write):
+            async with ClientSession(read, write) as session:
+                return await open_sessions(count - 1, sessions + [session])
+
+    return await open_sessions(clients, [])
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_sse_server(server: Path, env: dict[str, str], timeout: float = 30.0) -> tuple[subprocess.Popen, str]:
+    """Start the SSE template on a free local port and wait until /health answers"""
+    port = free_port()
+    env = dict(env, MCP_HOST="127.0.0.1", MCP_PORT=str(port))
+    # stderr goes to a file: a pipe nobody reads during the run could fill up and stall the server
+    log = tempfile.TemporaryFile(mode="w+")
+    process = subprocess.Popen([sys.executable, str(server)], env=env,
+                               stdout=subprocess.DEVNULL, stderr=log, text=True)
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            log.seek(0)
+            raise RuntimeError(f"Server exited with code {process.returncode}:\n{log.read()}")
+        try:
+            with urllib.request.urlopen(f"{base}/health", timeout=1):
+                return process, base
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"Server did not become healthy within {timeout:g}s")
+
+
+def print_report(results: dict[str, Any], baseline: Optional[dict[str, Any]] = None):
+    config = results["config"]
+    print(f"\n{config['transport']} | concurrency {config['concurrency']} | clients {config['clients']} | "
+          f"{results['elapsed']:.2f}s | {results['throughput']:.1f} req/s total")
+    print(f"  {'operation':<11} {'requests':>8} {'errors':>6} {'req/s':>9} {'mean':>8} "
+          f"{'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}  (ms)")
+    for operation in OPERATIONS:
+        row = results["operations"][operation]
+        if not row["requests"] and not row["errors"]:
+            continue
+        print(f"  {operation:<11} {row['requests']:>8} {row['errors']:>6} {row['throughput']:>9.1f} "
+              f"{row['mean_ms']:>8.2f} {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} "
+              f"{row['p99_ms']:>8.2f} {row['max_ms']:>8.2f}")
+        if baseline and operation in baseline.get("operations", {}):
+            old = baseline["operations"][operation]
+
+            def change(key: str) -> str:
+                return f"{(row[key] / old[key] - 1) * 100:+.0f}%" if old.get(key) else "n/a"
+
+            print(f"  {'  vs base':<11} {'':>8} {'':>6} {change('throughput'):>9} {change('mean_ms'):>8} "
+                  f"{change('p50_ms'):>8} {change('p95_ms'):>8} {change('p99_ms'):>8} {change('max_ms'):>8}")
+    for sample in results["error_samples"]:
+        print(f"  ! {sample}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Drive concurrent tools/list and tools/call traffic against an MCP server and report latency",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # stdio template, 16 concurrent requests, 2000 requests total
+  python benchmark_mcp_server.py --concurrency 16 --requests 2000
+
+  # SSE template on a free local port, 4 client sessions, 20 seconds
+  python benchmark_mcp_server.py --transport sse --clients 4 --duration 20
+
+  # Your own server and tool; distinct argument values defeat the result cache
+  python benchmark_mcp_server.py --server my_server.py --tool search \\
+      --arguments '{"query": "q"}' --vary query
+
+  # An SSE server that is already running
+  python benchmark_mcp_server.py --transport sse --url http://127.0.0.1:8000/sse
+
+  # Save a run and compare a later one against it
+  python benchmark_mcp_server.py --json before.json
+  python benchmark_mcp_server.py --json after.json --compare before.json
+        """,
+    )
+    parser.add_argument("--transport", choices=["stdio", "sse"], default="stdio",
+                        help="How to reach the server (default: stdio)")
+    parser.add_argument("--server", type=Path, default=None,
+                        help="Server script to start (default: the template for the transport)")
+    parser.add_argument("--url", help="SSE endpoint of an already running server (no server is started)")
+    parser.add_argument("--clients", type=int, default=1,
+                        help="Client sessions to open for SSE; requests are spread across them (default: 1)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight at once (default: 8)")
+    load_size = parser.add_mutually_exclusive_group()
+    load_size.add_argument("--requests", type=int, default=None, help="Total measured requests (default: 1000)")
+    load_size.add_argument("--duration", type=float, default=None, help="Measure for this many seconds instead")
+    parser.add_argument("--warmup", type=int, default=50, help="Unmeasured requests sent first (default: 50)")
+    parser.add_argument("--tool", default="your_tool", help="Tool to call (default: your_tool)")
+    parser.add_argument("--arguments", default='{"param1": "benchmark"}',
+                        help='Tool arguments as JSON (default: {"param1": "benchmark"})')
+    parser.add_argument("--vary", metavar="ARG",
+                        help="Append a request counter to this string argument so every call is distinct")
+    parser.add_argument("--list-ratio", type=float, default=0.1,
+                        help="Fraction of requests that are tools/list (default: 0.1)")
+    parser.add_argument("--env", action="append", default=[], metavar="NAME=VALUE",
+                        help="Extra environment for the started server, e.g. --env MCP_CACHE_SIZE=0")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the operation mix (default: 0)")
+    parser.add_argument("--json", metavar="FILE", help="Write the results as JSON")
+    parser.add_argument("--compare", metavar="FILE", help="Show changes relative to a previous --json run")
+    args = parser.parse_args()
+
+    try:
+        arguments = json.loads(args.arguments)
+        env = dict(os.environ, **dict(item.split("=", 1) for item in args.env))
+    except (json.JSONDecodeError, ValueError) as e:
+        print(f"Error: invalid --arguments or --env: {e}", file=sys.stderr)
+        return 1
+    if args.concurrency < 1 or args.clients < 1:
+        print("Error: --concurrency and --clients must be at least 1", file=sys.stderr)
+        return 1
+    if args.requests is None and args.duration is None:
+        args.requests = 1000
+    server = args.server or DEFAULT_SERVERS[args.transport]
+
+    random.seed(args.seed)
+    load = LoadGenerator(args.tool, arguments, args.list_ratio, args.vary, args.requests, args.duration)
+    process = None
+    try:
+        if args.transport == "stdio":
+            elapsed = asyncio.run(bench_stdio(server, env, load, args.concurrency, args.warmup))
+        else:
+            url = args.url
+            if url is None:
+                process, base = start_sse_server(server, env)
+                url = f"{base}/sse"
+            elapsed = asyncio.run(bench_sse(url, args.clients, load, args.concurrency, args.warmup))
+    except Exception as e:
+        print(f"Error: benchmark failed: {type(e).__name__}: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    total = sum(len(values) for values in load.latencies.values())
+    results = {
+        "config": {
+            "transport": args.transport,
+            "server": args.url or str(server),
+            "clients": args.clients if args.transport == "sse" else 1,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "duration": args.duration,
+            "tool": args.tool,
+            "arguments": arguments,
+            "vary": args.vary,
+            "list_ratio": args.list_ratio,
+        },
+        "elapsed": elapsed,
+        "throughput": total / elapsed if elapsed else 0.0,
+        "operations": {op: summarize(load.latencies[op], load.errors[op], elapsed) for op in OPERATIONS},
+        "error_samples": load.error_samples,
+    }
+
+    baseline = None
+    if args.compare:
+        try:
+            with open(args.compare) as f:
+                baseline = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Warning: could not read {args.compare}: {e}", file=sys.stderr)
+    print_report(results, baseline)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
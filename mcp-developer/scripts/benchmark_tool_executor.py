@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Concurrency benchmark for the tool execution layer - throughput vs. worker count
+
+Fires a burst of concurrent tool calls through ToolExecutor for each pool size and
+reports calls/second, once for a blocking I/O tool (thread pool) and once for a
+CPU-bound tool (process pool). The "inline" row calls the tool directly inside the
+async handler, which is what the templates did before the execution layer.
+
+Usage:
+    python benchmark_tool_executor.py
+    python benchmark_tool_executor.py --workers 1 2 4 8 --calls 64 --min-speedup 1.5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+scripts_dir = Path(__file__).parent
+if str(scripts_dir) not in sys.path:
+    sys.path.insert(0, str(scripts_dir))
+
+from mcp_tool_runtime import ToolExecutor, runs_in
+
+
+@runs_in("thread")
+def blocking_tool(seconds: float) -> float:
+    """Stands in for blocking I/O (database driver, HTTP client, file system)"""
+    time.sleep(seconds)
+    return seconds
+
+
+@runs_in("process")
+def cpu_tool(iterations: int) -> int:
+    """Stands in for pure-Python computation that holds the GIL"""
+    total = 0
+    for i in range(iterations):
+        total += i * i % 7
+    return total
+
+
+async def run_burst(executor: Optional[ToolExecutor], tool: Callable, arg, calls: int) -> float:
+    """Run `calls` concurrent tool calls and return calls/second"""
+    async def call_inline():
+        return tool(arg)
+
+    start = time.perf_counter()
+    if executor is None:
+        await asyncio.gather(*(call_inline() for _ in range(calls)))
+    else:
+        await asyncio.gather(*(executor.call(tool, arg) for _ in range(calls)))
+    return calls / (time.perf_counter() - start)
+
+
+def measure(tool: Callable, arg, workers: list[int], calls: int) -> list[dict]:
+    rows = [{"workers": "inline", "throughput": asyncio.run(run_burst(None, tool, arg, calls))}]
+    for count in workers:
+        executor = ToolExecutor(max_threads=count, max_processes=count)
+        try:
+            executor.warm_up([tool])
+            throughput = asyncio.run(run_burst(executor, tool, arg, calls))
+        finally:
+            executor.shutdown()
+        rows.append({"workers": count, "throughput": throughput})
+    baseline = rows[1]["throughput"] if len(rows) > 1 else rows[0]["throughput"]
+    for row in rows:
+        row["speedup"] = row["throughput"] / baseline
+    return rows
+
+
+def print_rows(title: str, rows: list[dict]):
+    print(f"\n{title}")
+    print(f"  {'workers':>8} {'calls/s':>10} {'speedup':>8}")
+    for row in rows:
+        print(f"  {row['workers']!s:>8} {row['throughput']:10.1f} {row['speedup']:7.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure tool-call throughput through ToolExecutor for increasing worker counts",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python benchmark_tool_executor.py
+  python benchmark_tool_executor.py --workers 1 2 4 8 --calls 64
+  python benchmark_tool_executor.py --min-speedup 1.5 --json results.json   # fail if scaling breaks
+        """,
+    )
+    parser.add_argument("--workers", type=int, nargs="+", default=None,
+                        help="Pool sizes to measure (default: 1 2 4 ... up to the CPU count)")
+    parser.add_argument("--calls", type=int, default=32, help="Concurrent calls per burst (default: 32)")
+    parser.add_argument("--sleep-ms", type=float, default=20.0,
+                        help="Duration of each blocking call in ms (default: 20)")
+    parser.add_argument("--iterations", type=int, default=300_000,
+                        help="Loop iterations of each CPU-bound call (default: 300000)")
+    parser.add_argument("--min-speedup", type=float, default=None,
+                        help="Exit with status 1 unless the largest pool beats 1 worker by this factor "
+                             "(the process pool is only checked on multi-core hosts)")
+    parser.add_argument("--json", metavar="FILE", help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    workers = args.workers
+    if workers is None:
+        cpus = os.cpu_count() or 1
+        workers = [1]
+        while workers[-1] * 2 <= max(cpus, 2):
+            workers.append(workers[-1] * 2)
+
+    results = {
+        "cpu_count": os.cpu_count(),
+        "calls": args.calls,
+        "thread": measure(blocking_tool, args.sleep_ms / 1000, workers, args.calls),
+        "process": measure(cpu_tool, args.iterations, workers, args.calls),
+    }
+    print_rows(f"Blocking I/O tool ({args.sleep_ms:g} ms per call, thread pool):", results["thread"])
+    print_rows(f"CPU-bound tool ({args.iterations:,} iterations per call, process pool):", results["process"])
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+    if args.min_speedup is not None:
+        # CPU-bound work cannot scale past the number of cores
+        kinds = ("thread", "process") if (os.cpu_count() or 1) > 1 else ("thread",)
+        failed = [kind for kind in kinds if results[kind][-1]["speedup"] < args.min_speedup]
+        if failed:
+            print(f"\nError: speedup below {args.min_speedup:g}x for: {', '.join(failed)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""Pre-fork supervisor for the SSE template - N worker processes sharing one port
+
+Every worker binds the public host:port with SO_REUSEPORT, so the kernel spreads
+incoming connections across them and throughput scales with cores. Each worker also
+listens on a private unix socket (worker-<pid>.sock in a per-run directory) that
+siblings use to forward messages for SSE sessions they do not own and to collect
+per-worker metrics.
+
+The supervisor process only manages workers:
+    SIGTERM / SIGINT   stop all workers gracefully (in-flight calls finish), then exit
+    SIGHUP             rolling restart: start a replacement, wait until it listens, stop the old one
+    worker exit        restart it, backing off when it keeps crashing right after start
+
+Copy this file next to the SSE template; it is imported when MCP_WORKERS > 1.
+"""
+
+import multiprocessing
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+SOCKET_PREFIX = "worker-"
+
+
+def worker_socket(socket_dir: str, pid: int) -> str:
+    """Private unix socket path of the worker with this pid"""
+    return os.path.join(socket_dir, f"{SOCKET_PREFIX}{pid}.sock")
+
+
+def peer_sockets(socket_dir: str) -> dict[int, str]:
+    """pid -> socket path of every worker currently listening (draining ones included)"""
+    peers = {}
+    for path in Path(socket_dir).glob(f"{SOCKET_PREFIX}*.sock"):
+        try:
+            peers[int(path.stem[len(SOCKET_PREFIX):])] = str(path)
+        except ValueError:
+            continue
+    return peers
+
+
+def _worker_entry(target: Callable[[int, str], None], index: int, socket_dir: str):
+    # Hang-ups are for the supervisor (rolling restart); workers only stop on SIGTERM / SIGINT
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    try:
+        target(index, socket_dir)
+    finally:
+        try:
+            os.unlink(worker_socket(socket_dir, os.getpid()))
+        except OSError:
+            pass
+
+
+class PreforkSupervisor:
+    """Starts and supervises `workers` processes running target(index, socket_dir).
+
+    target must be a module-level function (workers use the "spawn" start method).
+    """
+
+    def __init__(self, target: Callable[[int, str], None], workers: int,
+                 graceful_timeout: float = 30.0, ready_timeout: float = 30.0):
+        if workers < 1:
+            raise ValueError(f"workers must be at least 1: {workers}")
+        self.target = target
+        self.workers = workers
+        self.graceful_timeout = graceful_timeout
+        self.ready_timeout = ready_timeout
+        self.socket_dir = ""
+        self._context = multiprocessing.get_context("spawn")
+        self._processes: list[Optional[multiprocessing.process.BaseProcess]] = []
+        self._started_at: list[float] = []
+        self._failures: list[int] = []
+        # When a dead worker's replacement is due (None while the worker runs)
+        self._restart_at: list[Optional[float]] = []
+        self._stopping = False
+        self._reload = False
+
+    def _log(self, message: str):
+        print(f"[supervisor {os.getpid()}] {message}", file=sys.stderr, flush=True)
+
+    def _spawn(self, index: int):
+        process = self._context.Process(target=_worker_entry, args=(self.target, index, self.socket_dir),
+                                        name=f"mcp-worker-{index}")
+        process.start()
+        return process
+
+    def _wait_ready(self, process) -> bool:
+        """A worker is ready once its private socket exists (it binds the public port first)"""
+        path = worker_socket(self.socket_dir, process.pid)
+        deadline = time.monotonic() + self.ready_timeout
+        while time.monotonic() < deadline and not self._stopping:
+            if os.path.exists(path):
+                return True
+            if not process.is_alive():
+                return False
+            time.sleep(0.05)
+        return False
+
+    def _stop(self, processes):
+        """SIGTERM, wait for the graceful drain, then SIGKILL whatever is left"""
+        processes = [p for p in processes if p is not None and p.is_alive()]
+        for process in processes:
+            process.terminate()
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        for process in processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                self._log(f"worker {process.pid} did not stop in time, killing it")
+                process.kill()
+                process.join()
+
+    def _rolling_restart(self):
+        self._log("rolling restart")
+        for index, old in enumerate(self._processes):
+            if self._stopping:
+                return
+            new = self._spawn(index)
+            if not self._wait_ready(new):
+                self._log(f"replacement for worker {index} did not start, keeping pid {old.pid if old else '-'}")
+                self._stop([new])
+                continue
+            self._processes[index], self._started_at[index], self._failures[index] = new, time.monotonic(), 0
+            self._restart_at[index] = None
+            self._stop([old])
+            self._log(f"worker {index}: pid {old.pid if old else '-'} -> {new.pid}")
+
+    def _restart_dead(self):
+        """Schedule replacements for dead workers and start those that are due.
+
+        Called from the supervisor loop, so backing off one worker never delays signals
+        or the restart of another."""
+        now = time.monotonic()
+        for index, process in enumerate(self._processes):
+            if self._stopping:
+                return
+            if process is None:
+                due = self._restart_at[index]
+                if due is not None and now >= due:
+                    self._restart_at[index] = None
+                    self._processes[index] = self._spawn(index)
+                    self._started_at[index] = time.monotonic()
+                continue
+            if process.is_alive():
+                continue
+            # Back off when a worker dies soon after starting (bad config, port in use, ...)
+            if now - self._started_at[index] < 10:
+                self._failures[index] += 1
+            else:
+                self._failures[index] = 0
+            delay = min(30.0, 0.5 * 2 ** self._failures[index])
+            self._log(f"worker {index} (pid {process.pid}) exited with code {process.exitcode}, "
+                      f"restarting in {delay:g}s")
+            self._processes[index] = None
+            self._restart_at[index] = now + delay
+
+    def _on_stop(self, signum, frame):
+        self._stopping = True
+
+    def _on_reload(self, signum, frame):
+        self._reload = True
+
+    def run(self) -> int:
+        self.socket_dir = tempfile.mkdtemp(prefix="mcp-workers-")
+        previous = {sig: signal.signal(sig, handler) for sig, handler in (
+            (signal.SIGTERM, self._on_stop), (signal.SIGINT, self._on_stop), (signal.SIGHUP, self._on_reload))}
+        try:
+            for index in range(self.workers):
+                self._processes.append(self._spawn(index))
+                self._started_at.append(time.monotonic())
+                self._failures.append(0)
+                self._restart_at.append(None)
+            self._log(f"started {self.workers} workers: {[p.pid for p in self._processes]}")
+            while not self._stopping:
+                if self._reload:
+                    self._reload = False
+                    self._rolling_restart()
+                self._restart_dead()
+                time.sleep(0.2)
+            self._log("stopping workers")
+            return 0
+        finally:
+            self._stopping = True
+            self._stop(self._processes)
+            for sig, handler in previous.items():
+                signal.signal(sig, handler)
+            shutil.rmtree(self.socket_dir, ignore_errors=True)
@@ -0,0 +1,946 @@
+#!/usr/bin/env python3
+"""Shared runtime for the MCP server templates - tool execution off the event loop
+
+Tools declare how they run and the executor dispatches them accordingly:
+
+    @runs_in("async")     # coroutine, awaited on the event loop (I/O with async libraries)
+    @runs_in("thread")    # blocking function, run in a bounded thread pool (blocking I/O, C extensions)
+    @runs_in("process")   # CPU-bound function, run in a warm process pool (pure-Python computation)
+    @runs_in("stream")    # async generator yielding result chunks, each sent to the client as it is produced
+
+Coroutine functions default to "async", async generators to "stream" and plain
+functions to "thread", so a tool that forgets to declare its kind still never blocks
+the event loop.
+
+Every call has a time budget (runs_in(kind, timeout=...) or the executor default). When it
+runs out, or the client cancels, async and stream tools are cancelled, thread tools are
+abandoned (they can poll cancel_requested() to stop early) and the workers of process
+tools are killed; pools holding abandoned work are replaced so stuck calls cannot use
+up their capacity.
+
+Stream tools yield str chunks (or Progress status updates); each item is sent as an MCP
+progress notification through current_progress while the tool runs, so clients see
+output before the call completes, and the final result keeps a bounded number of characters.
+
+ToolRegistry maps tool names to functions and input schemas: dispatch is a dict lookup,
+the tools/list answer is built once and arguments are checked by validators compiled
+at registration.
+
+Results of idempotent tools can be cached with ToolResultCache (TTL + LRU, keyed by
+tool name and canonicalized arguments).
+
+SingleFlight coalesces identical concurrent calls: the first one runs, duplicates that
+arrive while it is in flight await the same result.
+
+AdmissionController caps in-flight tool calls globally and per client, queues a bounded
+number of waiting calls and rejects the rest immediately (Overloaded).
+
+ToolMetrics records per-tool call counts, errors, in-flight calls, latency histograms and
+event-loop lag, rendered in the Prometheus text format.
+
+Copy this file next to the template you start from; both templates import it.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import functools
+import inspect
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Iterator, Optional
+
+try:
+    import jsonschema
+except ImportError:  # only needed by ToolRegistry; installed together with the mcp package
+    jsonschema = None
+
+TOOL_KINDS = ("async", "thread", "process", "stream")
+
+# Sends a progress notification for the current call: (progress, total, message)
+ProgressNotifier = Callable[[float, Optional[float], Optional[str]], Awaitable[None]]
+# Set by the server for each call whose client asked for progress (MCP progressToken)
+current_progress: contextvars.ContextVar[Optional[ProgressNotifier]] = contextvars.ContextVar(
+    "mcp_progress", default=None)
+# Set by the executor inside thread tools; flagged when their call times out or is cancelled
+_cancel_event: contextvars.ContextVar[Optional[threading.Event]] = contextvars.ContextVar(
+    "mcp_cancel", default=None)
+
+
+def runs_in(kind: str, timeout: Optional[float] = None) -> Callable[[Callable], Callable]:
+    """Declare where a tool function runs: "async", "thread", "process" or "stream".
+
+    timeout is the call's budget in seconds (None: the executor default, 0: no limit).
+    """
+    if kind not in TOOL_KINDS:
+        raise ValueError(f"Unknown tool kind: {kind}. Choose from: {list(TOOL_KINDS)}")
+
+    def decorator(func: Callable) -> Callable:
+        if kind == "async" and not inspect.iscoroutinefunction(func):
+            raise TypeError(f"{func.__name__} must be a coroutine function to run as 'async'")
+        if kind == "stream" and not inspect.isasyncgenfunction(func):
+            raise TypeError(f"{func.__name__} must be an async generator function to run as 'stream'")
+        if kind not in ("async", "stream") and (inspect.iscoroutinefunction(func)
+                                               or inspect.isasyncgenfunction(func)):
+            raise TypeError(f"{func.__name__} is asynchronous; declare it as 'async' or 'stream'")
+        func.__tool_kind__ = kind
+        func.__tool_timeout__ = timeout
+        return func
+
+    return decorator
+
+
+def tool_kind(func: Callable) -> str:
+    """Declared kind of a tool function (defaults: coroutine -> async, async generator -> stream,
+    otherwise thread)."""
+    kind = getattr(func, "__tool_kind__", None)
+    if kind is None:
+        if inspect.iscoroutinefunction(func):
+            kind = "async"
+        elif inspect.isasyncgenfunction(func):
+            kind = "stream"
+        else:
+            kind = "thread"
+    return kind
+
+
+@dataclass
+class Progress:
+    """Yielded by a stream tool to report status without producing output.
+
+    total is the number of items (chunks and Progress) the tool expects to yield, if known.
+    """
+    message: Optional[str] = None
+    total: Optional[float] = None
+
+
+async def collect_stream(stream: AsyncIterator[Any], notify: Optional[ProgressNotifier] = None,
+                         max_chars: int = 1_000_000) -> list[str]:
+    """Consume a stream tool: send each item as a progress notification, keep the result chunks.
+
+    The progress value is the number of items yielded so far (it must only increase).
+    At most max_chars of output are kept for the final result, so memory stays bounded
+    for huge outputs; the rest reaches the client only through the notifications.
+    """
+    chunks: list[str] = []
+    kept = dropped = count = 0
+    total: Optional[float] = None
+    try:
+        async for item in stream:
+            count += 1
+            if isinstance(item, Progress):
+                total = item.total if item.total is not None else total
+                if notify is not None:
+                    await notify(count, total, item.message)
+                continue
+            text = str(item)
+            if notify is not None:
+                await notify(count, total, text)
+            if kept + len(text) <= max_chars:
+                chunks.append(text)
+                kept += len(text)
+            else:
+                dropped += len(text)
+    finally:
+        # Runs the generator's cleanup now if the call failed or was cancelled
+        await stream.aclose()
+    if dropped:
+        chunks.append(f"[{dropped:,} more characters were only sent as progress notifications]")
+    return chunks
+
+
+def cancel_requested() -> bool:
+    """Inside a thread tool: True once its call timed out or was cancelled.
+
+    Threads cannot be interrupted; long-running thread tools should check this
+    between steps and return early.
+    """
+    event = _cancel_event.get()
+    return event is not None and event.is_set()
+
+
+class ToolTimeout(TimeoutError):
+    """A tool call ran out of its time budget."""
+
+
+def _warm_up(_: int) -> int:
+    return os.getpid()
+
+
+class ToolExecutor:
+    """Dispatches tool functions to the event loop, a thread pool or a process pool.
+
+    The thread pool bounds concurrent blocking calls; the process pool is created
+    with the "spawn" start method (safe with the threads an asyncio server already
+    has) and warmed up front so the first CPU-bound call does not pay for worker start-up.
+    Process tools must be module-level functions with picklable arguments and results.
+
+    Calls that time out or are cancelled while running in a pool are abandoned. The
+    thread pool is replaced once abandoned calls occupy half of its threads (the stuck
+    threads end when their functions return); the process pool is replaced right away
+    and its workers are killed as soon as its other calls have finished.
+    """
+
+    def __init__(self, max_threads: Optional[int] = None, max_processes: Optional[int] = None,
+                 max_result_chars: int = 1_000_000, default_timeout: Optional[float] = None):
+        self.max_threads = max_threads or min(32, (os.cpu_count() or 1) + 4)
+        self.max_processes = max_processes or (os.cpu_count() or 1)
+        self.max_result_chars = max_result_chars
+        self.default_timeout = default_timeout
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self._thread_stuck: set[Future] = set()   # abandoned calls still occupying the current thread pool
+        self._process_calls: set[Future] = set()  # calls submitted to the current process pool
+        self._abandoned: set[Future] = set()
+        # Done callbacks run in pool threads: the sets above and workers_killed are only
+        # touched under this lock (never held while adding a callback, which may run inline)
+        self._lock = threading.Lock()
+        self.timeouts = 0
+        self.cancelled = 0
+        self.pools_replaced = 0
+        self.workers_killed = 0
+
+    @property
+    def threads(self) -> ThreadPoolExecutor:
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(max_workers=self.max_threads, thread_name_prefix="mcp-tool")
+        return self._threads
+
+    @property
+    def processes(self) -> ProcessPoolExecutor:
+        if self._processes is None:
+            self._processes = ProcessPoolExecutor(
+                max_workers=self.max_processes, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._processes
+
+    def warm_up(self, tools: Iterable[Callable] = ()) -> None:
+        """Start the workers of every pool the given tools use, instead of on their first calls."""
+        kinds = {tool_kind(tool) for tool in tools}
+        if "thread" in kinds:
+            list(self.threads.map(_warm_up, range(self.max_threads)))
+        if "process" in kinds:
+            # A worker process only starts once there is a task for it; wait for one per worker
+            list(self.processes.map(_warm_up, range(self.max_processes)))
+
+    def timeout_for(self, func: Callable) -> Optional[float]:
+        timeout = getattr(func, "__tool_timeout__", None)
+        if timeout is None:
+            timeout = self.default_timeout
+        return timeout or None
+
+    async def call(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Run a tool function according to its declared kind and return its result.
+
+        Stream tools return their list of chunks; their output is sent as progress
+        notifications through current_progress while they run. Raises ToolTimeout
+        when the call exceeds its budget.
+        """
+        kind = tool_kind(func)
+        timeout = self.timeout_for(func)
+        if kind == "async":
+            work = func(*args, **kwargs)
+        elif kind == "stream":
+            work = collect_stream(func(*args, **kwargs), current_progress.get(), self.max_result_chars)
+        else:
+            return await self._call_in_pool(kind, timeout, func, args, kwargs)
+        try:
+            return await asyncio.wait_for(work, timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise ToolTimeout(f"{func.__name__} timed out after {timeout:g}s") from None
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+    async def _call_in_pool(self, kind: str, timeout: Optional[float], func: Callable,
+                            args: tuple, kwargs: dict) -> Any:
+        call = functools.partial(func, *args, **kwargs)
+        event = None
+        if kind == "thread":
+            # Runs in a copy of the caller's context, where cancel_requested() sees this event
+            context = contextvars.copy_context()
+            event = threading.Event()
+            context.run(_cancel_event.set, event)
+            pool = self.threads
+            future = pool.submit(context.run, call)
+        else:
+            pool = self.processes
+            future = pool.submit(call)
+            with self._lock:
+                calls = self._process_calls
+                calls.add(future)
+            future.add_done_callback(self._untrack(calls))
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            self._abandon(kind, pool, future, event)
+            raise ToolTimeout(f"{func.__name__} timed out after {timeout:g}s") from None
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            self._abandon(kind, pool, future, event)
+            raise
+
+    def _abandon(self, kind: str, pool, future: Future, event: Optional[threading.Event]) -> None:
+        """Give up on a pool call that timed out or was cancelled (queued calls are just dropped)."""
+        if event is not None:
+            event.set()
+        if future.done():
+            return
+        with self._lock:
+            self._abandoned.add(future)
+        future.add_done_callback(self._untrack(self._abandoned))
+        if kind == "thread":
+            if pool is not self._threads:
+                return
+            with self._lock:
+                stuck = self._thread_stuck
+                stuck.add(future)
+                replace = len(stuck) * 2 >= self.max_threads
+                if replace:
+                    self._thread_stuck = set()
+            future.add_done_callback(self._untrack(stuck))
+            if replace:
+                # Threads cannot be killed: new calls get a fresh pool, the stuck ones finish on their own
+                self._threads = None
+                self.pools_replaced += 1
+                pool.shutdown(wait=False)
+                print("Warning: replaced the thread pool: stuck tool calls held half of its threads",
+                      file=sys.stderr, flush=True)
+        elif pool is self._processes:
+            # Killing a worker breaks its whole pool: move new calls to a fresh pool and kill the
+            # old workers once the calls still running there have finished
+            with self._lock:
+                calls, self._process_calls = self._process_calls, set()
+            self._processes = None
+            workers = list((getattr(pool, "_processes", None) or {}).values())
+            self.pools_replaced += 1
+            pool.shutdown(wait=False, cancel_futures=False)
+            self._kill_when_idle(workers, calls)
+
+    def _untrack(self, calls: set[Future]) -> Callable[[Future], None]:
+        """Done callback removing the future from calls (runs in a pool thread)."""
+        def discard(future: Future) -> None:
+            with self._lock:
+                calls.discard(future)
+        return discard
+
+    def _kill_when_idle(self, workers: list, calls: set[Future]) -> None:
+        with self._lock:
+            pending = [f for f in calls if not f.done() and f not in self._abandoned]
+        if pending:
+            # Done callbacks run in the pool's management thread; the last one kills the workers
+            pending[0].add_done_callback(lambda _: self._kill_when_idle(workers, calls))
+            return
+        killed = 0
+        for worker in workers:
+            if worker.is_alive():
+                worker.kill()
+                killed += 1
+        with self._lock:
+            self.workers_killed += killed
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            abandoned, workers_killed = len(self._abandoned), self.workers_killed
+        return {
+            "timeouts": self.timeouts,
+            "cancelled": self.cancelled,
+            "abandoned": abandoned,
+            "pools_replaced": self.pools_replaced,
+            "workers_killed": workers_killed,
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._threads is not None:
+            self._threads.shutdown(wait=wait, cancel_futures=True)
+            self._threads = None
+        if self._processes is not None:
+            self._processes.shutdown(wait=wait, cancel_futures=True)
+            self._processes = None
+
+
+def compile_validator(schema: dict[str, Any]):
+    """Check a JSON schema once and return a reusable validator for it."""
+    if jsonschema is None:
+        raise RuntimeError("jsonschema is not installed. Please install it with: pip install jsonschema")
+    validator_class = jsonschema.validators.validator_for(schema)
+    validator_class.check_schema(schema)
+    return validator_class(schema, format_checker=validator_class.FORMAT_CHECKER)
+
+
+@dataclass(frozen=True)
+class ToolSpec:
+    """A registered tool: its function is called with the validated arguments as keywords."""
+    name: str
+    description: str
+    input_schema: dict[str, Any]
+    func: Callable
+    validator: Any
+
+    def definition(self) -> dict[str, Any]:
+        """Tool definition with the MCP field names (tools/list)."""
+        return {"name": self.name, "description": self.description, "inputSchema": self.input_schema}
+
+
+class ToolRegistry:
+    """Declarative tool table: O(1) dispatch by name, precompiled argument validation.
+
+    Register tools with the decorator (below @runs_in):
+
+        @registry.tool(input_schema={"type": "object", "properties": {...}, "required": [...]})
+        @runs_in("thread")
+        def search(query: str, limit: int = 10) -> str: ...
+
+    Schemas are checked and compiled when a tool is registered, so a broken schema fails
+    at startup and a call only runs the compiled validator.
+    """
+
+    def __init__(self):
+        self._specs: dict[str, ToolSpec] = {}
+        self._listing: Optional[list] = None
+
+    def register(self, func: Callable, name: Optional[str] = None, description: Optional[str] = None,
+                 input_schema: Optional[dict[str, Any]] = None) -> ToolSpec:
+        name = name or func.__name__
+        if name in self._specs:
+            raise ValueError(f"Tool already registered: {name}")
+        if description is None:
+            description = inspect.getdoc(func) or ""
+        schema = input_schema if input_schema is not None else {"type": "object", "properties": {}}
+        spec = ToolSpec(name, description, schema, func, compile_validator(schema))
+        self._specs[name] = spec
+        self._listing = None
+        return spec
+
+    def tool(self, name: Optional[str] = None, description: Optional[str] = None,
+             input_schema: Optional[dict[str, Any]] = None) -> Callable[[Callable], Callable]:
+        """Decorator form of register(); the name defaults to the function name, the description
+        to its docstring."""
+        def decorator(func: Callable) -> Callable:
+            self.register(func, name, description, input_schema)
+            return func
+        return decorator
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._specs
+
+    def __iter__(self) -> Iterator[ToolSpec]:
+        return iter(list(self._specs.values()))
+
+    def __len__(self) -> int:
+        return len(self._specs)
+
+    def functions(self) -> list[Callable]:
+        return [spec.func for spec in self._specs.values()]
+
+    def listing(self, factory: Callable[..., Any] = dict) -> list:
+        """Tool definitions built with factory(**definition) (e.g. mcp.types.Tool), cached
+        until the next registration."""
+        if self._listing is None:
+            self._listing = [factory(**spec.definition()) for spec in self._specs.values()]
+        return self._listing
+
+    def resolve(self, name: str, arguments: Optional[dict[str, Any]]) -> ToolSpec:
+        """Look up a tool and validate the arguments against its input schema."""
+        spec = self._specs.get(name)
+        if spec is None:
+            raise ValueError(f"Unknown tool: {name}")
+        error = jsonschema.exceptions.best_match(spec.validator.iter_errors(arguments or {}))
+        if error is not None:
+            where = "/".join(str(part) for part in error.absolute_path)
+            raise ValueError(f"Invalid arguments for {name}: {error.message}" + (f" (at {where})" if where else ""))
+        return spec
+
+
+def canonical_arguments(arguments: Optional[dict[str, Any]]) -> str:
+    """Stable text form of tool arguments: key order and whitespace do not matter."""
+    return json.dumps(arguments or {}, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=repr)
+
+
+class ToolResultCache:
+    """Size-bounded LRU cache of tool results with a TTL per tool.
+
+    tool_ttls overrides the default TTL per tool name; a TTL of 0 opts a tool out
+    (use it for tools with side effects or results that must always be fresh).
+    Stream tools are opted out with exclude_streams().
+    Only successful results are cached; exceptions always propagate.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0,
+                 tool_ttls: Optional[dict[str, float]] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.tool_ttls = dict(tool_ttls or {})
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # (tool name, canonical arguments) -> (expires at, result), least recently used first
+        self._entries: OrderedDict[tuple[str, str], tuple[float, Any]] = OrderedDict()
+
+    def ttl_for(self, name: str) -> float:
+        return self.tool_ttls.get(name, self.ttl)
+
+    def enabled_for(self, name: str) -> bool:
+        return self.maxsize > 0 and self.ttl_for(name) > 0
+
+    def exclude_streams(self, registry: "ToolRegistry") -> None:
+        """Opt the registry's stream tools out: a replayed result would skip their progress notifications."""
+        for spec in registry:
+            if tool_kind(spec.func) == "stream":
+                self.tool_ttls[spec.name] = 0
+
+    def get(self, name: str, arguments: Optional[dict[str, Any]]) -> tuple[bool, Any]:
+        """Return (hit, result); expired entries count as misses and are dropped."""
+        key = (name, canonical_arguments(arguments))
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            del self._entries[key]
+        self.misses += 1
+        return False, None
+
+    def put(self, name: str, arguments: Optional[dict[str, Any]], result: Any) -> None:
+        key = (name, canonical_arguments(arguments))
+        self._entries[key] = (time.monotonic() + self.ttl_for(name), result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """Drop all entries, or only those of one tool."""
+        if name is None:
+            self._entries.clear()
+        else:
+            for key in [key for key in self._entries if key[0] == name]:
+                del self._entries[key]
+
+    def cached(self, handler: Callable[[str, Optional[dict[str, Any]]], Awaitable[Any]]):
+        """Wrap a handle_call_tool(name, arguments) coroutine with this cache."""
+        @functools.wraps(handler)
+        async def wrapper(name: str, arguments: Optional[dict[str, Any]]) -> Any:
+            if not self.enabled_for(name):
+                return await handler(name, arguments)
+            hit, result = self.get(name, arguments)
+            if hit:
+                return result
+            result = await handler(name, arguments)
+            self.put(name, arguments, result)
+            return result
+
+        return wrapper
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class SingleFlight:
+    """Coalesces identical concurrent tool calls (same name + canonical arguments).
+
+    The first call starts the work as a task; duplicates arriving before it finishes
+    await that task instead of running the tool again, and all of them get the same
+    result or exception. A caller that is cancelled only stops waiting; the shared
+    work is cancelled once no caller is left waiting for it.
+    Exclude tools with side effects: two identical calls of those must both run.
+    The shared call runs in the first caller's context (request, session, progress token), so
+    also exclude tools that report to their caller while running, i.e. stream tools
+    (exclude_streams()); per-client limits belong above coalescing, where each caller is seen.
+    """
+
+    def __init__(self, exclude: Iterable[str] = ()):
+        self.exclude = set(exclude)
+        self.executions = 0
+        self.coalesced = 0
+        # key -> [task, number of callers waiting]
+        self._flights: dict[tuple[str, str], list] = {}
+
+    async def do(self, name: str, arguments: Optional[dict[str, Any]],
+                 func: Callable[[], Awaitable[Any]]) -> Any:
+        """Run func() unless an identical call is in flight; return the shared result."""
+        key = (name, canonical_arguments(arguments))
+        flight = self._flights.get(key)
+        if flight is None:
+            task = asyncio.ensure_future(func())
+            flight = self._flights[key] = [task, 0]
+            task.add_done_callback(lambda _, key=key, flight=flight: self._finish(key, flight))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+        flight[1] += 1
+        try:
+            return await asyncio.shield(flight[0])
+        except asyncio.CancelledError:
+            if not flight[0].done() and flight[1] == 1:
+                flight[0].cancel()
+            raise
+        finally:
+            flight[1] -= 1
+
+    def _finish(self, key: tuple[str, str], flight: list) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        # Retrieve the exception so an unawaited failure is not logged as "never retrieved"
+        if not flight[0].cancelled():
+            flight[0].exception()
+
+    def exclude_streams(self, registry: "ToolRegistry") -> None:
+        """Exclude the registry's stream tools: each caller needs its own progress notifications."""
+        self.exclude.update(spec.name for spec in registry if tool_kind(spec.func) == "stream")
+
+    def coalesced_calls(self, handler: Callable[[str, Optional[dict[str, Any]]], Awaitable[Any]]):
+        """Wrap a handle_call_tool(name, arguments) coroutine with call coalescing."""
+        @functools.wraps(handler)
+        async def wrapper(name: str, arguments: Optional[dict[str, Any]]) -> Any:
+            if name in self.exclude:
+                return await handler(name, arguments)
+            return await self.do(name, arguments, lambda: handler(name, arguments))
+
+        return wrapper
+
+    def stats(self) -> dict[str, int]:
+        return {"in_flight": len(self._flights), "executions": self.executions, "coalesced": self.coalesced}
+
+
+# Identifies the client (e.g. SSE session) a tool call belongs to; set by the transport
+current_client: contextvars.ContextVar[str] = contextvars.ContextVar("mcp_client", default="local")
+
+
+class Overloaded(RuntimeError):
+    """Raised when a tool call is rejected by admission control."""
+
+
+class AdmissionController:
+    """Global and per-client concurrency limits with a bounded FIFO wait queue.
+
+    A call runs immediately while both limits allow it; otherwise it waits in the
+    queue for at most queue_timeout seconds. When the queue is full, or the wait
+    times out, the call fails fast with Overloaded instead of adding to the backlog.
+    Freed slots are handed to waiters in arrival order, skipping waiters whose own
+    client is still at its limit, so one busy client cannot starve the others.
+    """
+
+    def __init__(self, max_concurrency: int = 64, max_per_client: Optional[int] = None,
+                 max_queue: int = 128, queue_timeout: Optional[float] = None):
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be at least 1: {max_concurrency}")
+        self.max_concurrency = max_concurrency
+        self.max_per_client = max_per_client or max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._per_client: dict[str, int] = {}
+        self._waiters: deque[tuple[str, asyncio.Future]] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def saturated(self) -> bool:
+        """No free slot and no room in the queue: new calls would be rejected."""
+        return self.in_flight >= self.max_concurrency and len(self._waiters) >= self.max_queue
+
+    def _can_run(self, client: str) -> bool:
+        return (self.in_flight < self.max_concurrency
+                and self._per_client.get(client, 0) < self.max_per_client)
+
+    def _take(self, client: str) -> None:
+        self.in_flight += 1
+        self._per_client[client] = self._per_client.get(client, 0) + 1
+        self.admitted += 1
+
+    async def acquire(self, client: str) -> None:
+        """Take a slot for client, waiting in the queue if needed; raises Overloaded."""
+        if self._can_run(client):
+            self._take(client)
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise Overloaded(f"Server overloaded: {self.in_flight} calls running, {len(self._waiters)} queued")
+        entry = (client, asyncio.get_running_loop().create_future())
+        self._waiters.append(entry)
+        try:
+            await asyncio.wait_for(entry[1], self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if entry[1].done() and not entry[1].cancelled():
+                # The slot was handed over just as the wait ended; give it back
+                self.release(client)
+            elif entry in self._waiters:
+                self._waiters.remove(entry)
+            if isinstance(e, asyncio.TimeoutError):
+                self.rejected += 1
+                raise Overloaded(f"Server overloaded: no slot within {self.queue_timeout:g}s") from None
+            raise
+
+    def release(self, client: str) -> None:
+        self.in_flight -= 1
+        remaining = self._per_client.get(client, 1) - 1
+        if remaining:
+            self._per_client[client] = remaining
+        else:
+            self._per_client.pop(client, None)
+        for entry in list(self._waiters):
+            if self.in_flight >= self.max_concurrency:
+                break
+            if entry[1].done():
+                self._waiters.remove(entry)
+            elif self._can_run(entry[0]):
+                self._waiters.remove(entry)
+                self._take(entry[0])
+                entry[1].set_result(None)
+
+    @contextlib.asynccontextmanager
+    async def slot(self, client: str) -> AsyncIterator[None]:
+        await self.acquire(client)
+        try:
+            yield
+        finally:
+            self.release(client)
+
+    def limited(self, handler: Callable[[str, Optional[dict[str, Any]]], Awaitable[Any]]):
+        """Wrap a handle_call_tool(name, arguments) coroutine with admission control."""
+        @functools.wraps(handler)
+        async def wrapper(name: str, arguments: Optional[dict[str, Any]]) -> Any:
+            async with self.slot(current_client.get()):
+                return await handler(name, arguments)
+
+        return wrapper
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "clients": len(self._per_client),
+            "max_concurrency": self.max_concurrency,
+            "max_per_client": self.max_per_client,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _label_value(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_label_value(value)}"' for key, value in labels.items()) + "}"
+
+
+class _Histogram:
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = 0
+        while index < len(self.buckets) and value > self.buckets[index]:
+            index += 1
+        self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: dict[str, Any]) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else f"{bound:g}"
+            lines.append(f"{name}_bucket{_labels({**labels, 'le': le})} {cumulative}")
+        lines.append(f"{name}_sum{_labels(labels)} {self.sum:.6f}")
+        lines.append(f"{name}_count{_labels(labels)} {self.count}")
+        return lines
+
+
+class ToolMetrics:
+    """Per-tool call metrics and event-loop lag, exported in the Prometheus text format.
+
+    Wrap handle_call_tool with instrumented() (outermost, so latency is what clients
+    see, cache hits included) and run monitor_event_loop() as a background task.
+    Other components' stats() dicts can be exported as gauges with add_collector().
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS, prefix: str = "mcp",
+                 labels: Optional[dict[str, str]] = None):
+        self.buckets = buckets
+        self.prefix = prefix
+        # Added to every sample, e.g. {"worker": "3"} in a multi-process server
+        self.labels = dict(labels or {})
+        self.calls: dict[tuple[str, str], int] = {}
+        self.in_flight: dict[str, int] = {}
+        self.latency: dict[str, _Histogram] = {}
+        self.loop_lag = _Histogram(DEFAULT_BUCKETS)
+        self.loop_lag_max = 0.0
+        self._collectors: list[tuple[str, Callable[[], dict[str, Any]]]] = []
+
+    def record(self, tool: str, status: str, seconds: float) -> None:
+        self.calls[(tool, status)] = self.calls.get((tool, status), 0) + 1
+        histogram = self.latency.get(tool)
+        if histogram is None:
+            histogram = self.latency[tool] = _Histogram(self.buckets)
+        histogram.observe(seconds)
+
+    def instrumented(self, handler: Callable[[str, Optional[dict[str, Any]]], Awaitable[Any]]):
+        """Wrap a handle_call_tool(name, arguments) coroutine with call metrics."""
+        @functools.wraps(handler)
+        async def wrapper(name: str, arguments: Optional[dict[str, Any]]) -> Any:
+            self.in_flight[name] = self.in_flight.get(name, 0) + 1
+            start = time.perf_counter()
+            status = "error"
+            try:
+                result = await handler(name, arguments)
+                status = "ok"
+                return result
+            except asyncio.CancelledError:
+                status = "cancelled"
+                raise
+            except Exception as exc:
+                # Handlers often re-raise tool errors wrapped; look through the cause chain
+                cause: Optional[BaseException] = exc
+                while cause is not None and not isinstance(cause, ToolTimeout):
+                    cause = cause.__cause__
+                if cause is not None:
+                    status = "timeout"
+                raise
+            finally:
+                self.in_flight[name] -= 1
+                self.record(name, status, time.perf_counter() - start)
+
+        return wrapper
+
+    async def monitor_event_loop(self, interval: float = 0.25) -> None:
+        """Measure how late the loop wakes up from a sleep; run as a background task."""
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            lag = max(0.0, time.perf_counter() - start - interval)
+            self.loop_lag.observe(lag)
+            self.loop_lag_max = max(self.loop_lag_max, lag)
+
+    def add_collector(self, name: str, stats: Callable[[], dict[str, Any]]) -> None:
+        """Export the numeric values of stats() as gauges named <prefix>_<name>_<key>."""
+        self._collectors.append((name, stats))
+
+    def render(self) -> str:
+        p = self.prefix
+        const = self.labels
+        lines = [f"# HELP {p}_tool_calls_total Tool calls by tool and outcome.",
+                 f"# TYPE {p}_tool_calls_total counter"]
+        for (tool, status), count in sorted(self.calls.items()):
+            lines.append(f"{p}_tool_calls_total{_labels({**const, 'tool': tool, 'status': status})} {count}")
+        lines += [f"# HELP {p}_tool_in_flight Tool calls currently running.",
+                  f"# TYPE {p}_tool_in_flight gauge"]
+        for tool, count in sorted(self.in_flight.items()):
+            lines.append(f"{p}_tool_in_flight{_labels({**const, 'tool': tool})} {count}")
+        lines += [f"# HELP {p}_tool_duration_seconds Tool call latency.",
+                  f"# TYPE {p}_tool_duration_seconds histogram"]
+        for tool, histogram in sorted(self.latency.items()):
+            lines += histogram.render(f"{p}_tool_duration_seconds", {**const, "tool": tool})
+        lines += [f"# HELP {p}_event_loop_lag_seconds Delay of event loop wake-ups.",
+                  f"# TYPE {p}_event_loop_lag_seconds histogram"]
+        lines += self.loop_lag.render(f"{p}_event_loop_lag_seconds", const)
+        lines += [f"# HELP {p}_event_loop_lag_max_seconds Largest event loop delay seen.",
+                  f"# TYPE {p}_event_loop_lag_max_seconds gauge",
+                  f"{p}_event_loop_lag_max_seconds{_labels(const)} {self.loop_lag_max:.6f}"]
+        for name, stats in self._collectors:
+            for key, value in stats().items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    metric = f"{p}_{name}_{key}"
+                    lines += [f"# TYPE {metric} gauge", f"{metric}{_labels(const)} {value}"]
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: Optional[str] = None) -> None:
+        """Write render() to path (replaced atomically, e.g. for a textfile collector) or stderr."""
+        text = self.render()
+        if path is None:
+            print(text, file=sys.stderr, flush=True)
+            return
+        temp = f"{path}.tmp"
+        with open(temp, "w") as f:
+            f.write(text)
+        os.replace(temp, path)
+
+    async def dump_periodically(self, interval: float, path: Optional[str] = None) -> None:
+        """Call dump() every interval seconds; run as a background task."""
+        while True:
+            await asyncio.sleep(interval)
+            self.dump(path)
+
+
+def merge_prometheus(texts: Iterable[str]) -> str:
+    """Merge expositions of several processes into one (each family's samples grouped under
+    a single HELP/TYPE header, as the text format requires). Samples must differ by labels."""
+    headers: dict[str, list[str]] = {}
+    samples: dict[str, list[str]] = {}
+    for text in texts:
+        family = None
+        for line in text.splitlines():
+            if line.startswith("# "):
+                parts = line.split(" ", 3)
+                if len(parts) >= 3 and parts[1] in ("HELP", "TYPE"):
+                    family = parts[2]
+                    header = headers.setdefault(family, [])
+                    if not any(existing.split(" ", 2)[1] == parts[1] for existing in header):
+                        header.append(line)
+                    samples.setdefault(family, [])
+            elif line and family is not None:
+                samples[family].append(line)
+    lines = []
+    for family, header in headers.items():
+        lines += header
+        lines += samples[family]
+    return "\n".join(lines) + "\n"
+
+
+def env_float(name: str, default: Optional[float] = None) -> Optional[float]:
+    """Read a float setting from the environment."""
+    value = os.environ.get(name)
+    if not value:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        print(f"Warning: ignoring invalid {name}={value!r}", file=sys.stderr)
+        return default
+
+
+def env_int(name: str, default: Optional[int] = None) -> Optional[int]:
+    """Read an integer setting from the environment (templates are configured via env vars)."""
+    value = os.environ.get(name)
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        print(f"Warning: ignoring invalid {name}={value!r}", file=sys.stderr)
+        return default
@@ -2,6 +2,7 @@
 """Template MCP server - customize for your use case"""
 
 import asyncio
+import os
 import sys
 from pathlib import Path
 from typing import Any, Optional
@@ -15,69 +16,172 @@ except ImportError:
     print("Error: mcp package is not installed. Please install it with: pip install mcp", file=sys.stderr)
     sys.exit(1)
 
+# Shared runtime (mcp_tool_runtime.py) lives next to this template
+scripts_dir = Path(__file__).parent
+if str(scripts_dir) not in sys.path:
+    sys.path.insert(0, str(scripts_dir))
+
+from mcp_tool_runtime import (
+    Progress,
+    SingleFlight,
+    ToolExecutor,
+    ToolMetrics,
+    ToolRegistry,
+    ToolResultCache,
+    cancel_requested,
+    current_progress,
+    env_float,
+    env_int,
+    runs_in,
+)
+
 # Initialize MCP server
 server = Server("your-server-name")
 
-# Global state (if needed)
-# cache: dict[str, Any] = {}
+# Tool execution: async tools run on the event loop, thread tools in a bounded thread pool,
+# process tools in a warm process pool (pool sizes: MCP_MAX_THREADS / MCP_MAX_PROCESSES);
+# stream tools send each chunk as a progress notification and keep at most
+# MCP_MAX_RESULT_CHARS characters for the final result. Calls running longer than their
+# budget (@runs_in(..., timeout=...), default MCP_TOOL_TIMEOUT seconds, 0 = none) or cancelled
+# by the client are stopped: async tools are cancelled, pool calls abandoned or killed
+executor = ToolExecutor(
+    max_threads=env_int("MCP_MAX_THREADS"),
+    max_processes=env_int("MCP_MAX_PROCESSES"),
+    max_result_chars=env_int("MCP_MAX_RESULT_CHARS", 1_000_000),
+    default_timeout=env_float("MCP_TOOL_TIMEOUT", 60.0),
+)
+
+# Tools by name: dispatch is a dict lookup, the tools/list answer is built once and
+# arguments are checked against input schemas compiled at startup (see @registry.tool below)
+registry = ToolRegistry()
+
+# Result cache keyed by tool name + canonicalized arguments, LRU-bounded (MCP_CACHE_SIZE entries)
+# with a default TTL (MCP_CACHE_TTL seconds); a per-tool TTL of 0 opts non-idempotent tools out.
+# Stream tools are opted out at startup: a cached result would arrive without progress notifications
+cache = ToolResultCache(
+    maxsize=env_int("MCP_CACHE_SIZE", 1024),
+    ttl=env_float("MCP_CACHE_TTL", 300.0),
+    tool_ttls={
+        "your_tool": 60.0,
+        # "send_email": 0,
+    },
+)
+
+# Identical calls arriving while one is still running await its result instead of running again
+# (exclude tools with side effects: each of their calls must run; stream tools are excluded at
+# startup because only the first caller would receive the progress notifications)
+flights = SingleFlight(exclude={
+    # "send_email",
+})
+
+# Per-tool call counts, errors, in-flight calls, latency histograms and event-loop lag in the
+# Prometheus text format, written every MCP_METRICS_INTERVAL seconds to MCP_METRICS_FILE or stderr
+# (never stdout: that is the protocol channel)
+metrics = ToolMetrics()
+metrics.add_collector("executor", executor.stats)
+metrics.add_collector("cache", cache.stats)
+metrics.add_collector("coalescing", flights.stats)
 
 
 @server.list_tools()
 async def handle_list_tools() -> list[types.Tool]:
-    """List available tools"""
-    return [
-        types.Tool(
-            name="your_tool",
-            description="Description of what your tool does",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "param1": {
-                        "type": "string",
-                        "description": "Parameter description"
-                    }
-                },
-                "required": ["param1"]
-            }
-        )
-    ]
+    """List available tools (built once from the registry)"""
+    return registry.listing(types.Tool)
 
 
-@server.call_tool()
+@server.call_tool(validate_input=False)  # the registry validates with precompiled schemas
+@metrics.instrumented
+@cache.cached
+@flights.coalesced_calls
 async def handle_call_tool(name: str, arguments: Optional[dict[str, Any]]) -> list[types.TextContent]:
     """Handle tool calls"""
-    if name != "your_tool":
-        raise ValueError(f"Unknown tool: {name}")
-    
-    # Validate arguments
-    if not arguments or "param1" not in arguments:
-        raise ValueError("Missing required argument: param1")
-    
-    param1 = arguments["param1"]
-    if not isinstance(param1, str):
-        raise ValueError("param1 must be a string")
+    # Look up the tool and validate the arguments against its input schema
+    spec = registry.resolve(name, arguments)
     
     try:
-        # Your tool logic here
-        result = process_tool(param1)
+        # Run the tool (dispatched according to its @runs_in kind, never blocks the loop)
+        current_progress.set(progress_notifier())
+        result = await executor.call(spec.func, **(arguments or {}))
         
-        # Return result
-        return [types.TextContent(type="text", text=str(result))]
+        # Return result (stream tools return their list of chunks)
+        chunks = result if isinstance(result, list) else [result]
+        return [types.TextContent(type="text", text=str(chunk)) for chunk in chunks]
     
     except Exception as e:
-        error_msg = f"Error processing {param1}: {str(e)}"
+        error_msg = f"Error in {name}: {str(e)}"
         print(error_msg, file=sys.stderr)
         raise RuntimeError(error_msg) from e
 
 
-def process_tool(param: str) -> str:
+# One @registry.tool per tool; the function receives the validated arguments as keywords
+@registry.tool(
+    name="your_tool",
+    description="Description of what your tool does",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "param1": {
+                "type": "string",
+                "description": "Parameter description"
+            }
+        },
+        "required": ["param1"]
+    },
+)
+@runs_in("thread")  # "async" for coroutines, "process" for CPU-bound work, "stream" for async generators
+def process_tool(param1: str) -> str:
     """Process tool input and return result"""
-    # Implement your logic here
-    return f"Processed: {param}"
+    # Implement your logic here (long loops in thread tools should stop once cancel_requested())
+    return f"Processed: {param1}"
+
+
+# A stream tool yields its output in chunks; clients that pass a progress token receive each
+# chunk as soon as it exists (progress notification message) instead of after the whole call
+#
+# @registry.tool(name="export_rows", input_schema={...})
+# @runs_in("stream")
+# async def export_rows(query: str):
+#     yield Progress("fetching", total=101)   # optional status update, not part of the result
+#     async for row in fetch_rows(query):
+#         yield f"{row}\n"
+
+
+def progress_notifier():
+    """Progress callback for the current call, or None if the client did not ask for progress"""
+    ctx = server.request_context
+    token = ctx.meta.progressToken if ctx.meta else None
+    if token is None:
+        return None
+    
+    async def notify(progress: float, total: Optional[float], message: Optional[str]):
+        await ctx.session.send_progress_notification(
+            token, progress, total=total, message=message, related_request_id=ctx.request_id
+        )
+    return notify
 
 
 async def main_async():
     """Async main entry point for the MCP server"""
+    interval = env_float("MCP_METRICS_INTERVAL", 0.0)
+    if interval <= 0:
+        await serve_stdio()
+        return
+    
+    path = os.environ.get("MCP_METRICS_FILE") or None
+    background = [
+        asyncio.create_task(metrics.monitor_event_loop()),
+        asyncio.create_task(metrics.dump_periodically(interval, path)),
+    ]
+    try:
+        await serve_stdio()
+    finally:
+        for task in background:
+            task.cancel()
+        metrics.dump(path)
+
+
+async def serve_stdio():
+    """Run the MCP server over stdin/stdout"""
     async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
         await server.run(
             read_stream,
@@ -95,7 +199,13 @@ async def main_async():
 
 def main():
     """Main entry point (synchronous wrapper)"""
-    asyncio.run(main_async())
+    executor.warm_up(registry.functions())
+    cache.exclude_streams(registry)
+    flights.exclude_streams(registry)
+    try:
+        asyncio.run(main_async())
+    finally:
+        executor.shutdown()
 
 
 if __name__ == "__main__":
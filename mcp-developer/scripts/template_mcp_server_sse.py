@@ -2,11 +2,14 @@
 """Template MCP server with SSE (Server-Sent Events) support - customize for your use case"""
 
 import asyncio
+import os
 import sys
+import uuid
 from pathlib import Path
 from typing import Any, Optional
 
 try:
+    import aiohttp
     from aiohttp import web
     from aiohttp_sse import sse_response
     from aiohttp_cors import setup as cors_setup, ResourceOptions
@@ -15,88 +18,231 @@ except ImportError:
     sys.exit(1)
 
 try:
+    import anyio
+    from anyio.streams.memory import MemoryObjectSendStream
     from mcp.server import NotificationOptions, Server
     from mcp.server.models import InitializationOptions
+    from mcp.shared.message import SessionMessage
     import mcp.types as types
 except ImportError:
     print("Error: mcp package is not installed. Please install it with: pip install mcp", file=sys.stderr)
     sys.exit(1)
 
+# Shared runtime (mcp_tool_runtime.py) lives next to this template
+scripts_dir = Path(__file__).parent
+if str(scripts_dir) not in sys.path:
+    sys.path.insert(0, str(scripts_dir))
+
+from mcp_tool_runtime import (
+    PROMETHEUS_CONTENT_TYPE,
+    AdmissionController,
+    Progress,
+    SingleFlight,
+    ToolExecutor,
+    ToolMetrics,
+    ToolRegistry,
+    ToolResultCache,
+    cancel_requested,
+    current_client,
+    current_progress,
+    env_float,
+    env_int,
+    merge_prometheus,
+    runs_in,
+)
+from mcp_prefork import PreforkSupervisor, peer_sockets, worker_socket
+
 # Initialize MCP server
 server = Server("your-server-name")
 
-# Global state (if needed)
-# cache: dict[str, Any] = {}
+# Tool execution: async tools run on the event loop, thread tools in a bounded thread pool,
+# process tools in a warm process pool (pool sizes: MCP_MAX_THREADS / MCP_MAX_PROCESSES);
+# stream tools send each chunk as a progress notification and keep at most
+# MCP_MAX_RESULT_CHARS characters for the final result. Calls running longer than their
+# budget (@runs_in(..., timeout=...), default MCP_TOOL_TIMEOUT seconds, 0 = none) or cancelled
+# by the client are stopped: async tools are cancelled, pool calls abandoned or killed
+executor = ToolExecutor(
+    max_threads=env_int("MCP_MAX_THREADS"),
+    max_processes=env_int("MCP_MAX_PROCESSES"),
+    max_result_chars=env_int("MCP_MAX_RESULT_CHARS", 1_000_000),
+    default_timeout=env_float("MCP_TOOL_TIMEOUT", 60.0),
+)
+
+# Tools by name: dispatch is a dict lookup, the tools/list answer is built once and
+# arguments are checked against input schemas compiled at startup (see @registry.tool below)
+registry = ToolRegistry()
+
+# Result cache keyed by tool name + canonicalized arguments, LRU-bounded (MCP_CACHE_SIZE entries)
+# with a default TTL (MCP_CACHE_TTL seconds); a per-tool TTL of 0 opts non-idempotent tools out.
+# Stream tools are opted out at startup: a cached result would arrive without progress notifications
+cache = ToolResultCache(
+    maxsize=env_int("MCP_CACHE_SIZE", 1024),
+    ttl=env_float("MCP_CACHE_TTL", 300.0),
+    tool_ttls={
+        "your_tool": 60.0,
+        # "send_email": 0,
+    },
+)
+
+# Identical calls arriving while one is still running await its result instead of running again
+# (exclude tools with side effects: each of their calls must run; stream tools are excluded at
+# startup because only the first caller would receive the progress notifications)
+flights = SingleFlight(exclude={
+    # "send_email",
+})
+
+# Admission control: at most MCP_MAX_CONCURRENCY tool calls run at once (MCP_MAX_PER_CLIENT per
+# SSE connection); up to MCP_MAX_QUEUE more wait for MCP_QUEUE_TIMEOUT seconds, the rest are
+# rejected immediately. MCP_MAX_CONNECTIONS caps open SSE connections.
+admission = AdmissionController(
+    max_concurrency=env_int("MCP_MAX_CONCURRENCY", 64),
+    max_per_client=env_int("MCP_MAX_PER_CLIENT", 16),
+    max_queue=env_int("MCP_MAX_QUEUE", 128),
+    queue_timeout=env_float("MCP_QUEUE_TIMEOUT", 10.0),
+)
+MAX_CONNECTIONS = env_int("MCP_MAX_CONNECTIONS", 256)
+
+# Per-tool call counts, errors, in-flight calls, latency histograms and event-loop lag (GET /metrics)
+metrics = ToolMetrics()
+metrics.add_collector("executor", executor.stats)
+metrics.add_collector("cache", cache.stats)
+metrics.add_collector("coalescing", flights.stats)
+metrics.add_collector("admission", admission.stats)
+metrics.add_collector("connections", lambda: {"open": len(sessions), "max": MAX_CONNECTIONS})
 
 
 @server.list_tools()
 async def handle_list_tools() -> list[types.Tool]:
-    """List available tools"""
-    return [
-        types.Tool(
-            name="your_tool",
-            description="Description of what your tool does",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "param1": {
-                        "type": "string",
-                        "description": "Parameter description"
-                    }
-                },
-                "required": ["param1"]
-            }
-        )
-    ]
+    """List available tools (built once from the registry)"""
+    return registry.listing(types.Tool)
 
 
-@server.call_tool()
+@server.call_tool(validate_input=False)  # the registry validates with precompiled schemas
+@metrics.instrumented
+@cache.cached
+@admission.limited  # above coalescing: every caller is admitted under its own client
+@flights.coalesced_calls
 async def handle_call_tool(name: str, arguments: Optional[dict[str, Any]]) -> list[types.TextContent]:
     """Handle tool calls"""
-    if name != "your_tool":
-        raise ValueError(f"Unknown tool: {name}")
-    
-    # Validate arguments
-    if not arguments or "param1" not in arguments:
-        raise ValueError("Missing required argument: param1")
-    
-    param1 = arguments["param1"]
-    if not isinstance(param1, str):
-        raise ValueError("param1 must be a string")
+    # Look up the tool and validate the arguments against its input schema
+    spec = registry.resolve(name, arguments)
     
     try:
-        # Your tool logic here
-        result = process_tool(param1)
+        # Run the tool (dispatched according to its @runs_in kind, never blocks the loop)
+        current_progress.set(progress_notifier())
+        result = await executor.call(spec.func, **(arguments or {}))
         
-        # Return result
-        return [types.TextContent(type="text", text=str(result))]
+        # Return result (stream tools return their list of chunks)
+        chunks = result if isinstance(result, list) else [result]
+        return [types.TextContent(type="text", text=str(chunk)) for chunk in chunks]
     
     except Exception as e:
-        error_msg = f"Error processing {param1}: {str(e)}"
+        error_msg = f"Error in {name}: {str(e)}"
         print(error_msg, file=sys.stderr)
         raise RuntimeError(error_msg) from e
 
 
-def process_tool(param: str) -> str:
+# One @registry.tool per tool; the function receives the validated arguments as keywords
+@registry.tool(
+    name="your_tool",
+    description="Description of what your tool does",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "param1": {
+                "type": "string",
+                "description": "Parameter description"
+            }
+        },
+        "required": ["param1"]
+    },
+)
+@runs_in("thread")  # "async" for coroutines, "process" for CPU-bound work, "stream" for async generators
+def process_tool(param1: str) -> str:
     """Process tool input and return result"""
-    # Implement your logic here
-    return f"Processed: {param}"
+    # Implement your logic here (long loops in thread tools should stop once cancel_requested())
+    return f"Processed: {param1}"
+
+
+# A stream tool yields its output in chunks; clients that pass a progress token receive each
+# chunk as soon as it exists (progress notification message) instead of after the whole call
+#
+# @registry.tool(name="export_rows", input_schema={...})
+# @runs_in("stream")
+# async def export_rows(query: str):
+#     yield Progress("fetching", total=101)   # optional status update, not part of the result
+#     async for row in fetch_rows(query):
+#         yield f"{row}\n"
+
+
+def progress_notifier():
+    """Progress callback for the current call, or None if the client did not ask for progress"""
+    ctx = server.request_context
+    token = ctx.meta.progressToken if ctx.meta else None
+    if token is None:
+        return None
+    
+    async def notify(progress: float, total: Optional[float], message: Optional[str]):
+        await ctx.session.send_progress_notification(
+            token, progress, total=total, message=message, related_request_id=ctx.request_id
+        )
+    return notify
+
+
+# Open SSE sessions: session id -> (stream into that session's server.run(), stream out to its client)
+sessions: dict[str, tuple[MemoryObjectSendStream, MemoryObjectSendStream]] = {}
+# Handler tasks of open SSE streams, closed once in-flight calls have drained on shutdown
+stream_tasks: set[asyncio.Task] = set()
+
+# JSON-RPC error code for calls rejected by admission control (implementation-defined server error)
+OVERLOADED = -32000
+
+# Listen address, and how long a stopping server lets in-flight calls finish
+HOST = os.environ.get("MCP_HOST", "0.0.0.0")
+PORT = env_int("MCP_PORT", 8000)
+GRACEFUL_TIMEOUT = env_float("MCP_GRACEFUL_TIMEOUT", 30.0)
+
+# Pre-fork mode (MCP_WORKERS > 1, see run_worker): this worker's index and the directory holding
+# every worker's private unix socket. Session ids start with the owning worker's pid.
+WORKER_INDEX: Optional[int] = None
+WORKER_SOCKETS: Optional[str] = None
 
 
 async def sse_handler(request: web.Request) -> web.StreamResponse:
-    """Handle SSE connection for MCP communication"""
+    """Handle SSE connection for MCP communication
+
+    MCP over SSE: the client keeps this GET stream open and receives server messages
+    as "message" events; it POSTs its own messages to the URL sent in the first
+    "endpoint" event (handled by messages_handler).
+    """
     # Optional: Add authentication
     # token = request.headers.get('Authorization')
     # if token != f"Bearer {expected_token}":
     #     raise web.HTTPUnauthorized()
     
+    if len(sessions) >= MAX_CONNECTIONS:
+        raise web.HTTPServiceUnavailable(text="Too many connections", headers={"Retry-After": "1"})
+    
+    session_id = f"{os.getpid()}-{uuid.uuid4().hex}"
+    # Tool calls of this session count against its per-client limit (inherited by server.run below)
+    current_client.set(session_id)
+    read_stream_writer, read_stream = anyio.create_memory_object_stream(0)
+    write_stream, write_stream_reader = anyio.create_memory_object_stream(0)
+    sessions[session_id] = (read_stream_writer, write_stream)
+    stream_tasks.add(asyncio.current_task())
+    
     try:
         async with sse_response(request) as response:
-            # Create read/write streams from SSE
-            read_stream = request.content
-            write_stream = response
+            await response.send(f"/messages/?session_id={session_id}", event="endpoint")
+            
+            async def forward_messages():
+                async for session_message in write_stream_reader:
+                    await response.send(
+                        session_message.message.model_dump_json(by_alias=True, exclude_none=True),
+                        event="message",
+                    )
             
-            await server.run(
+            server_task = asyncio.create_task(server.run(
                 read_stream,
                 write_stream,
                 InitializationOptions(
@@ -107,7 +253,27 @@ async def sse_handler(request: web.Request) -> web.StreamResponse:
                         experimental_capabilities={},
                     ),
                 ),
-            )
+            ))
+            async def watch_connection():
+                # aiohttp-sse only notices a disconnect when its next ping fails (up to 15s later);
+                # ending here cancels the session's running tool calls right away
+                while request.transport is not None and not request.transport.is_closing():
+                    await asyncio.sleep(0.5)
+
+            tasks = {
+                server_task,
+                asyncio.create_task(forward_messages()),
+                asyncio.create_task(response.wait()),
+                asyncio.create_task(watch_connection()),
+            }
+            try:
+                # Ends when the client disconnects or the session shuts down; cancelling server.run
+                # cancels its in-flight tool calls
+                await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
         
         return response
     
@@ -118,11 +284,131 @@ async def sse_handler(request: web.Request) -> web.StreamResponse:
     except Exception as e:
         print(f"SSE error: {e}", file=sys.stderr)
         raise
+    finally:
+        sessions.pop(session_id, None)
+        stream_tasks.discard(asyncio.current_task())
+        await read_stream_writer.aclose()
+
+
+# Pre-fork mode: HTTP clients for sibling workers' private sockets, by socket path
+peer_clients: dict[str, aiohttp.ClientSession] = {}
+
+
+def peer_client(path: str) -> aiohttp.ClientSession:
+    client = peer_clients.get(path)
+    if client is None or client.closed:
+        client = peer_clients[path] = aiohttp.ClientSession(connector=aiohttp.UnixConnector(path=path))
+    return client
+
+
+async def forward_to_owner(request: web.Request, session_id: str) -> web.Response:
+    """Pre-fork mode: pass a message to the worker that owns the session
+
+    The client's POSTs use other TCP connections than its SSE stream, so the kernel
+    may hand them to any worker.
+    """
+    owner = session_id.partition("-")[0]
+    path = worker_socket(WORKER_SOCKETS, int(owner)) if owner.isdigit() else None
+    if path is None or owner == str(os.getpid()) or not os.path.exists(path):
+        return web.Response(status=404, text="Could not find session")
+    try:
+        async with peer_client(path).post(f"http://worker{request.path_qs}", data=await request.read(),
+                                          headers={"Content-Type": "application/json"}) as response:
+            return web.Response(status=response.status, text=await response.text())
+    except aiohttp.ClientError:
+        return web.Response(status=404, text="Could not find session")
+
+
+async def messages_handler(request: web.Request) -> web.Response:
+    """Receive a client message for an open SSE session"""
+    session_id = request.query.get("session_id", "")
+    streams = sessions.get(session_id)
+    if streams is None:
+        if WORKER_SOCKETS is not None:
+            return await forward_to_owner(request, session_id)
+        return web.Response(status=404, text="Could not find session")
+    read_stream_writer, write_stream = streams
+    
+    try:
+        message = types.JSONRPCMessage.model_validate_json(await request.read())
+    except ValueError as e:
+        return web.Response(status=400, text=f"Could not parse message: {e}")
+    
+    # Fail fast while the call queue is full instead of letting the backlog grow. The rejection is
+    # a JSON-RPC error on the SSE stream: MCP clients treat a failed POST as a broken connection.
+    if isinstance(message.root, types.JSONRPCRequest) and message.root.method == "tools/call" \
+            and admission.saturated:
+        admission.rejected += 1
+        error = types.JSONRPCError(
+            jsonrpc="2.0",
+            id=message.root.id,
+            error=types.ErrorData(code=OVERLOADED, message="Server overloaded, retry later"),
+        )
+        await write_stream.send(SessionMessage(types.JSONRPCMessage(error)))
+        return web.Response(status=202, text="Accepted")
+    
+    await read_stream_writer.send(SessionMessage(message))
+    return web.Response(status=202, text="Accepted")
 
 
 async def health_check(request: web.Request) -> web.Response:
-    """Health check endpoint"""
-    return web.json_response({"status": "ok", "server": "your-server-name"})
+    """Health check endpoint
+
+    Returns 503 while the call queue is full, so load balancers stop routing new
+    traffic here; "queued" shows pressure building up before that.
+    """
+    overloaded = admission.saturated
+    return web.json_response({
+        "status": "overloaded" if overloaded else "ok",
+        "server": "your-server-name",
+        "worker": WORKER_INDEX,
+        "pid": os.getpid(),
+        "connections": len(sessions),
+        "max_connections": MAX_CONNECTIONS,
+        "admission": admission.stats(),
+        "executor": executor.stats(),
+        "cache": cache.stats(),
+        "coalescing": flights.stats(),
+    }, status=503 if overloaded else 200)
+
+
+async def metrics_handler(request: web.Request) -> web.Response:
+    """Prometheus metrics endpoint
+
+    In pre-fork mode the answer covers all workers (labelled worker/pid), whichever
+    worker the scrape lands on; ?local=1 returns only this worker's metrics.
+    """
+    text = metrics.render()
+    if WORKER_SOCKETS is not None and "local" not in request.query:
+        async def fetch(path: str) -> str:
+            try:
+                async with peer_client(path).get("http://worker/metrics?local=1") as response:
+                    return await response.text()
+            except aiohttp.ClientError:
+                return ""
+
+        peers = [path for pid, path in peer_sockets(WORKER_SOCKETS).items() if pid != os.getpid()]
+        text = merge_prometheus([text] + list(await asyncio.gather(*(fetch(path) for path in peers))))
+    return web.Response(body=text.encode(), headers={"Content-Type": PROMETHEUS_CONTENT_TYPE})
+
+
+async def start_background_tasks(app: web.Application):
+    app["loop_monitor"] = asyncio.create_task(metrics.monitor_event_loop())
+
+
+async def stop_background_tasks(app: web.Application):
+    app["loop_monitor"].cancel()
+    for client in peer_clients.values():
+        await client.close()
+
+
+async def drain(app: web.Application):
+    """On shutdown (listening already stopped): let in-flight calls finish, then close SSE streams"""
+    deadline = asyncio.get_running_loop().time() + GRACEFUL_TIMEOUT
+    while sum(metrics.in_flight.values()) and asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(0.1)
+    for task in list(stream_tasks):
+        task.cancel()
 
 
 async def create_app() -> web.Application:
@@ -141,7 +427,18 @@ async def create_app() -> web.Application:
     
     # Register endpoints
     app.router.add_get("/sse", sse_handler)
+    app.router.add_post("/messages/", messages_handler)
     app.router.add_get("/health", health_check)
+    app.router.add_get("/metrics", metrics_handler)
+    app.on_startup.append(start_background_tasks)
+    app.on_shutdown.append(drain)
+    app.on_cleanup.append(stop_background_tasks)
+
+    # Start pool workers before the first request; stop them with the server
+    executor.warm_up(registry.functions())
+    cache.exclude_streams(registry)
+    flights.exclude_streams(registry)
+    app.on_cleanup.append(lambda app: asyncio.to_thread(executor.shutdown))
     
     # Optional: Add logging middleware
     # async def logging_middleware(app, handler):
@@ -154,8 +451,26 @@ async def create_app() -> web.Application:
     return app
 
 
+def run_worker(index: int, socket_dir: str):
+    """Entry point of one pre-fork worker process (started by PreforkSupervisor)"""
+    global WORKER_INDEX, WORKER_SOCKETS
+    WORKER_INDEX, WORKER_SOCKETS = index, socket_dir
+    metrics.labels = {"worker": str(index), "pid": str(os.getpid())}
+    app = asyncio.run(create_app())
+    # Public port shared with the other workers, plus this worker's private socket
+    web.run_app(app, host=HOST, port=PORT, reuse_port=True, path=worker_socket(socket_dir, os.getpid()),
+                shutdown_timeout=GRACEFUL_TIMEOUT, print=None)
+
+
 def main():
     """Start HTTP server with SSE support"""
+    workers = env_int("MCP_WORKERS", 1)
+    if workers > 1:
+        # Pre-fork: N processes share the port through SO_REUSEPORT (Linux, BSD). Each worker has
+        # its own tool pools; size MCP_MAX_PROCESSES accordingly. kill -HUP <pid> restarts workers
+        # one at a time, SIGTERM stops them after in-flight calls finish.
+        return PreforkSupervisor(run_worker, workers, graceful_timeout=GRACEFUL_TIMEOUT).run()
+    
     app = asyncio.run(create_app())
     
     # For production, use HTTPS:
@@ -164,9 +479,9 @@ def main():
     # ssl_context.load_cert_chain('cert.pem', 'key.pem')
     # web.run_app(app, host="0.0.0.0", port=8000, ssl_context=ssl_context)
     
-    # For development:
-    web.run_app(app, host="0.0.0.0", port=8000)
+    # For development (listen address: MCP_HOST / MCP_PORT):
+    web.run_app(app, host=HOST, port=PORT, shutdown_timeout=GRACEFUL_TIMEOUT)
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""Tests for AdmissionController: limits, the bounded wait queue and Overloaded rejections."""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+from mcp_tool_runtime import AdmissionController, Overloaded  # noqa: E402
+
+
+async def settle() -> None:
+    """Let queued acquire() calls reach their wait."""
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+def test_full_queue_rejects_immediately():
+    async def scenario():
+        admission = AdmissionController(max_concurrency=1, max_queue=1)
+        await admission.acquire("a")
+        waiter = asyncio.ensure_future(admission.acquire("b"))
+        await settle()
+        with pytest.raises(Overloaded, match="1 calls running, 1 queued"):
+            await admission.acquire("c")
+        admission.release("a")
+        await waiter
+        return admission.stats()
+
+    stats = asyncio.run(scenario())
+    assert (stats["admitted"], stats["rejected"], stats["in_flight"], stats["queued"]) == (2, 1, 1, 0)
+
+
+def test_queue_timeout_raises_overloaded_and_leaves_the_queue():
+    async def scenario():
+        admission = AdmissionController(max_concurrency=1, queue_timeout=0.05)
+        await admission.acquire("a")
+        with pytest.raises(Overloaded, match="no slot within 0.05s"):
+            await admission.acquire("b")
+        return admission
+
+    admission = asyncio.run(scenario())
+    assert (admission.queued, admission.rejected, admission.in_flight) == (0, 1, 1)
+
+
+def test_freed_slots_skip_waiters_whose_client_is_at_its_limit():
+    async def scenario():
+        admission = AdmissionController(max_concurrency=2, max_per_client=1)
+        order = []
+
+        async def call(client: str):
+            async with admission.slot(client):
+                order.append(client)
+                await asyncio.sleep(0.01)
+
+        await admission.acquire("busy")
+        await admission.acquire("other")
+        waiters = [asyncio.ensure_future(call(client)) for client in ("busy", "quiet")]
+        await settle()
+        # A slot frees up, but "busy" still holds one: the next waiter from another client goes first
+        admission.release("other")
+        await settle()
+        assert order == ["quiet"]
+        admission.release("busy")
+        await asyncio.gather(*waiters)
+        return order, admission.stats()
+
+    order, stats = asyncio.run(scenario())
+    assert order == ["quiet", "busy"]
+    assert (stats["in_flight"], stats["clients"]) == (0, 0)
+
+
+def test_cancelled_waiter_does_not_keep_a_slot():
+    async def scenario():
+        admission = AdmissionController(max_concurrency=1)
+        await admission.acquire("a")
+        waiter = asyncio.ensure_future(admission.acquire("b"))
+        await settle()
+        waiter.cancel()
+        await settle()
+        admission.release("a")
+        return admission.stats()
+
+    stats = asyncio.run(scenario())
+    assert (stats["in_flight"], stats["queued"]) == (0, 0)
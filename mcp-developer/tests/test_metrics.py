@@ -0,0 +1,85 @@
+"""Tests for ToolMetrics and merge_prometheus: call outcomes, histograms and merged expositions."""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+from mcp_tool_runtime import ToolMetrics, ToolTimeout, merge_prometheus  # noqa: E402
+
+
+def samples(text: str) -> dict[str, str]:
+    """Sample lines of an exposition as {name{labels}: value}."""
+    return dict(line.rsplit(" ", 1) for line in text.splitlines() if line and not line.startswith("#"))
+
+
+def test_instrumented_records_each_outcome():
+    metrics = ToolMetrics(buckets=(0.1, 1.0))
+
+    async def handler(name, arguments):
+        if name == "slow":
+            raise RuntimeError("wrapped") from ToolTimeout("slow timed out after 1s")
+        if name == "broken":
+            raise ValueError("bad arguments")
+        return "ok"
+
+    async def scenario():
+        instrumented = metrics.instrumented(handler)
+        await instrumented("lookup", {})
+        for name in ("slow", "broken"):
+            with pytest.raises(Exception):
+                await instrumented(name, {})
+
+    asyncio.run(scenario())
+    values = samples(metrics.render())
+    assert values['mcp_tool_calls_total{tool="lookup",status="ok"}'] == "1"
+    assert values['mcp_tool_calls_total{tool="slow",status="timeout"}'] == "1"
+    assert values['mcp_tool_calls_total{tool="broken",status="error"}'] == "1"
+    assert values['mcp_tool_in_flight{tool="lookup"}'] == "0"
+
+
+def test_histogram_buckets_are_cumulative():
+    metrics = ToolMetrics(buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.5, 5.0):
+        metrics.record("search", "ok", seconds)
+
+    values = samples(metrics.render())
+    buckets = [values[f'mcp_tool_duration_seconds_bucket{{tool="search",le="{le}"}}'] for le in ("0.1", "1", "+Inf")]
+    assert buckets == ["1", "2", "3"]
+    assert values['mcp_tool_duration_seconds_count{tool="search"}'] == "3"
+    assert float(values['mcp_tool_duration_seconds_sum{tool="search"}']) == pytest.approx(5.55)
+
+
+def test_collectors_export_numeric_stats_as_gauges():
+    metrics = ToolMetrics(labels={"worker": "0"})
+    metrics.add_collector("cache", lambda: {"hits": 3, "hit_rate": 0.75, "enabled": True, "name": "lru"})
+
+    values = samples(metrics.render())
+    assert values['mcp_cache_hits{worker="0"}'] == "3"
+    assert values['mcp_cache_hit_rate{worker="0"}'] == "0.75"
+    assert not any(key.startswith(("mcp_cache_enabled", "mcp_cache_name")) for key in values)
+
+
+def test_merge_groups_each_family_under_one_header():
+    texts = []
+    for worker in ("0", "1"):
+        metrics = ToolMetrics(buckets=(1.0,), labels={"worker": worker})
+        metrics.record("search", "ok", 0.5)
+        texts.append(metrics.render())
+
+    merged = merge_prometheus(texts)
+    lines = merged.splitlines()
+    assert lines.count("# TYPE mcp_tool_calls_total counter") == 1
+    assert lines.count("# HELP mcp_tool_calls_total Tool calls by tool and outcome.") == 1
+    # Both workers' samples follow their family's header, before the next family starts
+    start = lines.index("# TYPE mcp_tool_calls_total counter")
+    assert lines[start + 1:start + 3] == [
+        'mcp_tool_calls_total{worker="0",tool="search",status="ok"} 1',
+        'mcp_tool_calls_total{worker="1",tool="search",status="ok"} 1',
+    ]
+    assert len(samples(merged)) == sum(len(samples(text)) for text in texts)
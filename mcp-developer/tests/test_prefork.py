@@ -0,0 +1,94 @@
+"""Tests for PreforkSupervisor: crashed workers are restarted, SIGHUP rolls, SIGTERM stops them all."""
+
+from __future__ import annotations
+
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[1] / "scripts"
+
+# Each worker records "<index>-<pid>" in OUT_DIR, then reports ready by creating its private socket path
+SUPERVISOR = f'''
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, {str(SCRIPTS_DIR)!r})
+from mcp_prefork import PreforkSupervisor, worker_socket
+
+
+def worker(index, socket_dir):
+    Path(os.environ["OUT_DIR"], f"{{index}}-{{os.getpid()}}").touch()
+    Path(worker_socket(socket_dir, os.getpid())).touch()
+    time.sleep(60)
+
+
+if __name__ == "__main__":
+    sys.exit(PreforkSupervisor(worker, 2, graceful_timeout=1.0).run())
+'''
+
+pytestmark = pytest.mark.skipif(not hasattr(signal, "SIGHUP"), reason="POSIX signals")
+
+
+def workers(out_dir: Path) -> dict[int, list[int]]:
+    """index -> pids started for it, oldest first."""
+    started: dict[int, list[tuple[float, int]]] = {}
+    for path in out_dir.iterdir():
+        index, pid = map(int, path.name.split("-"))
+        started.setdefault(index, []).append((path.stat().st_mtime_ns, pid))
+    return {index: [pid for _, pid in sorted(entries)] for index, entries in started.items()}
+
+
+def wait_for(predicate, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.05)
+
+
+def alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+def test_supervisor_restarts_rolls_and_stops_workers(tmp_path):
+    script = tmp_path / "supervisor.py"
+    script.write_text(SUPERVISOR)
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    supervisor = subprocess.Popen([sys.executable, str(script)], env={**os.environ, "OUT_DIR": str(out_dir)},
+                                  stderr=subprocess.PIPE, text=True)
+    try:
+        wait_for(lambda: len(workers(out_dir)) == 2)
+
+        crashed = workers(out_dir)[0][0]
+        os.kill(crashed, signal.SIGKILL)
+        wait_for(lambda: len(workers(out_dir)[0]) == 2)
+        assert len(workers(out_dir)[1]) == 1
+
+        before = {index: pids[-1] for index, pids in workers(out_dir).items()}
+        supervisor.send_signal(signal.SIGHUP)
+        wait_for(lambda: all(pids[-1] != before[index] for index, pids in workers(out_dir).items()))
+        wait_for(lambda: not any(alive(pid) for pid in before.values()))
+
+        current = [pids[-1] for pids in workers(out_dir).values()]
+        supervisor.send_signal(signal.SIGTERM)
+        assert supervisor.wait(timeout=30) == 0
+        assert not any(alive(pid) for pid in current)
+    finally:
+        if supervisor.poll() is None:
+            supervisor.kill()
+        _, stderr = supervisor.communicate()
+
+    assert f"worker 0 (pid {crashed}) exited with code -9, restarting in 1s" in stderr
+    assert "rolling restart" in stderr
@@ -0,0 +1,126 @@
+"""Tests for progress notifications of stream tools behind the template's result cache and call coalescing."""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[1] / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+mcp = pytest.importorskip("mcp")
+from mcp import ClientSession, StdioServerParameters  # noqa: E402
+from mcp.client.stdio import stdio_client  # noqa: E402
+
+from mcp_tool_runtime import SingleFlight, ToolRegistry, ToolResultCache, runs_in  # noqa: E402
+
+ROWS = 5
+
+# The stdio template with one stream tool registered, as a user of the template would add it
+SERVER = f'''
+import asyncio
+import sys
+
+sys.path.insert(0, {str(SCRIPTS_DIR)!r})
+import template_mcp_server as template
+
+
+@template.registry.tool(
+    name="export_rows",
+    input_schema={{"type": "object", "properties": {{"rows": {{"type": "integer"}}}}}},
+)
+@template.runs_in("stream")
+async def export_rows(rows: int):
+    for i in range(rows):
+        await asyncio.sleep(0.05)
+        yield f"row {{i}}"
+
+
+if __name__ == "__main__":
+    template.main()
+'''
+
+
+def test_exclude_streams_skips_only_stream_tools():
+    registry = ToolRegistry()
+
+    @registry.tool()
+    @runs_in("stream")
+    async def export_rows():
+        yield "row"
+
+    @registry.tool()
+    @runs_in("thread")
+    def lookup() -> str:
+        return "value"
+
+    flights = SingleFlight(exclude={"send_email"})
+    flights.exclude_streams(registry)
+    assert flights.exclude == {"send_email", "export_rows"}
+
+
+def test_cache_exclude_streams_opts_out_only_stream_tools():
+    registry = ToolRegistry()
+
+    @registry.tool()
+    @runs_in("stream")
+    async def export_rows():
+        yield "row"
+
+    @registry.tool()
+    @runs_in("thread")
+    def lookup() -> str:
+        return "value"
+
+    cache = ToolResultCache(ttl=300.0)
+    cache.exclude_streams(registry)
+    assert not cache.enabled_for("export_rows")
+    assert cache.enabled_for("lookup")
+
+
+def call_with_progress(server: Path, calls: list[list[str]], concurrent: bool):
+    """Call export_rows once per list in calls, collecting each call's progress messages into it."""
+    async def run() -> list:
+        params = StdioServerParameters(command=sys.executable, args=[str(server)])
+        async with stdio_client(params) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+
+                def call(messages: list[str]):
+                    async def on_progress(progress, total, message):
+                        messages.append(message)
+                    return session.call_tool("export_rows", {"rows": ROWS}, progress_callback=on_progress)
+
+                if concurrent:
+                    return await asyncio.wait_for(asyncio.gather(*(call(messages) for messages in calls)),
+                                                  timeout=30)
+                return [await asyncio.wait_for(call(messages), timeout=30) for messages in calls]
+
+    return asyncio.run(run())
+
+
+def test_repeated_stream_call_is_not_replayed_from_cache(tmp_path):
+    server = tmp_path / "stream_server.py"
+    server.write_text(SERVER)
+
+    received: list[list[str]] = [[], []]
+    results = call_with_progress(server, received, concurrent=False)
+    expected = [f"row {i}" for i in range(ROWS)]
+    assert [[content.text for content in result.content] for result in results] == [expected, expected]
+    assert received == [expected, expected]
+
+
+def test_identical_concurrent_stream_calls_each_get_progress(tmp_path):
+    server = tmp_path / "stream_server.py"
+    server.write_text(SERVER)
+
+    received: list[list[str]] = [[], []]
+    results = call_with_progress(server, received, concurrent=True)
+    expected = [f"row {i}" for i in range(ROWS)]
+    for result in results:
+        assert not result.isError
+        assert [content.text for content in result.content] == expected
+    assert received == [expected, expected]
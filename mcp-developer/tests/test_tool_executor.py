@@ -0,0 +1,124 @@
+"""Tests for ToolExecutor: dispatch by tool kind, timeouts, cancellation and pool replacement."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+from mcp_tool_runtime import ToolExecutor, ToolTimeout, cancel_requested, runs_in  # noqa: E402
+
+
+# Process tools must be module-level functions: spawned workers import them by name
+@runs_in("process")
+def worker_pid() -> int:
+    return os.getpid()
+
+
+@runs_in("process", timeout=0.5)
+def hang_in_process() -> None:
+    time.sleep(60)
+
+
+@pytest.fixture
+def executor():
+    executor = ToolExecutor(max_threads=2, max_processes=1)
+    yield executor
+    executor.shutdown(wait=False)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_tools_run_where_their_kind_says(executor):
+    @runs_in("thread")
+    def in_thread() -> str:
+        return threading.current_thread().name
+
+    async def in_loop() -> str:
+        return threading.current_thread().name
+
+    async def calls():
+        return (await executor.call(in_thread), await executor.call(in_loop),
+                await executor.call(worker_pid))
+
+    thread_name, loop_name, pid = run(calls())
+    assert thread_name.startswith("mcp-tool")
+    assert loop_name == threading.current_thread().name
+    assert pid != os.getpid()
+
+
+def test_stream_tools_return_their_chunks(executor):
+    async def rows(count: int):
+        for i in range(count):
+            yield f"row {i}"
+
+    assert run(executor.call(rows, 3)) == ["row 0", "row 1", "row 2"]
+
+
+def test_async_timeout_raises_tool_timeout(executor):
+    @runs_in("async", timeout=0.05)
+    async def slow() -> None:
+        await asyncio.sleep(10)
+
+    with pytest.raises(ToolTimeout, match="slow timed out after 0.05s"):
+        run(executor.call(slow))
+    assert executor.stats()["timeouts"] == 1
+
+
+def test_cancellation_is_counted_and_propagates(executor):
+    async def slow() -> None:
+        await asyncio.sleep(10)
+
+    async def cancel_call():
+        task = asyncio.ensure_future(executor.call(slow))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await task
+
+    with pytest.raises(asyncio.CancelledError):
+        run(cancel_call())
+    assert executor.stats()["cancelled"] == 1
+
+
+def test_abandoned_thread_call_sees_cancel_and_replaces_the_pool(executor):
+    stopped = threading.Event()
+
+    @runs_in("thread", timeout=0.05)
+    def poll_until_cancelled() -> None:
+        while not cancel_requested():
+            time.sleep(0.01)
+        stopped.set()
+
+    @runs_in("thread")
+    def quick() -> str:
+        return "ok"
+
+    stuck_pool = executor.threads
+    with pytest.raises(ToolTimeout):
+        run(executor.call(poll_until_cancelled))
+    assert stopped.wait(5)
+
+    # One stuck call holds half of the two threads: new calls get a fresh pool
+    assert executor.stats()["pools_replaced"] == 1
+    assert run(executor.call(quick)) == "ok"
+    assert executor.threads is not stuck_pool
+
+
+def test_process_timeout_kills_the_worker_and_starts_a_fresh_pool(executor):
+    first_pid = run(executor.call(worker_pid))
+
+    with pytest.raises(ToolTimeout):
+        run(executor.call(hang_in_process))
+
+    stats = executor.stats()
+    assert (stats["timeouts"], stats["pools_replaced"], stats["workers_killed"]) == (1, 1, 1)
+    assert run(executor.call(worker_pid)) != first_pid
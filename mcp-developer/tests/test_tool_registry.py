@@ -0,0 +1,72 @@
+"""Tests for ToolRegistry: registration, the cached listing and argument validation."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+pytest.importorskip("jsonschema")
+from jsonschema.exceptions import SchemaError  # noqa: E402
+
+from mcp_tool_runtime import ToolRegistry, runs_in  # noqa: E402
+
+SEARCH_SCHEMA = {
+    "type": "object",
+    "properties": {"query": {"type": "string"}, "limit": {"type": "integer", "minimum": 1}},
+    "required": ["query"],
+}
+
+
+@pytest.fixture
+def registry():
+    registry = ToolRegistry()
+
+    @registry.tool(input_schema=SEARCH_SCHEMA)
+    @runs_in("thread")
+    def search(query: str, limit: int = 10) -> str:
+        """Search the index."""
+        return query
+
+    return registry
+
+
+def test_listing_uses_mcp_field_names_and_is_cached(registry):
+    listing = registry.listing()
+    assert listing == [{"name": "search", "description": "Search the index.", "inputSchema": SEARCH_SCHEMA}]
+    assert registry.listing() is listing
+
+    registry.register(lambda: None, name="ping")
+    assert [tool["name"] for tool in registry.listing()] == ["search", "ping"]
+
+
+def test_resolve_returns_the_spec_for_valid_arguments(registry):
+    spec = registry.resolve("search", {"query": "mcp", "limit": 5})
+    assert spec.func(**{"query": "mcp", "limit": 5}) == "mcp"
+
+
+@pytest.mark.parametrize("arguments, message", [
+    ({}, "'query' is a required property"),
+    ({"query": 3}, "3 is not of type 'string' (at query)"),
+    ({"query": "mcp", "limit": 0}, "0 is less than the minimum of 1 (at limit)"),
+])
+def test_invalid_arguments_name_the_problem(registry, arguments, message):
+    with pytest.raises(ValueError) as excinfo:
+        registry.resolve("search", arguments)
+    assert str(excinfo.value) == f"Invalid arguments for search: {message}"
+
+
+def test_unknown_tools_and_duplicates_are_rejected(registry):
+    with pytest.raises(ValueError, match="Unknown tool: missing"):
+        registry.resolve("missing", {})
+    with pytest.raises(ValueError, match="Tool already registered: search"):
+        registry.register(lambda: None, name="search")
+
+
+def test_broken_schema_fails_at_registration(registry):
+    with pytest.raises(SchemaError):
+        registry.register(lambda: None, name="broken", input_schema={"type": "no-such-type"})
+    assert "broken" not in registry
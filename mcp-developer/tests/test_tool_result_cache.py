@@ -0,0 +1,84 @@
+"""Tests for ToolResultCache: TTL expiry, LRU eviction and the handler wrapper."""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+import mcp_tool_runtime  # noqa: E402
+from mcp_tool_runtime import ToolResultCache  # noqa: E402
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(mcp_tool_runtime.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_their_tool_ttl(clock):
+    cache = ToolResultCache(ttl=10.0, tool_ttls={"quotes": 1.0})
+    cache.put("search", {"q": "x"}, "results")
+    cache.put("quotes", {"symbol": "ABC"}, "42")
+
+    clock[0] += 5.0
+    assert cache.get("search", {"q": "x"}) == (True, "results")
+    assert cache.get("quotes", {"symbol": "ABC"}) == (False, None)
+    assert cache.stats()["size"] == 1
+
+
+def test_argument_order_does_not_matter():
+    cache = ToolResultCache()
+    cache.put("search", {"q": "x", "limit": 5}, "results")
+    assert cache.get("search", {"limit": 5, "q": "x"}) == (True, "results")
+
+
+def test_least_recently_used_entry_is_evicted_first():
+    cache = ToolResultCache(maxsize=2)
+    cache.put("tool", {"n": 1}, "one")
+    cache.put("tool", {"n": 2}, "two")
+    cache.get("tool", {"n": 1})
+    cache.put("tool", {"n": 3}, "three")
+
+    assert cache.get("tool", {"n": 2}) == (False, None)
+    assert cache.get("tool", {"n": 1}) == (True, "one")
+    stats = cache.stats()
+    assert (stats["size"], stats["evictions"]) == (2, 1)
+
+
+def test_wrapper_caches_successes_only_and_skips_opted_out_tools():
+    calls = []
+
+    async def handler(name, arguments):
+        calls.append(name)
+        if name == "flaky":
+            raise RuntimeError("boom")
+        return f"{name} result"
+
+    cache = ToolResultCache(tool_ttls={"send_email": 0})
+    cached = cache.cached(handler)
+
+    async def scenario():
+        for name in ("lookup", "lookup", "send_email", "send_email"):
+            await cached(name, {})
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                await cached("flaky", {})
+
+    asyncio.run(scenario())
+    assert calls == ["lookup", "send_email", "send_email", "flaky", "flaky"]
+    assert cache.stats()["hits"] == 1
+
+
+def test_invalidate_one_tool():
+    cache = ToolResultCache()
+    cache.put("a", {}, 1)
+    cache.put("b", {}, 2)
+    cache.invalidate("a")
+    assert cache.get("a", {}) == (False, None)
+    assert cache.get("b", {}) == (True, 2)
@@ -15,7 +15,7 @@ scripts_dir = Path(__file__).parent
 if str(scripts_dir) not in sys.path:
     sys.path.insert(0, str(scripts_dir))
 
-from smart_breakpoint_suggester import BreakpointSuggester
+from smart_breakpoint_suggester import BreakpointSuggester, default_cache_dir, source_digest
 from insert_breakpoint import BreakpointManager
 
 
@@ -26,14 +26,86 @@ class AutoDebugAssistant:
         self.script_path = Path(script_path)
         if not self.script_path.exists():
             raise FileNotFoundError(f"Script not found: {script_path}")
+        # 复用同一个建议器；其结果按源码哈希缓存，文件未变化时不会重新解析
+        self.suggester = BreakpointSuggester(str(self.script_path))
     
-    def auto_debug(self, focus: str = 'functions', max_breakpoints: int = 3):
+    def run_with_runtime_breakpoints(self, lines: list):
+        """不修改源文件：在运行时断点启动器下运行脚本"""
+        launcher = scripts_dir / 'runtime_breakpoint.py'
+        cmd = [sys.executable, str(launcher), str(self.script_path)]
+        for line in lines:
+            cmd += ['--break', str(line)]
+        try:
+            subprocess.run(cmd)
+        except KeyboardInterrupt:
+            print("\n⚠️  调试被中断")
+    
+    def default_profile_path(self) -> Path:
+        """预运行 profile 的默认保存位置（与建议缓存同目录，按源码哈希区分）"""
+        return default_cache_dir() / 'profiles' / f"{self.script_path.stem}-{source_digest(self.script_path)[:16]}.json"
+    
+    def collect_profile(self, profile_path: Path) -> bool:
+        """在 hotpath_profiler.py 下预运行一次脚本，把执行数据保存到 profile_path"""
+        profile_path.parent.mkdir(parents=True, exist_ok=True)
+        profiler = scripts_dir / 'hotpath_profiler.py'
+        cmd = [sys.executable, str(profiler), str(self.script_path),
+               '--save-profile', str(profile_path), '--top', '5']
+        try:
+            subprocess.run(cmd)
+        except KeyboardInterrupt:
+            print("\n⚠️  预运行被中断")
+        return profile_path.exists()
+    
+    def profile_performance(self, interval_ms: float = 5.0, output: str = None, top: int = 20,
+                            clock: str = 'cpu'):
+        """性能诊断 - 在采样分析器下运行脚本，输出火焰图折叠栈文件和热点函数表"""
+        output = output or f"{self.script_path.stem}.folded"
+        print(f"🔥 采样分析: 每 {interval_ms:g} ms 采样一次所有线程 ({clock} 时钟)\n")
+        profiler = scripts_dir / 'sampling_profiler.py'
+        cmd = [sys.executable, str(profiler), str(self.script_path),
+               '--interval', str(interval_ms), '--clock', clock,
+               '--output', output, '--top', str(top)]
+        try:
+            subprocess.run(cmd)
+        except KeyboardInterrupt:
+            print("\n⚠️  分析被中断")
+        print(f"\n💡 生成火焰图: flamegraph.pl {output} > {Path(output).stem}.svg "
+              f"(或把 {output} 拖进 speedscope.app)")
+    
+    def profile_memory(self, interval: float = 1.0, frames: int = 5, top: int = 10, output: str = None):
+        """内存诊断 - 在 tracemalloc 下运行脚本，定期快照，报告增长最多的分配位置和 RSS 变化"""
+        print(f"🧠 内存分析: 每 {interval:g}s 拍一次 tracemalloc 快照 (调用栈 {frames} 层)\n")
+        tracker = scripts_dir / 'memory_tracker.py'
+        cmd = [sys.executable, str(tracker), str(self.script_path),
+               '--interval', str(interval), '--frames', str(frames), '--top', str(top)]
+        if output:
+            cmd += ['--output', output]
+        try:
+            subprocess.run(cmd)
+        except KeyboardInterrupt:
+            print("\n⚠️  分析被中断")
+    
+    def attach_debug(self, lines: list, address: str = None, pid: int = None,
+                     max_hits: int = 1, duration: float = None):
+        """附加到已在运行的进程（debugpy），动态设置断点，不重启、不修改源文件"""
+        from remote_attach import RemoteBreakpoint, attach_and_watch
+        from debug_agent import DEFAULT_HOST, DEFAULT_PORT, parse_address
+        target = parse_address(address) if address else (DEFAULT_HOST, DEFAULT_PORT)
+        breakpoints = [RemoteBreakpoint(str(self.script_path.resolve()), line) for line in lines]
+        try:
+            attach_and_watch(target, breakpoints, max_hits=max_hits, duration=duration, pid=pid)
+        except (ValueError, RuntimeError, OSError) as e:
+            print(f"  ❌ 附加失败 - {e}")
+    
+    def auto_debug(self, focus: str = 'functions', max_breakpoints: int = 3, runtime: bool = False,
+                   rank_by_profile: bool = False, profile_path: str = None,
+                   attach: str = None, attach_pid: int = None, max_hits: int = 1):
         """自动调试流程"""
         print("🤖 自动调试助手启动...\n")
         
         # 1. 智能建议断点
         print("📊 步骤 1: 分析代码，寻找最佳断点位置...")
-        suggester = BreakpointSuggester(str(self.script_path))
+        suggester = self.suggester
         options = {focus} if focus in ['functions', 'loops', 'conditionals', 'exceptions'] else {'functions'}
         suggestions = suggester.suggest_breakpoints(options)
         
@@ -41,10 +113,46 @@ class AutoDebugAssistant:
             print("ℹ️  没有找到建议的断点位置")
             return
         
+        if rank_by_profile:
+            # 按实际运行的热点/失败位置重排；已有 profile 文件时直接复用，不再重新运行
+            path = Path(profile_path) if profile_path else self.default_profile_path()
+            if path.exists():
+                print(f"\n🔥 复用已保存的 profile: {path}")
+            else:
+                print("\n🔥 预运行脚本，收集热点和失败位置...")
+                print("=" * 60)
+                self.collect_profile(path)
+                print("=" * 60)
+            if path.exists():
+                suggestions = suggester.rank_by_profile(path)
+                print(f"  ✅ 已按执行数据排序 (profile: {path})")
+            else:
+                print("  ⚠️  未能生成 profile，保持静态排序")
+        
         # 显示建议
         print(f"\n💡 找到 {len(suggestions)} 个建议，选择前 {max_breakpoints} 个:")
         for i, (line, title, reason) in enumerate(suggestions[:max_breakpoints], 1):
             print(f"  {i}. Line {line}: {title}")
+            if rank_by_profile and '[🔥' in reason:
+                print(f"     └─ {reason[reason.index('[🔥'):]}")
+        
+        if attach or attach_pid:
+            # 2-3. 附加到正在运行的进程：不重启，预热状态保留，断开时断点被清除
+            lines = [line for line, _, _ in suggestions[:max_breakpoints]]
+            print(f"\n🔌 步骤 2: 附加到运行中的进程并设置 {len(lines)} 个断点...")
+            print("=" * 60)
+            self.attach_debug(lines, attach, attach_pid, max_hits)
+            print("\n✅ 自动调试完成！")
+            return
+        
+        if runtime:
+            # 2-3. 运行时断点：源文件保持不变，无需清理
+            lines = [line for line, _, _ in suggestions[:max_breakpoints]]
+            print(f"\n🚀 步骤 2: 以运行时断点运行 (不修改源文件, {len(lines)} 个断点)...")
+            print("=" * 60)
+            self.run_with_runtime_breakpoints(lines)
+            print("\n✅ 自动调试完成！")
+            return
         
         # 2. 插入断点
         print(f"\n📍 步骤 2: 插入 {max_breakpoints} 个断点...")
@@ -58,14 +166,19 @@ class AutoDebugAssistant:
             debugger_method = 'pdb'
             print("  ℹ️  ipdb 未安装，使用 pdb")
         
-        inserted = []
-        for line, title, reason in suggestions[:max_breakpoints]:
-            try:
-                manager.insert_breakpoint(line, debugger_method)
-                inserted.append(line)
+        # 一次事务插入所有断点：行号都指向原文件，只读写一次，原子替换
+        chosen = suggestions[:max_breakpoints]
+        try:
+            result = manager.insert_breakpoints([line for line, _, _ in chosen], debugger_method)
+        except Exception as e:
+            print(f"  ❌ 插入失败 - {e}")
+            return
+        inserted = list(result.inserted)
+        for line, title, reason in chosen:
+            if line in result.inserted:
                 print(f"  ✅ Line {line}: {title}")
-            except Exception as e:
-                print(f"  ⚠️  Line {line}: 插入失败 - {e}")
+            else:
+                print(f"  ⚠️  Line {line}: 已跳过 - {result.skipped.get(line, '未插入')}")
         
         if not inserted:
             print("  ❌ 没有成功插入任何断点")
@@ -93,10 +206,21 @@ class AutoDebugAssistant:
         
         print("\n✅ 自动调试完成！")
     
-    def quick_debug(self, line: int):
+    def quick_debug(self, line: int, runtime: bool = False, attach: str = None,
+                    attach_pid: int = None, max_hits: int = 1):
         """快速调试 - 在指定行插入断点并运行"""
         print(f"⚡ 快速调试: Line {line}\n")
         
+        if attach or attach_pid:
+            self.attach_debug([line], attach, attach_pid, max_hits)
+            print("✅ 完成！")
+            return
+        
+        if runtime:
+            self.run_with_runtime_breakpoints([line])
+            print("✅ 完成！")
+            return
+        
         # 检测可用的调试器
         try:
             import ipdb
@@ -132,6 +256,26 @@ Examples:
   
   # Auto debug with more breakpoints
   python auto_debug_assistant.py demo.py --max-breakpoints 5
+  
+  # Runtime breakpoints: the source file is never modified
+  python auto_debug_assistant.py demo.py --runtime
+  python auto_debug_assistant.py demo.py --quick 10 --runtime
+  
+  # Profile a run first, then break where the program is hot or fails
+  python auto_debug_assistant.py demo.py --rank-by-profile --runtime
+  python auto_debug_assistant.py demo.py --rank-by-profile --profile-data demo.profile.json
+  
+  # Performance: sampling profiler, collapsed-stack flamegraph + hot functions
+  python auto_debug_assistant.py demo.py --profile
+  python auto_debug_assistant.py demo.py --profile --profile-interval 1 --profile-clock wall --top 30
+  
+  # Attach to a running service (started via debug_agent.py) without restarting it
+  python auto_debug_assistant.py service.py --attach 5678 --max-hits 3
+  python auto_debug_assistant.py service.py --quick 120 --attach-pid 12345
+  
+  # Memory growth: periodic tracemalloc snapshots, top growing allocation sites, RSS over time
+  python auto_debug_assistant.py demo.py --memory
+  python auto_debug_assistant.py demo.py --memory --memory-interval 5 --memory-frames 10 --memory-output mem.json
         """
     )
     
@@ -142,6 +286,37 @@ Examples:
                        help='Maximum number of breakpoints to insert (default: 3)')
     parser.add_argument('--quick', type=int, metavar='LINE',
                        help='Quick debug at specific line')
+    parser.add_argument('--runtime', action='store_true',
+                       help='Use runtime breakpoints (sys.monitoring/settrace) instead of editing the source')
+    parser.add_argument('--attach', metavar='[HOST:]PORT',
+                       help='Attach to a running process with a debugpy agent instead of starting the script')
+    parser.add_argument('--attach-pid', type=int, metavar='PID',
+                       help='Inject debugpy into a running process and attach (needs ptrace permission)')
+    parser.add_argument('--max-hits', type=int, default=1,
+                       help='In attach mode, detach after this many breakpoint hits (default: 1)')
+    parser.add_argument('--rank-by-profile', action='store_true',
+                       help='Profile one run first and rank breakpoints by hot paths and failure location')
+    parser.add_argument('--profile-data', metavar='FILE',
+                       help='Profile file to reuse if it exists, otherwise where to save it '
+                            '(default: suggestion cache directory)')
+    parser.add_argument('--profile', action='store_true',
+                       help='Run under the sampling profiler instead of the debugger')
+    parser.add_argument('--profile-interval', type=float, default=5.0, metavar='MS',
+                       help='Sampling interval in milliseconds (default: 5)')
+    parser.add_argument('--profile-clock', choices=['cpu', 'wall'], default='cpu',
+                       help='Sample on CPU time or elapsed wall time (default: cpu)')
+    parser.add_argument('--profile-output', metavar='FILE',
+                       help='Collapsed-stack output file (default: <script>.folded)')
+    parser.add_argument('--memory', action='store_true',
+                       help='Run under tracemalloc and report memory growth instead of debugging')
+    parser.add_argument('--memory-interval', type=float, default=1.0, metavar='SECONDS',
+                       help='Seconds between memory snapshots (default: 1.0)')
+    parser.add_argument('--memory-frames', type=int, default=5,
+                       help='Stack frames kept per allocation (default: 5)')
+    parser.add_argument('--memory-output', metavar='FILE',
+                       help='Also write the memory report as JSON')
+    parser.add_argument('--top', type=int, default=None,
+                       help='Rows to show in --profile/--memory mode (default: 20 / 10)')
     
     args = parser.parse_args()
     
@@ -152,10 +327,18 @@ Examples:
     try:
         assistant = AutoDebugAssistant(args.script)
         
-        if args.quick:
-            assistant.quick_debug(args.quick)
+        if args.profile:
+            assistant.profile_performance(args.profile_interval, args.profile_output,
+                                          args.top or 20, args.profile_clock)
+        elif args.memory:
+            assistant.profile_memory(args.memory_interval, args.memory_frames,
+                                     args.top or 10, args.memory_output)
+        elif args.quick:
+            assistant.quick_debug(args.quick, args.runtime, args.attach, args.attach_pid, args.max_hits)
         else:
-            assistant.auto_debug(args.focus, args.max_breakpoints)
+            assistant.auto_debug(args.focus, args.max_breakpoints, args.runtime,
+                                 args.rank_by_profile, args.profile_data,
+                                 args.attach, args.attach_pid, args.max_hits)
         
         return 0
         
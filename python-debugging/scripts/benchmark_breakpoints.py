@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+条件断点开销基准 - 热循环中断点已布置但从不触发时的减速比
+"""
+import sys
+import os
+import time
+import tempfile
+import argparse
+import importlib.util
+from pathlib import Path
+
+# Add scripts directory to path for imports
+scripts_dir = Path(__file__).parent
+if str(scripts_dir) not in sys.path:
+    sys.path.insert(0, str(scripts_dir))
+
+from runtime_breakpoint import HAS_MONITORING, BreakpointTracer, RuntimeBreakpoint
+from logpoint import LogpointRecorder
+
+
+HOT_LOOP = '''
+def hot_loop(n):
+    total = 0
+    for i in range(n):
+{guard}        total += i
+    return total
+
+
+def cold_function():
+    return None
+'''
+# 断点所在行（total += i）
+BREAK_LINE = 5
+COLD_LINE = 10
+CONDITION = 'i < 0'
+
+
+def load_module(tmp_dir: str, name: str, guard: str = ''):
+    path = os.path.join(tmp_dir, f'{name}.py')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(HOT_LOOP.format(guard=guard))
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return path, module
+
+
+def never(frame, bp):
+    raise AssertionError(f"breakpoint unexpectedly fired at line {bp.line}")
+
+
+def best_of(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark armed-but-not-firing breakpoints in a tight loop',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python benchmark_breakpoints.py
+  python benchmark_breakpoints.py --iterations 5000000 --repeat 3
+        """
+    )
+    parser.add_argument('--iterations', type=int, default=1_000_000,
+                       help='Loop iterations per run (default: 1000000)')
+    parser.add_argument('--repeat', type=int, default=5,
+                       help='Repetitions per scenario, best is reported (default: 5)')
+    args = parser.parse_args()
+    n = args.iterations
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path, plain = load_module(tmp_dir, 'bench_plain')
+        # conditional_breakpoint.py 的源码注入方式：每次循环都执行 if 守卫
+        guard = f"        if {CONDITION}:\n            import pdb; pdb.set_trace()\n"
+        _, guarded = load_module(tmp_dir, 'bench_guarded', guard)
+
+        scenarios = [
+            ('no breakpoints', lambda: plain.hot_loop(n), None),
+            ('source-injected if guard', lambda: guarded.hot_loop(n), None),
+        ]
+        backends = (['monitoring'] if HAS_MONITORING else []) + ['settrace']
+        for backend in backends:
+            scenarios.append((f'{backend}: bp in cold function',
+                              lambda: plain.hot_loop(n),
+                              (backend, [RuntimeBreakpoint(path, COLD_LINE, action=never)])))
+            scenarios.append((f'{backend}: condition false',
+                              lambda: plain.hot_loop(n),
+                              (backend, [RuntimeBreakpoint(path, BREAK_LINE, action=never,
+                                                           condition=CONDITION)])))
+            scenarios.append((f'{backend}: every-Nth not reached',
+                              lambda: plain.hot_loop(n),
+                              (backend, [RuntimeBreakpoint(path, BREAK_LINE, action=never,
+                                                           every=n * args.repeat + 1)])))
+            scenarios.append((f'{backend}: hit-count passed',
+                              lambda: plain.hot_loop(n),
+                              (backend, [RuntimeBreakpoint(path, BREAK_LINE, hit_count=1,
+                                                           action=lambda frame, bp: None)])))
+            recorder = LogpointRecorder(capacity=100_000)
+            scenarios.append((f'{backend}: logpoint recording i',
+                              lambda: plain.hot_loop(n),
+                              (backend, [recorder.logpoint(path, BREAK_LINE, ['i'])])))
+
+        print(f"📊 Tight loop, {n:,} iterations, Python {sys.version.split()[0]}")
+        print(f"   {'':<38} {'time':>12}   {'vs none':>7}   {'vs if guard':>11}\n")
+        baseline = guard = None
+        for label, func, tracing in scenarios:
+            if tracing is None:
+                elapsed = best_of(func, args.repeat)
+            else:
+                backend, breakpoints = tracing
+                with BreakpointTracer(breakpoints, backend=backend):
+                    elapsed = best_of(func, args.repeat)
+            # 前两个场景依次是无断点基线和源码 if 守卫
+            if baseline is None:
+                baseline = elapsed
+            elif guard is None:
+                guard = elapsed
+            vs_guard = f"{elapsed / guard:10.2f}x" if guard else f"{'':>11}"
+            print(f"  {label:<38} {elapsed * 1000:9.1f} ms   {elapsed / baseline:6.2f}x   {vs_guard}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+断点建议性能基准 - 对比逐类别多次遍历与单次遍历引擎
+"""
+import sys
+import ast
+import time
+import argparse
+from pathlib import Path
+
+# Add scripts directory to path for imports
+scripts_dir = Path(__file__).parent
+if str(scripts_dir) not in sys.path:
+    sys.path.insert(0, str(scripts_dir))
+
+from smart_breakpoint_suggester import CATEGORIES, SuggestionVisitor
+
+
+FUNCTION_TEMPLATE = '''
+def handler_{idx}(items, limit=10):
+    """Process a batch of items."""
+    total = 0
+    result = []
+    for item in items:
+        if item is None:
+            continue
+        elif item > limit:
+            total += limit
+        else:
+            total += item
+        try:
+            value = int(item)
+        except (TypeError, ValueError):
+            value = 0
+        result.append(value)
+    while total > limit:
+        total -= limit
+    return total, result
+
+'''
+
+
+def generate_module(target_lines: int) -> str:
+    """生成指定行数左右的合成 Python 模块"""
+    block_lines = FUNCTION_TEMPLATE.count('\n')
+    blocks = max(1, target_lines // block_lines)
+    return ''.join(FUNCTION_TEMPLATE.format(idx=i) for i in range(blocks))
+
+
+def multi_pass(tree: ast.Module, names: list) -> list:
+    """旧实现的代价模型：每个类别完整遍历一次 AST"""
+    collected = []
+    for name in names:
+        for node in ast.walk(tree):
+            if isinstance(node, CATEGORIES[name].node_types):
+                collected.extend(CATEGORIES[name].analyze(node))
+    seen_lines = set()
+    unique = []
+    for line, title, reason in sorted(collected, key=lambda x: x[0]):
+        if line not in seen_lines:
+            seen_lines.add(line)
+            unique.append((line, title, reason))
+    return unique
+
+
+def single_pass(tree: ast.Module, names: list) -> list:
+    return SuggestionVisitor([CATEGORIES[name] for name in names]).run(tree)
+
+
+def best_of(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark breakpoint suggestion: multi-pass vs single-pass AST traversal',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # 20k-line synthetic module (default)
+  python benchmark_suggester.py
+
+  # Benchmark a real file
+  python benchmark_suggester.py --file big_module.py --repeat 10
+        """
+    )
+    parser.add_argument('--lines', type=int, default=20000,
+                       help='Size of the synthetic module in lines (default: 20000)')
+    parser.add_argument('--file', help='Benchmark an existing Python file instead')
+    parser.add_argument('--repeat', type=int, default=5,
+                       help='Repetitions per measurement, best is reported (default: 5)')
+    args = parser.parse_args()
+
+    if args.file:
+        source = Path(args.file).read_text(encoding='utf-8')
+        label = args.file
+    else:
+        source = generate_module(args.lines)
+        label = 'synthetic module'
+
+    names = list(CATEGORIES)
+    parse_time = best_of(lambda: ast.parse(source), args.repeat)
+    tree = ast.parse(source)
+
+    old = multi_pass(tree, names)
+    new = single_pass(tree, names)
+    if old != new:
+        print("❌ Single-pass results differ from multi-pass results")
+        return 1
+
+    old_time = best_of(lambda: multi_pass(tree, names), args.repeat)
+    new_time = best_of(lambda: single_pass(tree, names), args.repeat)
+
+    print(f"📊 {label}: {source.count(chr(10))} lines, {len(new)} suggestions, {len(names)} categories")
+    print(f"  parse:        {parse_time * 1000:8.1f} ms")
+    print(f"  multi-pass:   {old_time * 1000:8.1f} ms")
+    print(f"  single-pass:  {new_time * 1000:8.1f} ms")
+    print(f"  speedup:      {old_time / new_time:8.2f}x (analysis only)")
+    print(f"  end-to-end:   {(parse_time + old_time) / (parse_time + new_time):8.2f}x (parse + analysis)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
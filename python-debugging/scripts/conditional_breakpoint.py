@@ -6,9 +6,13 @@ import sys
 import os
 import ast
 import argparse
+import subprocess
 from pathlib import Path
 from typing import Optional
 
+# runtime_breakpoint.py（--runtime 模式）与本脚本在同一目录
+scripts_dir = Path(__file__).parent
+
 
 class ConditionalBreakpointManager:
     """条件断点管理器"""
@@ -120,6 +124,10 @@ Examples:
   
   # List all conditional breakpoints
   python conditional_breakpoint.py demo.py --list
+  
+  # Runtime mode: run the script with a compiled condition, source untouched
+  # (pdb only; the line runs ~15-25x slower than with an inserted if guard)
+  python conditional_breakpoint.py demo.py --line 20 --condition "i > 10" --runtime --every 5
         """
     )
     
@@ -130,8 +138,17 @@ Examples:
                        default='pdb', help='Debugger method')
     parser.add_argument('--list', action='store_true',
                        help='List all conditional breakpoints')
+    parser.add_argument('--runtime', action='store_true',
+                       help='Run the script under pdb with a runtime conditional breakpoint instead of '
+                            'editing it (no cleanup, but the line runs ~15-25x slower than with an if guard)')
+    parser.add_argument('--hit-count', type=int, metavar='N',
+                       help='Runtime mode: only stop on the Nth time the condition holds')
+    parser.add_argument('--every', type=int, metavar='N',
+                       help='Runtime mode: only stop on every Nth time the condition holds')
     
     args = parser.parse_args()
+    if args.runtime and args.method != 'pdb':
+        parser.error('--runtime always stops in pdb; --method ipdb/debugpy needs the inserted breakpoint')
     
     if not os.path.exists(args.file):
         print(f"❌ Error: File not found: {args.file}")
@@ -154,6 +171,17 @@ Examples:
             parser.print_help()
             return 1
         
+        if args.runtime:
+            if not manager.validate_condition(args.condition):
+                raise ValueError(f"Invalid condition: {args.condition}")
+            cmd = [sys.executable, str(scripts_dir / 'runtime_breakpoint.py'), args.file,
+                   '--break', f"{args.line}, {args.condition}"]
+            if args.hit_count:
+                cmd += ['--hit-count', str(args.hit_count)]
+            if args.every:
+                cmd += ['--every', str(args.every)]
+            return subprocess.run(cmd).returncode
+        
         manager.insert_conditional_breakpoint(args.line, args.condition, args.method)
         return 0
         
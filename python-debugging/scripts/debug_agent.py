@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+调试代理 - 让长时间运行的进程随时可以被附加调试，而不需要重启
+
+启动时只调用一次 debugpy.listen()，之后进程照常运行；需要调试时用 remote_attach.py
+（或 VS Code）连接端口、动态下断点，调试结束断开后断点被清除，进程继续运行。
+
+使用方法:
+    # 以代理方式启动服务
+    python debug_agent.py --port 5678 service.py -- --config prod.yaml
+
+    # 或在服务代码中启用
+    import debug_agent; debug_agent.start_agent(port=5678)
+
+    # 或设置环境变量，由 start_agent_from_env() 启用（例如放在 sitecustomize.py 中）
+    PYTHON_DEBUG_AGENT=127.0.0.1:5678 python service.py
+"""
+import sys
+import os
+import argparse
+from pathlib import Path
+from typing import Optional, Tuple
+
+# Add scripts directory to path for imports
+scripts_dir = Path(__file__).parent
+if str(scripts_dir) not in sys.path:
+    sys.path.insert(0, str(scripts_dir))
+
+from runtime_breakpoint import run_script
+
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 5678
+AGENT_ENV = 'PYTHON_DEBUG_AGENT'
+
+
+def parse_address(address: str, default_host: str = DEFAULT_HOST) -> Tuple[str, int]:
+    """解析 "HOST:PORT" 或 "PORT" """
+    host, sep, port = address.rpartition(':')
+    try:
+        return (host if sep and host else default_host), int(port)
+    except ValueError:
+        raise ValueError(f"Invalid address: {address} (expected [HOST:]PORT)")
+
+
+def start_agent(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                wait: bool = False) -> Tuple[str, int]:
+    """在当前进程中启动 debugpy 监听，返回实际监听的地址
+
+    只监听本机地址；监听其他地址等于把任意代码执行暴露在网络上。
+    """
+    try:
+        import debugpy
+    except ImportError:
+        raise RuntimeError("debugpy is not installed. Install it with: pip install debugpy")
+    address = debugpy.listen((host, port))
+    print(f"🔌 Debug agent listening on {address[0]}:{address[1]} (pid {os.getpid()})", file=sys.stderr)
+    if wait:
+        print("⏳ Waiting for a debugger to attach...", file=sys.stderr)
+        debugpy.wait_for_client()
+    return address
+
+
+def start_agent_from_env() -> Optional[Tuple[str, int]]:
+    """环境变量 PYTHON_DEBUG_AGENT=[HOST:]PORT 存在时启动代理"""
+    address = os.environ.get(AGENT_ENV)
+    if not address:
+        return None
+    host, port = parse_address(address)
+    return start_agent(host, port)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Run a script with a debugpy agent so debuggers can attach later without a restart',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Start a service with the agent on port 5678
+  python debug_agent.py --port 5678 service.py -- --config prod.yaml
+
+  # Later, from another terminal: set breakpoints in the running process
+  python remote_attach.py --connect 5678 --break service.py:120
+
+  # Processes started without the agent can be attached by pid instead
+  python remote_attach.py --pid 12345 --break service.py:120
+        """
+    )
+    parser.add_argument('script', help='Python script to run')
+    parser.add_argument('--host', default=DEFAULT_HOST,
+                       help=f'Address to listen on (default: {DEFAULT_HOST})')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                       help=f'Port to listen on (default: {DEFAULT_PORT}, 0 picks a free port)')
+    parser.add_argument('--wait', action='store_true',
+                       help='Wait for a debugger to attach before running the script')
+
+    # `--` 之后的参数原样传给脚本
+    argv = sys.argv[1:]
+    script_args = []
+    if '--' in argv:
+        split = argv.index('--')
+        argv, script_args = argv[:split], argv[split + 1:]
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.script):
+        print(f"❌ Error: Script not found: {args.script}")
+        return 1
+
+    try:
+        start_agent(args.host, args.port, args.wait)
+    except (RuntimeError, OSError) as e:
+        print(f"❌ Error: {e}")
+        return 1
+
+    try:
+        run_script(args.script, script_args)
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
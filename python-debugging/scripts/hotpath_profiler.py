@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+热点分析工具 - 先跑一遍程序收集执行数据，再按实际热点/失败位置给断点建议排序
+
+收集内容:
+  - 函数级：cProfile 的调用次数、自身耗时、累计耗时
+  - 行级：目标文件每一行的执行次数（3.12+ 用 sys.monitoring，只监控目标文件）
+  - 失败：未捕获异常的 traceback 位置
+
+使用方法:
+    python hotpath_profiler.py <script.py> --save-profile profile.json
+    python smart_breakpoint_suggester.py <script.py> --rank-profile profile.json
+"""
+import sys
+import os
+import ast
+import json
+import time
+import cProfile
+import pstats
+import argparse
+import threading
+import traceback
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import CodeType
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Add scripts directory to path for imports
+scripts_dir = Path(__file__).parent
+if str(scripts_dir) not in sys.path:
+    sys.path.insert(0, str(scripts_dir))
+
+from runtime_breakpoint import HAS_MONITORING, run_script
+
+
+PROFILE_FORMAT_VERSION = 1
+
+
+@dataclass
+class ExecutionProfile:
+    """一次运行的执行数据，可保存为 JSON 复用"""
+    script: str
+    wall_time: float = 0.0
+    # "file:firstlineno:name" -> {'calls', 'tottime', 'cumtime'}
+    functions: Dict[str, dict] = field(default_factory=dict)
+    # "file:line" -> 执行次数
+    lines: Dict[str, int] = field(default_factory=dict)
+    # 未捕获异常的 traceback，"file:line" 由外到内
+    failure: Optional[List[str]] = None
+    error: Optional[str] = None
+
+    def save(self, path: str):
+        data = {'version': PROFILE_FORMAT_VERSION, **self.__dict__}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+
+    @classmethod
+    def load(cls, path: str) -> 'ExecutionProfile':
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.pop('version', None) != PROFILE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported profile format: {path}")
+        return cls(**data)
+
+
+class LineCounter:
+    """统计指定文件中每一行的执行次数，其他文件的代码不受影响"""
+
+    TOOL_NAME = 'python-debugging-line-counter'
+
+    def __init__(self, files: Iterable[str]):
+        self.files = {os.path.realpath(f) for f in files}
+        self.counts: Counter = Counter()
+        self._realpaths: Dict[str, str] = {}
+        self._tool_id: Optional[int] = None
+
+    def _wanted(self, filename: str) -> bool:
+        path = self._realpaths.get(filename)
+        if path is None:
+            path = os.path.realpath(filename) if not filename.startswith('<') else filename
+            self._realpaths[filename] = path
+        return path in self.files
+
+    def _on_py_start(self, code: CodeType, instruction_offset: int):
+        if self._wanted(code.co_filename):
+            sys.monitoring.set_local_events(self._tool_id, code, sys.monitoring.events.LINE)
+        return sys.monitoring.DISABLE
+
+    def _on_line(self, code: CodeType, line: int):
+        self.counts[(code.co_filename, line)] += 1
+
+    def _global_trace(self, frame, event, arg):
+        if event == 'call' and self._wanted(frame.f_code.co_filename):
+            return self._local_trace
+        return None
+
+    def _local_trace(self, frame, event, arg):
+        if event == 'line':
+            self.counts[(frame.f_code.co_filename, frame.f_lineno)] += 1
+        return self._local_trace
+
+    def start(self):
+        if HAS_MONITORING:
+            monitoring = sys.monitoring
+            # DEBUGGER_ID 留给断点引擎，PROFILER_ID 留给 cProfile
+            for tool_id in (3, 4, 5, 1):
+                try:
+                    monitoring.use_tool_id(tool_id, self.TOOL_NAME)
+                except ValueError:
+                    continue
+                self._tool_id = tool_id
+                break
+            else:
+                raise RuntimeError("No free sys.monitoring tool id")
+            events = monitoring.events
+            monitoring.register_callback(self._tool_id, events.PY_START, self._on_py_start)
+            monitoring.register_callback(self._tool_id, events.LINE, self._on_line)
+            monitoring.set_events(self._tool_id, events.PY_START)
+            monitoring.restart_events()
+        else:
+            threading.settrace(self._global_trace)
+            sys.settrace(self._global_trace)
+
+    def stop(self):
+        if self._tool_id is not None:
+            monitoring = sys.monitoring
+            monitoring.set_events(self._tool_id, 0)
+            monitoring.register_callback(self._tool_id, monitoring.events.PY_START, None)
+            monitoring.register_callback(self._tool_id, monitoring.events.LINE, None)
+            monitoring.free_tool_id(self._tool_id)
+            self._tool_id = None
+        else:
+            sys.settrace(None)
+            threading.settrace(None)
+
+
+def collect_profile(script_path: str, script_args: List[str] = (),
+                    line_files: Optional[Iterable[str]] = None,
+                    count_lines: bool = True) -> ExecutionProfile:
+    """运行脚本并收集执行数据；脚本抛出的异常会被记录而不是向上传播"""
+    script_path = os.path.realpath(script_path)
+    profile = ExecutionProfile(script=script_path)
+    counter = LineCounter(line_files or [script_path]) if count_lines else None
+    profiler = cProfile.Profile()
+
+    error = None
+    start = time.perf_counter()
+    if counter:
+        counter.start()
+    profiler.enable()
+    try:
+        run_script(script_path, list(script_args))
+    except BaseException as e:
+        error = e
+    finally:
+        profiler.disable()
+        if counter:
+            counter.stop()
+    profile.wall_time = time.perf_counter() - start
+
+    if isinstance(error, SystemExit):
+        if error.code not in (None, 0):
+            profile.error = f"SystemExit: {error.code}"
+    elif error is not None:
+        profile.error = f"{type(error).__name__}: {error}"
+        profile.failure = [f"{os.path.realpath(fs.filename)}:{fs.lineno}"
+                           for fs in traceback.extract_tb(error.__traceback__)
+                           if not fs.filename.startswith('<')
+                           and Path(fs.filename).resolve().parent != scripts_dir.resolve()]
+
+    for (filename, lineno, name), (_, ncalls, tottime, cumtime, _) in pstats.Stats(profiler).stats.items():
+        if filename.startswith('~') or filename.startswith('<'):
+            continue
+        profile.functions[f"{os.path.realpath(filename)}:{lineno}:{name}"] = {
+            'calls': ncalls, 'tottime': tottime, 'cumtime': cumtime,
+        }
+    if counter:
+        for (filename, line), count in counter.counts.items():
+            profile.lines[f"{os.path.realpath(filename)}:{line}"] = count
+    return profile
+
+
+def _function_ranges(tree: ast.AST) -> List[Tuple[int, int, int, str]]:
+    """[(装饰器起始行, def 行, 结束行, 函数名)]，按起始行排序"""
+    ranges = []
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            start = min([d.lineno for d in node.decorator_list] + [node.lineno])
+            ranges.append((start, node.lineno, node.end_lineno or node.lineno, node.name))
+    return sorted(ranges)
+
+
+def rank_suggestions(suggestions: List[Tuple[int, str, str]], profile: ExecutionProfile,
+                     file_path: str) -> List[Tuple[int, str, str]]:
+    """按执行数据给断点建议重新排序
+
+    分数 = 该行执行次数占比 + 所在函数累计耗时占比；失败位置（traceback 中的行）排在最前，
+    失败路径上的函数次之。没有执行过的行保持原有顺序排在最后。
+    """
+    file_path = os.path.realpath(file_path)
+    with open(file_path, 'rb') as f:
+        ranges = _function_ranges(ast.parse(f.read(), filename=file_path))
+
+    func_stats = {}
+    for key, stats in profile.functions.items():
+        filename, lineno, name = key.rsplit(':', 2)
+        if filename == file_path:
+            func_stats[(int(lineno), name)] = stats
+    total_lines = sum(count for key, count in profile.lines.items()
+                      if key.rsplit(':', 1)[0] == file_path) or 1
+    total_time = profile.wall_time or 1.0
+    failure_lines = {int(key.rsplit(':', 1)[1]) for key in profile.failure or []
+                     if key.rsplit(':', 1)[0] == file_path}
+
+    def enclosing_function(line: int):
+        best = None
+        for start, def_line, end, name in ranges:
+            if start <= line <= end:
+                best = (start, def_line, end, name)
+        return best
+
+    scored = []
+    for index, (line, title, reason) in enumerate(suggestions):
+        count = profile.lines.get(f"{file_path}:{line}", 0)
+        score = count / total_lines
+        notes = []
+        func = enclosing_function(line)
+        if func:
+            start, def_line, end, name = func
+            stats = func_stats.get((start, name)) or func_stats.get((def_line, name))
+            if stats:
+                score += stats['cumtime'] / total_time
+                notes.append(f"{stats['cumtime'] * 1000:.1f} ms in {name}()")
+            if any(start <= failed <= end for failed in failure_lines):
+                score += 10
+                notes.append("on failure path")
+        if line in failure_lines:
+            score += 100
+            notes.append("raised here")
+        if count:
+            notes.insert(0, f"{count:,} hits")
+        if notes:
+            reason = f"{reason} [🔥 {', '.join(notes)}]"
+        scored.append((-score, index, (line, title, reason)))
+    scored.sort(key=lambda x: (x[0], x[1]))
+    return [item[2] for item in scored]
+
+
+def print_profile(profile: ExecutionProfile, top: int = 10):
+    """打印热点函数和热点行"""
+    print(f"⏱️  Wall time: {profile.wall_time * 1000:.1f} ms")
+    if profile.error:
+        print(f"💥 Failed: {profile.error}")
+        for location in (profile.failure or [])[-3:]:
+            print(f"    at {location}")
+
+    functions = sorted(profile.functions.items(), key=lambda x: -x[1]['tottime'])[:top]
+    if functions:
+        print(f"\n🔥 Top {len(functions)} functions by self time:")
+        for key, stats in functions:
+            filename, lineno, name = key.rsplit(':', 2)
+            print(f"  {stats['tottime'] * 1000:9.2f} ms self {stats['cumtime'] * 1000:9.2f} ms cum "
+                  f"{stats['calls']:>9,} calls  {name} ({os.path.basename(filename)}:{lineno})")
+
+    lines = sorted(profile.lines.items(), key=lambda x: -x[1])[:top]
+    if lines:
+        print(f"\n📈 Top {len(lines)} lines by execution count:")
+        for key, count in lines:
+            filename, line = key.rsplit(':', 1)
+            print(f"  {count:>12,}  {os.path.basename(filename)}:{line}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Profile a script run to find hot paths and failure locations for breakpoint ranking',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Profile and save for later ranking
+  python hotpath_profiler.py demo.py --save-profile profile.json
+
+  # Count lines in extra modules, pass arguments to the script
+  python hotpath_profiler.py demo.py --line-files pkg/core.py -- --input data.csv
+
+  # Re-rank suggestions with a saved profile
+  python smart_breakpoint_suggester.py demo.py --rank-profile profile.json
+        """
+    )
+    parser.add_argument('script', help='Python script to run')
+    parser.add_argument('--save-profile', metavar='FILE', help='Save the profile as JSON')
+    parser.add_argument('--line-files', nargs='+', default=[],
+                       help='Additional files to count line executions in (default: the script only)')
+    parser.add_argument('--no-lines', action='store_true',
+                       help='Skip per-line counts (function-level cProfile data only)')
+    parser.add_argument('--top', type=int, default=10,
+                       help='Number of hot functions/lines to show (default: 10)')
+
+    # `--` 之后的参数原样传给脚本
+    argv = sys.argv[1:]
+    script_args = []
+    if '--' in argv:
+        split = argv.index('--')
+        argv, script_args = argv[:split], argv[split + 1:]
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.script):
+        print(f"❌ Error: Script not found: {args.script}")
+        return 1
+
+    profile = collect_profile(args.script, script_args,
+                              line_files=[args.script] + args.line_files,
+                              count_lines=not args.no_lines)
+    print()
+    print_profile(profile, args.top)
+    if args.save_profile:
+        profile.save(args.save_profile)
+        print(f"\n💾 Profile saved to {args.save_profile}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -10,25 +10,155 @@
 """
 import sys
 import os
+import ast
 import argparse
 import re
+import tempfile
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# 本工具插入的断点都带有这个标记；只有"语句 + 标记"独占一行时才算受管理的断点，
+# 用户自己写的 pdb/ipdb 调用和条件断点不会被识别或清理
+BREAKPOINT_MARKER = '# AI breakpoint'
+BREAKPOINT_STATEMENTS = {
+    'pdb': 'import pdb; pdb.set_trace()',
+    'ipdb': 'import ipdb; ipdb.set_trace()',
+    'debugpy': 'import debugpy; debugpy.breakpoint()',
+}
+_MANAGED_LINES = {f'{statement}  {BREAKPOINT_MARKER}': method
+                  for method, statement in BREAKPOINT_STATEMENTS.items()}
+_MANAGED_LINE_RE = re.compile(
+    r'^[ \t]*(' + '|'.join(re.escape(text) for text in _MANAGED_LINES) + r')[ \t]*\r?$',
+    re.MULTILINE)
+
+
+def index_breakpoints(source: str) -> Dict[int, str]:
+    """一次扫描建立受管理断点的索引 {行号: 调试器}
+
+    正则（C 实现）先找出整行完全匹配的候选行；有候选时再用 AST 确认该行确实是一条
+    import 语句，排除恰好出现在多行字符串里的同样文本。没有断点的文件只付出一次正则扫描。
+    """
+    candidates = {}
+    line_num, pos = 1, 0
+    for match in _MANAGED_LINE_RE.finditer(source):
+        line_num += source.count('\n', pos, match.start())
+        pos = match.start()
+        candidates[line_num] = _MANAGED_LINES[match.group(1)]
+    if not candidates:
+        return candidates
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        # 无法解析（例如正在编辑中的文件）时退回到整行匹配的结果
+        return candidates
+    import_lines = {node.lineno for node in ast.walk(tree) if isinstance(node, ast.Import)}
+    return {line: method for line, method in candidates.items() if line in import_lines}
+
+
+@dataclass
+class BatchResult:
+    """一次批量编辑的结果；行号均为 1-based"""
+    # 原始行号 -> 提交后该行（断点之后的语句）所在的新行号
+    inserted: Dict[int, int] = field(default_factory=dict)
+    # 被移除的断点的原始行号
+    removed: List[int] = field(default_factory=list)
+    # 原始行号 -> 跳过原因（例如该行已经是断点）
+    skipped: Dict[int, str] = field(default_factory=dict)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.inserted or self.removed)
+
+
+class BreakpointBatch:
+    """断点批量编辑事务
+
+    所有行号都指向开始事务时的原始文件，插入互相之间不会造成行号偏移。
+    commit() 只读写一次文件，并通过临时文件 + rename 原子替换；
+    作为上下文管理器使用时，正常退出自动提交，发生异常则什么都不写。
+    """
+
+    def __init__(self, manager: 'BreakpointManager'):
+        self.manager = manager
+        self._inserts: Dict[int, str] = {}
+        self._removes: set = set()
+        self.result: Optional[BatchResult] = None
+
+    def insert(self, line_num: int, method: str = 'ipdb') -> 'BreakpointBatch':
+        """在原始文件第 line_num 行之前插入断点"""
+        if method not in self.manager.BREAKPOINT_MARKERS:
+            raise ValueError(f"Unknown method: {method}. "
+                             f"Choose from: {list(self.manager.BREAKPOINT_MARKERS.keys())}")
+        self._inserts[line_num] = method
+        return self
+
+    def remove(self, line_num: int) -> 'BreakpointBatch':
+        """移除原始文件第 line_num 行的断点"""
+        self._removes.add(line_num)
+        return self
+
+    def commit(self) -> BatchResult:
+        """一次性应用所有编辑；任何行号无效时抛出 ValueError，文件保持不变"""
+        manager = self.manager
+        lines = manager.read_file()
+        total = len(lines)
+        for line_num in sorted(set(self._inserts) | self._removes):
+            if line_num < 1 or line_num > total:
+                raise ValueError(f"Line number {line_num} is out of range (1-{total})")
+        conflicts = set(self._inserts) & self._removes
+        if conflicts:
+            raise ValueError(f"Cannot insert before and remove the same line: {sorted(conflicts)}")
+
+        existing = index_breakpoints(''.join(lines))
+        result = BatchResult()
+        output = []
+        for line_num, line in enumerate(lines, 1):
+            if line_num in self._removes:
+                if line_num in existing:
+                    result.removed.append(line_num)
+                    continue
+                result.skipped[line_num] = 'no breakpoint'
+            method = self._inserts.get(line_num)
+            if method is not None:
+                if line_num in existing:
+                    result.skipped[line_num] = 'breakpoint already exists'
+                else:
+                    # 只取空格/制表符，空行的换行符不能算作缩进
+                    leading_whitespace = len(line) - len(line.lstrip(' \t'))
+                    output.append(line[:leading_whitespace] + manager.BREAKPOINT_MARKERS[method] + '\n')
+                    result.inserted[line_num] = len(output) + 1
+            output.append(line)
+
+        if result.changed:
+            manager.write_file(output)
+        self._inserts.clear()
+        self._removes.clear()
+        self.result = result
+        return result
+
+    def __enter__(self) -> 'BreakpointBatch':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        return False
 
 
 class BreakpointManager:
     """断点管理器"""
     
-    BREAKPOINT_MARKERS = {
-        'pdb': 'import pdb; pdb.set_trace()  # AI breakpoint',
-        'ipdb': 'import ipdb; ipdb.set_trace()  # AI breakpoint',
-        'debugpy': 'import debugpy; debugpy.breakpoint()  # AI breakpoint',
-    }
+    BREAKPOINT_MARKERS = {method: f'{statement}  {BREAKPOINT_MARKER}'
+                          for method, statement in BREAKPOINT_STATEMENTS.items()}
     
     def __init__(self, file_path: str):
         self.file_path = Path(file_path)
         if not self.file_path.exists():
             raise FileNotFoundError(f"File not found: {file_path}")
+        # (mtime_ns, size) -> 索引；文件未变化时重复查询不会重新扫描
+        self._index_cache: Optional[Tuple[Tuple[int, int], Dict[int, str]]] = None
     
     def read_file(self) -> list[str]:
         """读取文件内容"""
@@ -36,122 +166,96 @@ class BreakpointManager:
             return f.readlines()
     
     def write_file(self, lines: list[str]):
-        """写入文件内容"""
-        with open(self.file_path, 'w', encoding='utf-8') as f:
-            f.writelines(lines)
+        """原子写入文件内容：先写同目录临时文件，再 rename 覆盖，中途崩溃不会留下半个文件"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.file_path.parent,
+                                        prefix=f'.{self.file_path.name}.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.writelines(lines)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_path, self.file_path.stat().st_mode & 0o7777)
+            os.replace(tmp_path, self.file_path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+    
+    def batch(self) -> BreakpointBatch:
+        """开始一个批量编辑事务（见 BreakpointBatch）"""
+        return BreakpointBatch(self)
+    
+    def insert_breakpoints(self, line_nums: Iterable[int], method: str = 'ipdb') -> BatchResult:
+        """一次插入多个断点（行号都指向当前文件），只读写文件一次"""
+        batch = self.batch()
+        for line_num in line_nums:
+            batch.insert(line_num, method)
+        return batch.commit()
     
     def has_breakpoint_at_line(self, lines: list[str], line_num: int) -> bool:
-        """检查指定行是否有断点"""
+        """检查指定行是否是本工具插入的断点"""
         # 转换为 0-based 索引
         idx = line_num - 1
         if idx < 0 or idx >= len(lines):
             return False
         
-        line = lines[idx]
-        # 检查是否有断点标记
-        markers = [
-            'pdb.set_trace()',
-            'ipdb.set_trace()',
-            'debugpy.breakpoint()',
-        ]
-        return any(marker in line for marker in markers)
+        return _MANAGED_LINE_RE.match(lines[idx]) is not None
+    
+    def breakpoint_index(self) -> Dict[int, str]:
+        """当前文件中受管理断点的索引 {行号: 调试器}"""
+        stat = self.file_path.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if self._index_cache is None or self._index_cache[0] != signature:
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                self._index_cache = (signature, index_breakpoints(f.read()))
+        return self._index_cache[1]
     
     def insert_breakpoint(self, line_num: int, method: str = 'ipdb') -> bool:
         """在指定行插入断点"""
-        if method not in self.BREAKPOINT_MARKERS:
-            raise ValueError(f"Unknown method: {method}. Choose from: {list(self.BREAKPOINT_MARKERS.keys())}")
+        result = self.batch().insert(line_num, method).commit()
         
-        lines = self.read_file()
-        
-        # 转换为 0-based 索引
-        idx = line_num - 1
-        if idx < 0 or idx >= len(lines):
-            raise ValueError(f"Line number {line_num} is out of range (1-{len(lines)})")
-        
-        # 检查是否已有断点
-        if self.has_breakpoint_at_line(lines, line_num):
+        if line_num in result.skipped:
             print(f"⚠️  Breakpoint already exists at line {line_num}")
             return False
         
-        # 获取当前行的缩进
-        current_line = lines[idx]
-        leading_whitespace = len(current_line) - len(current_line.lstrip())
-        indent = current_line[:leading_whitespace]
-        
-        # 创建断点语句
-        breakpoint_line = indent + self.BREAKPOINT_MARKERS[method] + '\n'
-        
-        # 在指定行之前插入断点
-        lines.insert(idx, breakpoint_line)
-        
-        # 写回文件
-        self.write_file(lines)
-        
-        print(f"✅ Inserted {method} breakpoint at line {line_num} (now line {idx + 1})")
+        print(_inserted_message(method, line_num, result.inserted[line_num]))
         return True
     
     def remove_breakpoint(self, line_num: int) -> bool:
         """移除指定行的断点"""
-        lines = self.read_file()
-        
-        # 转换为 0-based 索引
-        idx = line_num - 1
-        if idx < 0 or idx >= len(lines):
-            raise ValueError(f"Line number {line_num} is out of range (1-{len(lines)})")
+        result = self.batch().remove(line_num).commit()
         
-        # 检查是否有断点
-        if not self.has_breakpoint_at_line(lines, line_num):
+        if line_num in result.skipped:
             print(f"⚠️  No breakpoint found at line {line_num}")
             return False
         
-        # 移除断点行
-        lines.pop(idx)
-        
-        # 写回文件
-        self.write_file(lines)
-        
         print(f"✅ Removed breakpoint at line {line_num}")
         return True
     
     def list_breakpoints(self) -> list[tuple[int, str]]:
         """列出所有断点"""
-        lines = self.read_file()
-        breakpoints = []
-        
-        for i, line in enumerate(lines, 1):
-            if 'pdb.set_trace()' in line:
-                breakpoints.append((i, 'pdb'))
-            elif 'ipdb.set_trace()' in line:
-                breakpoints.append((i, 'ipdb'))
-            elif 'debugpy.breakpoint()' in line:
-                breakpoints.append((i, 'debugpy'))
-        
-        return breakpoints
+        return sorted(self.breakpoint_index().items())
     
     def remove_all_breakpoints(self) -> int:
-        """移除所有断点"""
+        """移除所有断点（只移除本工具插入的断点），文件只读一次"""
         lines = self.read_file()
-        original_count = len(lines)
-        
-        # 过滤掉包含断点的行
-        filtered_lines = [
-            line for line in lines
-            if not any(marker in line for marker in [
-                'pdb.set_trace()',
-                'ipdb.set_trace()',
-                'debugpy.breakpoint()',
-            ])
-        ]
-        
-        removed_count = original_count - len(filtered_lines)
+        index = index_breakpoints(''.join(lines))
         
-        if removed_count > 0:
-            self.write_file(filtered_lines)
-            print(f"✅ Removed {removed_count} breakpoint(s)")
+        if index:
+            self.write_file([line for line_num, line in enumerate(lines, 1) if line_num not in index])
+            print(f"✅ Removed {len(index)} breakpoint(s)")
         else:
             print("ℹ️  No breakpoints found")
         
-        return removed_count
+        return len(index)
+
+
+def _inserted_message(method: str, line_num: int, new_line: int) -> str:
+    """插入结果的提示：断点的实际行号，以及原来那条语句下移后的行号"""
+    return (f"✅ Inserted {method} breakpoint at line {new_line - 1} "
+            f"(the statement from line {line_num} is now line {new_line})")
 
 
 def main():
@@ -169,16 +273,26 @@ Examples:
   # Remove breakpoint at line 10
   python insert_breakpoint.py my_script.py --line 10 --remove
   
+  # Several breakpoints in one atomic edit (line numbers refer to the current file)
+  python insert_breakpoint.py my_script.py --line 10 25 40 --method pdb
+  
   # List all breakpoints
   python insert_breakpoint.py my_script.py --list
   
   # Remove all breakpoints
   python insert_breakpoint.py my_script.py --remove-all
+  
+  # List / clean up across many files
+  python insert_breakpoint.py src/*.py --list
+  python insert_breakpoint.py src/*.py --remove-all
         """
     )
     
-    parser.add_argument('file', help='Python file to modify')
-    parser.add_argument('--line', type=int, help='Line number to insert/remove breakpoint (1-based)')
+    parser.add_argument('files', nargs='+', metavar='file',
+                       help='Python file to modify (--list/--remove-all accept several files)')
+    parser.add_argument('--line', type=int, nargs='+',
+                       help='Line number(s) to insert/remove breakpoints (1-based); '
+                            'several lines are applied in one atomic edit')
     parser.add_argument('--method', choices=['pdb', 'ipdb', 'debugpy'],
                        default='ipdb', help='Debugger method (default: ipdb)')
     parser.add_argument('--remove', action='store_true',
@@ -190,39 +304,69 @@ Examples:
     
     args = parser.parse_args()
     
-    if not os.path.exists(args.file):
-        print(f"❌ Error: File not found: {args.file}")
-        return 1
+    for file_path in args.files:
+        if not os.path.exists(file_path):
+            print(f"❌ Error: File not found: {file_path}")
+            return 1
     
     try:
-        manager = BreakpointManager(args.file)
-        
-        if args.list:
-            # 列出所有断点
-            breakpoints = manager.list_breakpoints()
-            if breakpoints:
-                print(f"📍 Found {len(breakpoints)} breakpoint(s):")
-                for line_num, method in breakpoints:
-                    print(f"  Line {line_num}: {method}")
-            else:
-                print("ℹ️  No breakpoints found")
+        if args.list or args.remove_all:
+            # 每个文件只扫描一次；多个文件时逐个报告
+            total = 0
+            for file_path in args.files:
+                manager = BreakpointManager(file_path)
+                if len(args.files) > 1:
+                    print(f"📄 {file_path}")
+                if args.remove_all:
+                    # 移除所有断点
+                    total += manager.remove_all_breakpoints()
+                    continue
+                # 列出所有断点
+                breakpoints = manager.list_breakpoints()
+                total += len(breakpoints)
+                if breakpoints:
+                    print(f"📍 Found {len(breakpoints)} breakpoint(s):")
+                    for line_num, method in breakpoints:
+                        print(f"  Line {line_num}: {method}")
+                else:
+                    print("ℹ️  No breakpoints found")
+            if len(args.files) > 1:
+                action = 'removed' if args.remove_all else 'found'
+                print(f"\n📊 {total} breakpoint(s) {action} in {len(args.files)} file(s)")
             return 0
         
-        if args.remove_all:
-            # 移除所有断点
-            removed = manager.remove_all_breakpoints()
-            return 0
+        if len(args.files) > 1:
+            print("❌ Error: --line works on a single file")
+            return 1
+        manager = BreakpointManager(args.files[0])
         
         if args.line is None:
             parser.print_help()
             return 1
         
-        if args.remove:
-            # 移除断点
-            manager.remove_breakpoint(args.line)
-        else:
-            # 插入断点
-            manager.insert_breakpoint(args.line, args.method)
+        if len(args.line) == 1:
+            if args.remove:
+                # 移除断点
+                manager.remove_breakpoint(args.line[0])
+            else:
+                # 插入断点
+                manager.insert_breakpoint(args.line[0], args.method)
+            return 0
+        
+        # 多个行号：一次事务完成，行号都指向当前文件
+        batch = manager.batch()
+        for line_num in args.line:
+            if args.remove:
+                batch.remove(line_num)
+            else:
+                batch.insert(line_num, args.method)
+        result = batch.commit()
+        for line_num, new_line in sorted(result.inserted.items()):
+            print(_inserted_message(args.method, line_num, new_line))
+        for line_num in result.removed:
+            print(f"✅ Removed breakpoint at line {line_num}")
+        for line_num, reason in sorted(result.skipped.items()):
+            print(f"⚠️  Line {line_num}: {reason}")
         
         return 0
         
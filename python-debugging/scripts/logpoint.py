@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+日志点工具 - 在指定行记录表达式的值，不暂停程序
+
+与 BreakpointManager 的断点不同，日志点不会进入调试器：命中时对预编译的表达式求值，
+把结果写入内存环形缓冲区（deque(maxlen=N)，append 在 GIL 下是原子的，无需加锁），
+程序退出时一次性写成 NDJSON 或紧凑的二进制（marshal）文件。
+
+使用方法:
+    python logpoint.py <script.py> --log "12=total, item" --log "utils.py:40=len(rows)"
+    python logpoint.py <script.py> --log "12=total" --sample-rate 0.01 --output trace.ndjson
+    python logpoint.py --dump trace.bin
+"""
+import sys
+import os
+import ast
+import json
+import time
+import atexit
+import random
+import marshal
+import reprlib
+import argparse
+import threading
+from collections import deque
+from pathlib import Path
+from types import FrameType
+from typing import Iterator, List, Optional, Tuple
+
+# Add scripts directory to path for imports
+scripts_dir = Path(__file__).parent
+if str(scripts_dir) not in sys.path:
+    sys.path.insert(0, str(scripts_dir))
+
+from runtime_breakpoint import BreakpointTracer, RuntimeBreakpoint, run_script
+
+
+BINARY_MAGIC = b'PDLOG1\n'
+# 这些类型的 repr 既便宜又有界，直接用内置 repr，绕过较慢的 reprlib
+_SCALAR_TYPES = frozenset({int, float, bool, complex, type(None)})
+
+
+def split_expressions(text: str) -> List[str]:
+    """把 "a, f(b, c), d[1:2]" 拆成独立表达式（按 AST 拆分，不会误切函数参数里的逗号）"""
+    try:
+        tree = ast.parse(f"({text},)", mode='eval')
+    except SyntaxError:
+        raise ValueError(f"Invalid logpoint expressions: {text}")
+    source = f"({text},)"
+    return [ast.get_source_segment(source, elt) for elt in tree.body.elts]
+
+
+def parse_logpoint(spec: str, default_file: str) -> Tuple[str, int, List[str]]:
+    """解析 "[FILE:]LINE=EXPR, EXPR..." 形式的日志点"""
+    location, sep, exprs = spec.partition('=')
+    if not sep or not exprs.strip():
+        raise ValueError(f"Invalid logpoint: {spec} (expected [FILE:]LINE=EXPR, ...)")
+    file_part, sep, line_part = location.strip().rpartition(':')
+    if not sep:
+        file_part, line_part = default_file, location.strip()
+    try:
+        line = int(line_part)
+    except ValueError:
+        raise ValueError(f"Invalid logpoint location: {location}")
+    return file_part, line, split_expressions(exprs.strip())
+
+
+class LogpointRecorder:
+    """日志点记录器 - 把命中的表达式值写入环形缓冲区
+
+    记录格式: (时间戳 ns, 线程 id, 文件, 行号, 命中次数, ((表达式, repr), ...))
+    缓冲区满时最旧的记录被覆盖，dropped 统计被覆盖的条数。
+    统计计数器在被跟踪的线程里不加锁地累加，多线程并发命中时可能略少于实际值，只作参考。
+    """
+
+    def __init__(self, capacity: int = 100_000, sample_rate: float = 1.0,
+                 max_repr: int = 200):
+        if not 0.0 < sample_rate <= 1.0:
+            raise ValueError(f"sample_rate must be in (0, 1]: {sample_rate}")
+        self.buffer: deque = deque(maxlen=capacity)
+        self.sample_rate = sample_rate
+        self.recorded = 0
+        self.sampled_out = 0
+        self.action_ns = 0
+        self._logpoints: List[RuntimeBreakpoint] = []
+        self._repr = reprlib.Repr()
+        self._repr.maxstring = self._repr.maxother = max_repr
+        self.max_repr = max_repr
+        # 记录时间戳 = perf_counter_ns + 偏移，每次命中省掉一次 time_ns() 调用
+        self._wall_offset_ns = time.time_ns() - time.perf_counter_ns()
+
+    @property
+    def dropped(self) -> int:
+        return max(0, self.recorded - len(self.buffer))
+
+    def logpoint(self, file: str, line: int, expressions: List[str],
+                 condition: Optional[str] = None, every: Optional[int] = None) -> RuntimeBreakpoint:
+        """创建一个日志点（表达式在此处编译一次）"""
+        compiled = [(expr, compile(expr, f'<logpoint {expr}>', 'eval')) for expr in expressions]
+
+        def action(frame: FrameType, bp: RuntimeBreakpoint):
+            self._record(frame, bp, compiled)
+
+        bp = RuntimeBreakpoint(file, line, action=action, condition=condition, every=every)
+        self._logpoints.append(bp)
+        return bp
+
+    def _record(self, frame: FrameType, bp: RuntimeBreakpoint, compiled: list):
+        start = time.perf_counter_ns()
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            self.sampled_out += 1
+            self.action_ns += time.perf_counter_ns() - start
+            return
+        f_globals, f_locals = frame.f_globals, frame.f_locals
+        values = []
+        for expr, code in compiled:
+            try:
+                value = eval(code, f_globals, f_locals)
+                kind = type(value)
+                if kind in _SCALAR_TYPES or (kind is str and len(value) <= self.max_repr):
+                    values.append((expr, repr(value)))
+                else:
+                    values.append((expr, self._repr.repr(value)))
+            except Exception as e:
+                values.append((expr, f"<{type(e).__name__}: {e}>"))
+        # 只由 str/int 组成的元组会被 GC 取消跟踪，大缓冲区不会拖慢垃圾回收
+        self.buffer.append((start + self._wall_offset_ns, threading.get_ident(), bp.file, bp.line, bp.hits,
+                            tuple(values)))
+        self.recorded += 1
+        self.action_ns += time.perf_counter_ns() - start
+
+    def stats(self) -> dict:
+        """hits: 条件成立的命中次数（--every 过滤和采样之前）；fired: 实际调用记录动作的次数"""
+        fired = self.recorded + self.sampled_out
+        return {
+            'hits': sum(bp.hits for bp in self._logpoints),
+            'fired': fired,
+            'recorded': self.recorded,
+            'sampled_out': self.sampled_out,
+            'dropped': self.dropped,
+            'buffered': len(self.buffer),
+            'avg_action_ns': self.action_ns // fired if fired else 0,
+        }
+
+    def flush(self, path: str, fmt: str = 'ndjson') -> int:
+        """把缓冲区写入文件，返回写入的记录数"""
+        records = list(self.buffer)
+        if fmt == 'binary':
+            with open(path, 'wb') as f:
+                f.write(BINARY_MAGIC)
+                for record in records:
+                    marshal.dump(record, f)
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(_record_to_dict(record), ensure_ascii=False))
+                    f.write('\n')
+        return len(records)
+
+
+def _record_to_dict(record: tuple) -> dict:
+    ts, thread, file, line, hit, values = record
+    return {'ts_ns': ts, 'thread': thread, 'file': file, 'line': line, 'hit': hit,
+            'values': {expr: value for expr, value in values}}
+
+
+def read_log(path: str) -> Iterator[dict]:
+    """读取 NDJSON 或二进制日志文件"""
+    with open(path, 'rb') as f:
+        if f.read(len(BINARY_MAGIC)) == BINARY_MAGIC:
+            while True:
+                try:
+                    yield _record_to_dict(marshal.load(f))
+                except EOFError:
+                    return
+        f.seek(0)
+        for raw in f:
+            if raw.strip():
+                yield json.loads(raw)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Record expression values at chosen lines without stopping the program',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Log total and item every time line 12 runs
+  python logpoint.py demo.py --log "12=total, item"
+
+  # Log in another module, sample 1% of hits, compact binary output
+  python logpoint.py demo.py --log "pkg/utils.py:40=len(rows)" --sample-rate 0.01 --format binary -o trace.bin
+
+  # Convert a binary log back to NDJSON
+  python logpoint.py --dump trace.bin
+        """
+    )
+    parser.add_argument('script', nargs='?', help='Python script to run')
+    parser.add_argument('--log', dest='logs', action='append', default=[],
+                       metavar='[FILE:]LINE=EXPR[, EXPR...]',
+                       help='Logpoint location and expressions to record (repeatable)')
+    parser.add_argument('--condition', help='Only record when this expression is true')
+    parser.add_argument('--every', type=int, metavar='N', help='Only record every Nth hit')
+    parser.add_argument('--sample-rate', type=float, default=1.0,
+                       help='Fraction of hits to record, randomly sampled (default: 1.0)')
+    parser.add_argument('--buffer', type=int, default=100_000,
+                       help='Ring buffer capacity in records (default: 100000)')
+    parser.add_argument('--max-repr', type=int, default=200,
+                       help='Truncate value reprs to this many characters (default: 200)')
+    parser.add_argument('-o', '--output', default='logpoints.ndjson',
+                       help='Output file written at exit (default: logpoints.ndjson)')
+    parser.add_argument('--format', choices=['ndjson', 'binary'], default='ndjson',
+                       help='Output format (default: ndjson)')
+    parser.add_argument('--backend', choices=['auto', 'monitoring', 'settrace'], default='auto',
+                       help='Tracing backend (default: sys.monitoring when available)')
+    parser.add_argument('--dump', metavar='LOG', help='Print a recorded log file as NDJSON and exit')
+
+    # `--` 之后的参数原样传给脚本
+    argv = sys.argv[1:]
+    script_args = []
+    if '--' in argv:
+        split = argv.index('--')
+        argv, script_args = argv[:split], argv[split + 1:]
+    args = parser.parse_args(argv)
+
+    if args.dump:
+        for record in read_log(args.dump):
+            print(json.dumps(record, ensure_ascii=False))
+        return 0
+
+    if not args.script or not args.logs:
+        parser.print_help()
+        return 1
+    if not os.path.exists(args.script):
+        print(f"❌ Error: Script not found: {args.script}")
+        return 1
+
+    try:
+        recorder = LogpointRecorder(args.buffer, args.sample_rate, args.max_repr)
+        logpoints = []
+        for spec in args.logs:
+            file_path, line, expressions = parse_logpoint(spec, args.script)
+            if not os.path.exists(file_path):
+                raise FileNotFoundError(f"File not found: {file_path}")
+            logpoints.append(recorder.logpoint(file_path, line, expressions,
+                                               condition=args.condition, every=args.every))
+        tracer = BreakpointTracer(logpoints, backend=args.backend)
+    except (ValueError, FileNotFoundError, RuntimeError) as e:
+        print(f"❌ Error: {e}")
+        return 1
+
+    output = os.path.abspath(args.output)
+
+    def flush():
+        tracer.stop()
+        written = recorder.flush(output, args.format)
+        stats = recorder.stats()
+        print(f"\n📝 Logpoints: {written} record(s) written to {output} "
+              f"(hits: {stats['hits']}, fired: {stats['fired']}, sampled out: {stats['sampled_out']}, "
+              f"dropped: {stats['dropped']}, avg cost: {stats['avg_action_ns']} ns/record)",
+              file=sys.stderr)
+
+    # 即使脚本调用 sys.exit() 或抛出异常，也会在退出时写出缓冲区
+    atexit.register(flush)
+    print(f"📍 {len(logpoints)} logpoint(s), backend: {tracer.backend}", file=sys.stderr)
+    tracer.start()
+    try:
+        run_script(args.script, script_args)
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+内存增长分析工具 - 在 tracemalloc 下运行脚本，定期快照并比较，找出内存持续增长的分配位置
+
+后台线程每隔 --interval 秒拍一次快照，只保留第一次、上一次和最新的快照（内存开销有界），
+同时记录当前 RSS / 峰值 RSS。结束时报告：
+  - 按增长量排序的分配位置（含调用栈），标出最后一个间隔内仍在增长的位置
+  - 每次快照的 RSS、tracemalloc 统计量和相对上一次的增长
+
+使用方法:
+    python memory_tracker.py <script.py> --interval 0.5 --top 10
+    python memory_tracker.py <script.py> --frames 10 --output memory.json -- --input data.csv
+"""
+import sys
+import os
+import json
+import time
+import atexit
+import argparse
+import threading
+import tracemalloc
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import List, Optional
+
+# Add scripts directory to path for imports
+scripts_dir = Path(__file__).parent
+if str(scripts_dir) not in sys.path:
+    sys.path.insert(0, str(scripts_dir))
+
+from runtime_breakpoint import run_script
+
+try:
+    import psutil
+    HAS_PSUTIL = True
+except ImportError:
+    HAS_PSUTIL = False
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def current_rss() -> Optional[int]:
+    """当前常驻内存（字节）；无法获取时返回 None"""
+    if HAS_PSUTIL:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss() -> Optional[int]:
+    """进程启动以来的峰值常驻内存（字节）"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 上单位是 KB，macOS 上是字节
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def format_size(size: Optional[float]) -> str:
+    if size is None:
+        return 'n/a'
+    sign = '-' if size < 0 else ''
+    size = abs(size)
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if size < 1024 or unit == 'GiB':
+            return f"{sign}{size:.0f} {unit}" if unit == 'B' else f"{sign}{size:.1f} {unit}"
+        size /= 1024
+
+
+@dataclass
+class MemorySample:
+    """一次快照时的内存状态"""
+    elapsed: float
+    rss: Optional[int]
+    peak_rss: Optional[int]
+    traced: int
+    traced_peak: int
+    # 相对上一次快照的净增长（tracemalloc 统计）
+    growth: int
+
+
+@dataclass
+class GrowthSite:
+    """一个分配位置（调用栈）从第一次到最后一次快照的增长"""
+    size_diff: int
+    size: int
+    count_diff: int
+    count: int
+    # 最后一个快照间隔内仍在增长
+    still_growing: bool
+    traceback: List[str]
+
+
+def _is_tool_frame(filename: str) -> bool:
+    return (filename.startswith('<frozen runpy') or filename.startswith('<frozen importlib')
+            or filename == tracemalloc.__file__
+            or os.path.dirname(os.path.realpath(filename)) == _SCRIPTS_DIR)
+
+
+_SCRIPTS_DIR = str(scripts_dir.resolve())
+
+
+class MemoryTracker:
+    """周期性 tracemalloc 快照 + diff
+
+    每次采样只拍快照并读取计数器（都在 C 里完成），只保留第一次、上一次和最新的快照；
+    按调用栈分组比较（较慢）只在报告时做一次，采样开销随 interval 线性下降。
+    """
+
+    def __init__(self, interval: float = 1.0, frames: int = 5):
+        if interval <= 0:
+            raise ValueError(f"interval must be positive: {interval}")
+        if frames < 1:
+            raise ValueError(f"frames must be at least 1: {frames}")
+        self.interval = interval
+        self.frames = frames
+        self.samples: List[MemorySample] = []
+        self.snapshot_seconds = 0.0
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._latest: Optional[tracemalloc.Snapshot] = None
+        self._started_at = 0.0
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def snapshot(self):
+        """拍一次快照并记录样本（后台线程和 stop() 都会调用）"""
+        with self._lock:
+            start = time.perf_counter()
+            snapshot = tracemalloc.take_snapshot()
+            traced, traced_peak = tracemalloc.get_traced_memory()
+            last_traced = self.samples[-1].traced if self.samples else traced
+            if self._baseline is None:
+                self._baseline = snapshot
+            self._previous, self._latest = self._latest, snapshot
+            self.samples.append(MemorySample(
+                elapsed=time.perf_counter() - self._started_at,
+                rss=current_rss(), peak_rss=peak_rss(),
+                traced=traced, traced_peak=traced_peak, growth=traced - last_traced,
+            ))
+            self.snapshot_seconds += time.perf_counter() - start
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.snapshot()
+
+    def start(self):
+        tracemalloc.start(self.frames)
+        self._started_at = time.perf_counter()
+        self.snapshot()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='memory-tracker', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        self.snapshot()
+        tracemalloc.stop()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def top_growth(self, limit: int = 10) -> List[GrowthSite]:
+        """从第一次到最后一次快照增长最多的分配位置（不含本工具、runpy 和导入机制的分配）"""
+        if self._baseline is None or self._latest is None or self._latest is self._baseline:
+            return []
+        recent = set()
+        if self._previous is not None and self._previous is not self._baseline:
+            recent = {stat.traceback for stat in self._latest.compare_to(self._previous, 'traceback')
+                      if stat.size_diff > 0}
+        sites = []
+        # compare_to 按 |size_diff| 排序，大块释放会排在增长前面，先过滤出增长再取前 limit 个
+        grown = [stat for stat in self._latest.compare_to(self._baseline, 'traceback')
+                 if stat.size_diff > 0]
+        for stat in grown:
+            # 最内层帧属于工具自身的分配不计入
+            if _is_tool_frame(stat.traceback[-1].filename):
+                continue
+            sites.append(GrowthSite(
+                size_diff=stat.size_diff, size=stat.size,
+                count_diff=stat.count_diff, count=stat.count,
+                still_growing=stat.traceback in recent,
+                # tracemalloc 的 Traceback 本身就是由外到内
+                traceback=[f"{frame.filename}:{frame.lineno}" for frame in stat.traceback
+                           if not _is_tool_frame(frame.filename)],
+            ))
+            if len(sites) >= limit:
+                break
+        return sites
+
+    def print_report(self, top: int = 10, timeline_rows: int = 20):
+        """打印增长位置和内存时间线"""
+        wall = self.samples[-1].elapsed if self.samples else 0.0
+        overhead = self.snapshot_seconds / wall * 100 if wall else 0.0
+        peak = max((s.peak_rss for s in self.samples if s.peak_rss is not None), default=None)
+        traced_peak = max((s.traced_peak for s in self.samples), default=0)
+        print(f"🧠 {len(self.samples)} snapshot(s) over {wall:.2f}s, every {self.interval:g}s, "
+              f"{self.frames} frame(s) per traceback, snapshot cost {overhead:.1f}% of wall time")
+        print(f"   Peak RSS: {format_size(peak)}, peak traced: {format_size(traced_peak)}")
+
+        sites = self.top_growth(top)
+        if sites:
+            print(f"\n📈 Top {len(sites)} allocation site(s) by growth since the first snapshot:")
+            for i, site in enumerate(sites, 1):
+                trend = " ⚠️  still growing" if site.still_growing else ""
+                print(f"\n{i:2d}. +{format_size(site.size_diff)} (now {format_size(site.size)}), "
+                      f"+{site.count_diff:,} block(s){trend}")
+                for location in site.traceback:
+                    print(f"      {location}")
+        else:
+            print("\n✅ No allocation site grew between the first and last snapshot")
+
+        if self.samples:
+            # 样本太多时等间隔抽取，首尾总是保留
+            step = max(1, len(self.samples) // timeline_rows)
+            rows = self.samples[::step]
+            if rows[-1] is not self.samples[-1]:
+                rows.append(self.samples[-1])
+            print(f"\n⏱️  Memory over time:")
+            print(f"  {'time':>8} {'RSS':>11} {'peak RSS':>11} {'traced':>11} {'growth':>11}")
+            for sample in rows:
+                print(f"  {sample.elapsed:7.2f}s {format_size(sample.rss):>11} "
+                      f"{format_size(sample.peak_rss):>11} {format_size(sample.traced):>11} "
+                      f"{format_size(sample.growth):>11}")
+
+    def save(self, path: str, top: int = 10):
+        """把时间线和增长位置保存为 JSON"""
+        data = {
+            'interval': self.interval,
+            'frames': self.frames,
+            'samples': [asdict(sample) for sample in self.samples],
+            'top_growth': [asdict(site) for site in self.top_growth(top)],
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Find memory growth: periodic tracemalloc snapshots, diffs and RSS over time',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Snapshot every second, show the 10 fastest-growing allocation sites
+  python memory_tracker.py demo.py
+
+  # Finer timeline, deeper tracebacks, JSON report; pass script arguments after --
+  python memory_tracker.py demo.py --interval 0.2 --frames 15 --output memory.json -- --input data.csv
+        """
+    )
+    parser.add_argument('script', help='Python script to run')
+    parser.add_argument('--interval', type=float, default=1.0,
+                       help='Seconds between snapshots (default: 1.0). Larger values lower overhead')
+    parser.add_argument('--frames', type=int, default=5,
+                       help='Stack frames kept per allocation (default: 5). More frames cost more memory and time')
+    parser.add_argument('--top', type=int, default=10,
+                       help='Number of growing allocation sites to show (default: 10)')
+    parser.add_argument('--output', metavar='FILE', help='Also write the report as JSON')
+
+    # `--` 之后的参数原样传给脚本
+    argv = sys.argv[1:]
+    script_args = []
+    if '--' in argv:
+        split = argv.index('--')
+        argv, script_args = argv[:split], argv[split + 1:]
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.script):
+        print(f"❌ Error: Script not found: {args.script}")
+        return 1
+
+    try:
+        tracker = MemoryTracker(args.interval, args.frames)
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        return 1
+
+    def report():
+        tracker.stop()
+        print(file=sys.stderr)
+        # 报告写到 stderr，不和脚本自己的输出混在一起
+        stdout, sys.stdout = sys.stdout, sys.stderr
+        try:
+            tracker.print_report(args.top)
+        finally:
+            sys.stdout = stdout
+        if args.output:
+            tracker.save(args.output, args.top)
+            print(f"\n💾 Report saved to {args.output}", file=sys.stderr)
+
+    # 即使脚本调用 sys.exit() 或抛出异常，也会在退出时输出报告
+    atexit.register(report)
+    tracker.start()
+    try:
+        # 持有脚本的全局变量直到最后一次快照，否则模块级的对象在 runpy 返回时已被释放
+        namespace = run_script(args.script, script_args)
+        tracker.stop()
+        del namespace
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+远程附加调试 - 连接到已经在运行的 Python 进程，动态设置断点，不重启进程
+
+两种目标:
+  - 用 debug_agent.py 启动（或代码中调用了 debugpy.listen）的进程：--connect [HOST:]PORT
+  - 没有代理的进程：--pid PID，通过 `python -m debugpy --listen ... --pid PID` 注入
+    （需要 ptrace 权限，Linux 上通常要 gdb）
+
+本工具是一个最小的 DAP（Debug Adapter Protocol）客户端：命中断点时打印调用栈、局部变量和
+--eval 表达式的值，然后自动继续；结束时清除断点并断开，进程照常运行，预热好的缓存不受影响。
+
+使用方法:
+    python remote_attach.py --connect 5678 --break service.py:120 --eval "len(cache)"
+    python remote_attach.py --pid 12345 --break "service.py:120, user_id == 42" --max-hits 3
+"""
+import sys
+import os
+import json
+import time
+import socket
+import argparse
+import subprocess
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Add scripts directory to path for imports
+scripts_dir = Path(__file__).parent
+if str(scripts_dir) not in sys.path:
+    sys.path.insert(0, str(scripts_dir))
+
+from runtime_breakpoint import parse_location
+from debug_agent import DEFAULT_HOST, DEFAULT_PORT, parse_address
+
+
+_SCRIPTS_DIR = str(scripts_dir.resolve())
+
+
+class DAPError(RuntimeError):
+    """DAP 请求失败或连接中断"""
+
+
+class DAPClient:
+    """最小的 DAP 客户端：Content-Length 分帧的 JSON 消息，请求/响应按 seq 配对，事件排队"""
+
+    def __init__(self, host: str, port: int, timeout: float = 10.0):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self._buffer = b''
+        self._seq = 0
+        self._events: deque = deque()
+        self._responses: Dict[int, dict] = {}
+
+    def close(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+    def _send(self, message: dict):
+        self._seq += 1
+        message['seq'] = self._seq
+        body = json.dumps(message).encode('utf-8')
+        self.sock.sendall(b'Content-Length: %d\r\n\r\n' % len(body) + body)
+        return self._seq
+
+    def _read_message(self) -> dict:
+        while True:
+            header_end = self._buffer.find(b'\r\n\r\n')
+            if header_end >= 0:
+                length = None
+                for header in self._buffer[:header_end].split(b'\r\n'):
+                    name, _, value = header.partition(b':')
+                    if name.strip().lower() == b'content-length':
+                        length = int(value)
+                if length is None:
+                    raise DAPError("Malformed DAP message header")
+                start = header_end + 4
+                if len(self._buffer) >= start + length:
+                    body = self._buffer[start:start + length]
+                    self._buffer = self._buffer[start + length:]
+                    return json.loads(body)
+            chunk = self.sock.recv(65536)
+            if not chunk:
+                raise DAPError("Connection closed by the debuggee")
+            self._buffer += chunk
+
+    def _pump(self):
+        """读一条消息，按类型放入响应表或事件队列"""
+        message = self._read_message()
+        if message.get('type') == 'response':
+            self._responses[message['request_seq']] = message
+        elif message.get('type') == 'event':
+            self._events.append(message)
+
+    def send_request(self, command: str, arguments: Optional[dict] = None) -> int:
+        return self._send({'type': 'request', 'command': command, 'arguments': arguments or {}})
+
+    def wait_response(self, seq: int) -> dict:
+        while seq not in self._responses:
+            self._pump()
+        response = self._responses.pop(seq)
+        if not response.get('success'):
+            raise DAPError(f"{response.get('command')} failed: {response.get('message')}")
+        return response.get('body') or {}
+
+    def request(self, command: str, arguments: Optional[dict] = None) -> dict:
+        return self.wait_response(self.send_request(command, arguments))
+
+    def wait_event(self, name: Optional[str] = None, timeout: Optional[float] = None) -> Optional[dict]:
+        """等待下一个（指定名称的）事件；超时返回 None"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            for i, event in enumerate(self._events):
+                if name is None or event.get('event') == name:
+                    del self._events[i]
+                    return event
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self.sock.settimeout(remaining)
+            else:
+                self.sock.settimeout(None)
+            try:
+                self._pump()
+            except socket.timeout:
+                return None
+
+
+@dataclass
+class RemoteBreakpoint:
+    """远程断点（文件路径须与目标进程中看到的路径一致）"""
+    file: str
+    line: int
+    condition: Optional[str] = None
+    hit_condition: Optional[str] = None
+
+    def to_dap(self) -> dict:
+        bp = {'line': self.line}
+        if self.condition:
+            bp['condition'] = self.condition
+        if self.hit_condition:
+            bp['hitCondition'] = self.hit_condition
+        return bp
+
+
+@dataclass
+class HitReport:
+    """一次断点命中时采集到的状态"""
+    thread_id: int
+    reason: str
+    frames: List[Tuple[str, str, int]] = field(default_factory=list)
+    locals: List[Tuple[str, str]] = field(default_factory=list)
+    evaluations: List[Tuple[str, str]] = field(default_factory=list)
+
+
+class RemoteDebugSession:
+    """附加到远程进程，设置断点，采集命中时的状态后自动继续"""
+
+    def __init__(self, host: str, port: int, timeout: float = 10.0):
+        self.host = host
+        self.port = port
+        self.client = DAPClient(host, port, timeout)
+        self.breakpoints: Dict[str, List[RemoteBreakpoint]] = {}
+        self._attach_seq: Optional[int] = None
+
+    def attach(self):
+        self.client.request('initialize', {
+            'clientID': 'python-debugging', 'clientName': 'remote_attach.py',
+            'adapterID': 'debugpy', 'pathFormat': 'path',
+            'linesStartAt1': True, 'columnsStartAt1': True,
+            'supportsVariableType': True,
+        })
+        # debugpy 在 configurationDone 之后才回复 attach，所以这里只发送不等待
+        self._attach_seq = self.client.send_request('attach', {'justMyCode': False})
+        if self.client.wait_event('initialized', timeout=self.client.sock.gettimeout()) is None:
+            raise DAPError("Timed out waiting for the debuggee to initialize")
+
+    def set_breakpoints(self, breakpoints: List[RemoteBreakpoint]) -> List[Tuple[RemoteBreakpoint, dict]]:
+        """按文件设置断点（DAP 的 setBreakpoints 会替换该文件已有的断点），返回 [(断点, 验证结果)]"""
+        for bp in breakpoints:
+            self.breakpoints.setdefault(os.path.realpath(bp.file), []).append(bp)
+        results = []
+        for path, file_bps in self.breakpoints.items():
+            body = self.client.request('setBreakpoints', {
+                'source': {'path': path},
+                'breakpoints': [bp.to_dap() for bp in file_bps],
+            })
+            results.extend(zip(file_bps, body.get('breakpoints', [])))
+        return results
+
+    def configuration_done(self):
+        self.client.request('configurationDone')
+        if self._attach_seq is not None:
+            self.client.wait_response(self._attach_seq)
+            self._attach_seq = None
+
+    def collect(self, thread_id: int, reason: str, expressions: List[str],
+                depth: int = 5) -> HitReport:
+        """采集调用栈、最内层帧的局部变量和表达式的值"""
+        report = HitReport(thread_id, reason)
+        frames = self.client.request('stackTrace', {'threadId': thread_id, 'levels': depth})
+        stack = frames.get('stackFrames', [])
+        for frame in stack:
+            source = frame.get('source') or {}
+            path = source.get('path', '?')
+            # debug_agent.py / runpy 的启动帧对用户没有意义
+            if os.path.dirname(os.path.realpath(path)) == _SCRIPTS_DIR or path.startswith('<frozen runpy'):
+                continue
+            report.frames.append((frame.get('name', '?'), path, frame.get('line', 0)))
+        if not stack:
+            return report
+        frame_id = stack[0]['id']
+        for scope in self.client.request('scopes', {'frameId': frame_id}).get('scopes', []):
+            if scope.get('name', '').lower() != 'locals':
+                continue
+            variables = self.client.request('variables', {'variablesReference': scope['variablesReference']})
+            report.locals = [(v['name'], v.get('value', '')) for v in variables.get('variables', [])
+                             if not v['name'].startswith('(')]
+        for expression in expressions:
+            try:
+                body = self.client.request('evaluate', {'expression': expression, 'frameId': frame_id,
+                                                        'context': 'watch'})
+                report.evaluations.append((expression, body.get('result', '')))
+            except DAPError as e:
+                report.evaluations.append((expression, f"<{e}>"))
+        return report
+
+    def watch(self, expressions: List[str], max_hits: int, duration: Optional[float]):
+        """等待断点命中，逐个打印状态后继续执行；达到次数或时长后返回"""
+        hits = 0
+        deadline = None if duration is None else time.monotonic() + duration
+        while hits < max_hits:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            event = self.client.wait_event(None, timeout=remaining)
+            if event is None:
+                break
+            name = event.get('event')
+            if name in ('exited', 'terminated'):
+                print("ℹ️  Debuggee exited")
+                return hits
+            if name != 'stopped':
+                continue
+            body = event.get('body', {})
+            thread_id = body.get('threadId')
+            hits += 1
+            report = self.collect(thread_id, body.get('reason', '?'), expressions)
+            print_hit(hits, report)
+            # 所有线程一起继续
+            self.client.request('continue', {'threadId': thread_id})
+        return hits
+
+    def detach(self):
+        """清除所有断点并断开，目标进程继续运行"""
+        try:
+            for path in self.breakpoints:
+                self.client.request('setBreakpoints', {'source': {'path': path}, 'breakpoints': []})
+            self.client.request('disconnect', {'terminateDebuggee': False})
+        except (DAPError, OSError):
+            pass
+        finally:
+            self.client.close()
+
+
+def print_hit(number: int, report: HitReport):
+    name, path, line = report.frames[0] if report.frames else ('?', '?', 0)
+    print(f"\n🔴 Hit #{number}: {name} at {path}:{line} (thread {report.thread_id}, {report.reason})")
+    for frame_name, frame_path, frame_line in report.frames[1:]:
+        print(f"    ↳ called from {frame_name} ({os.path.basename(frame_path)}:{frame_line})")
+    for expression, value in report.evaluations:
+        print(f"  🔎 {expression} = {value}")
+    if report.locals:
+        print("  Locals:")
+        for var_name, value in report.locals:
+            print(f"    {var_name} = {value}")
+
+
+def inject_agent(pid: int, host: str, port: int):
+    """把 debugpy 注入到正在运行的进程中（不需要目标进程预先做任何准备）"""
+    try:
+        import debugpy  # noqa: F401
+    except ImportError:
+        raise RuntimeError("debugpy is not installed. Install it with: pip install debugpy")
+    cmd = [sys.executable, '-m', 'debugpy', '--listen', f'{host}:{port}', '--pid', str(pid)]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        # debugpy 的输出很长，只保留最后一行原因
+        reason = (result.stderr.strip().splitlines() or ['unknown error'])[-1][:300]
+        raise RuntimeError(f"Failed to inject debugpy into pid {pid} "
+                           f"(needs gdb on Linux and ptrace permission): {reason}")
+
+
+def connect_with_retry(host: str, port: int, timeout: float) -> RemoteDebugSession:
+    """注入后监听端口需要一点时间才就绪，在超时前重试连接"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return RemoteDebugSession(host, port, timeout)
+        except OSError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.2)
+
+
+def parse_breakpoint(spec: str, default_file: Optional[str], hit_count: Optional[int] = None,
+                     every: Optional[int] = None) -> RemoteBreakpoint:
+    file, line, condition = parse_location(spec, default_file)
+    if not file:
+        raise ValueError(f"Breakpoint needs a file: {spec} (use FILE:LINE or --file)")
+    hit_condition = str(hit_count) if hit_count else (f"% {every}" if every else None)
+    return RemoteBreakpoint(os.path.realpath(file), line, condition, hit_condition)
+
+
+def attach_and_watch(address: Tuple[str, int], breakpoints: List[RemoteBreakpoint],
+                     expressions: List[str] = (), max_hits: int = 1, duration: Optional[float] = None,
+                     pid: Optional[int] = None, timeout: float = 10.0) -> int:
+    """附加到进程（必要时先注入），设置断点，采集命中后断开；返回命中次数"""
+    host, port = address
+    if pid is not None:
+        print(f"💉 Injecting debugpy into pid {pid} ({host}:{port})...")
+        inject_agent(pid, host, port)
+    session = connect_with_retry(host, port, timeout)
+    try:
+        session.attach()
+        results = session.set_breakpoints(breakpoints)
+        session.configuration_done()
+        print(f"🔌 Attached to {host}:{port}")
+        for bp, result in results:
+            status = '✅' if result.get('verified', True) else f"⚠️  {result.get('message', 'unverified')}"
+            print(f"  📍 {bp.file}:{result.get('line', bp.line)} {status}")
+        limit = f"up to {max_hits} hit(s)" + (f" or {duration:g}s" if duration else "")
+        print(f"⏳ Waiting for breakpoints ({limit}, Ctrl+C to stop)...")
+        try:
+            hits = session.watch(list(expressions), max_hits, duration)
+        except KeyboardInterrupt:
+            hits = 0
+            print("\n⚠️  Interrupted")
+        print(f"\n🔓 Detaching after {hits} hit(s); breakpoints removed, process keeps running")
+        return hits
+    finally:
+        session.detach()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Attach to a running Python process with debugpy and set breakpoints without restarting it',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Process started with debug_agent.py (or debugpy.listen) on port 5678
+  python remote_attach.py --connect 5678 --break service.py:120
+
+  # Conditional breakpoint, evaluate expressions, collect 5 hits
+  python remote_attach.py --connect 5678 --break "service.py:120, user_id == 42" \\
+      --eval "len(cache)" --eval "request.path" --max-hits 5
+
+  # Process started without the agent: inject debugpy by pid (needs ptrace permission)
+  python remote_attach.py --pid 12345 --break service.py:120 --port 5679
+        """
+    )
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--connect', metavar='[HOST:]PORT',
+                       help='Address of a debugpy agent in the running process')
+    target.add_argument('--pid', type=int, help='Inject debugpy into this running process')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                       help=f'Port for --pid injection (default: {DEFAULT_PORT})')
+    parser.add_argument('--break', dest='breaks', action='append', default=[], required=True,
+                       metavar='[FILE:]LINE[, CONDITION]', help='Breakpoint location (repeatable)')
+    parser.add_argument('--file', help='Default file for breakpoints given as a bare line number')
+    parser.add_argument('--hit-count', type=int, metavar='N', help='Only stop on the Nth hit')
+    parser.add_argument('--every', type=int, metavar='N', help='Only stop on every Nth hit')
+    parser.add_argument('--eval', dest='expressions', action='append', default=[], metavar='EXPR',
+                       help='Expression to evaluate at each hit (repeatable)')
+    parser.add_argument('--max-hits', type=int, default=1,
+                       help='Detach after this many hits (default: 1)')
+    parser.add_argument('--duration', type=float, metavar='SECONDS',
+                       help='Detach after this long even without hits')
+    parser.add_argument('--timeout', type=float, default=10.0,
+                       help='Connection timeout in seconds (default: 10)')
+    args = parser.parse_args()
+
+    try:
+        address = parse_address(args.connect) if args.connect else (DEFAULT_HOST, args.port)
+        breakpoints = [parse_breakpoint(spec, args.file, args.hit_count, args.every)
+                       for spec in args.breaks]
+        attach_and_watch(address, breakpoints, args.expressions, args.max_hits, args.duration,
+                         pid=args.pid, timeout=args.timeout)
+    except (ValueError, RuntimeError, OSError) as e:
+        print(f"❌ Error: {e}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+采样分析器 - 定时采集所有线程的调用栈，输出折叠栈（flamegraph）文件和热点函数表
+
+信号模式（默认，Unix）：setitimer 定时发送 SIGPROF/SIGALRM，信号处理函数里用
+sys._current_frames() 一次拿到所有线程的栈。程序本身不被插桩，开销只和采样频率有关。
+线程模式（Windows 或主线程长时间阻塞在 C 调用里时）：后台线程按间隔采样。
+
+使用方法:
+    python sampling_profiler.py <script.py> --interval 5 -o profile.folded
+    flamegraph.pl profile.folded > profile.svg   # 或直接拖进 https://www.speedscope.app
+"""
+import sys
+import os
+import time
+import atexit
+import signal
+import argparse
+import threading
+from collections import Counter
+from pathlib import Path
+from types import CodeType, FrameType
+from typing import Dict, List, Optional, Tuple
+
+# Add scripts directory to path for imports
+scripts_dir = Path(__file__).parent
+if str(scripts_dir) not in sys.path:
+    sys.path.insert(0, str(scripts_dir))
+
+from runtime_breakpoint import run_script
+
+
+HAS_ITIMER = hasattr(signal, 'setitimer')
+# 工具自身和 runpy 的栈帧不计入结果
+_SCRIPTS_DIR = str(scripts_dir.resolve())
+
+
+class StackSampler:
+    """统计采样器 - 按间隔记录每个线程的完整调用栈
+
+    stacks: Counter[(线程名, 最外层函数, ..., 最内层函数)] -> 采样次数
+    """
+
+    def __init__(self, interval: float = 0.005, clock: str = 'cpu', mode: str = 'auto',
+                 max_depth: int = 256):
+        if interval <= 0:
+            raise ValueError(f"interval must be positive: {interval}")
+        if clock not in ('cpu', 'wall'):
+            raise ValueError(f"Unknown clock: {clock}")
+        if mode == 'auto':
+            mode = 'signal' if HAS_ITIMER and threading.current_thread() is threading.main_thread() else 'thread'
+        if mode == 'signal' and not HAS_ITIMER:
+            raise RuntimeError("Signal timers are not available on this platform, use mode='thread'")
+        self.interval = interval
+        self.clock = clock
+        self.mode = mode
+        self.max_depth = max_depth
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.sample_seconds = 0.0
+        self.wall_seconds = 0.0
+        self._labels: Dict[CodeType, Optional[str]] = {}
+        self._thread_names: Dict[int, str] = {}
+        self._sampler_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._previous_handler = None
+        self._in_handler = False
+        self._started_at = 0.0
+
+    # ---- 采样 ----
+
+    def _label(self, code: CodeType) -> Optional[str]:
+        try:
+            return self._labels[code]
+        except KeyError:
+            pass
+        filename = code.co_filename
+        if (filename.startswith('<frozen runpy') or os.path.basename(filename) == 'runpy.py'
+                or os.path.dirname(os.path.realpath(filename)) == _SCRIPTS_DIR):
+            label = None
+        else:
+            name = getattr(code, 'co_qualname', code.co_name)
+            label = f"{name} ({os.path.basename(filename)}:{code.co_firstlineno})"
+        self._labels[code] = label
+        return label
+
+    def _thread_name(self, ident: int) -> str:
+        name = self._thread_names.get(ident)
+        if name is None:
+            # 新线程出现时才刷新一次线程名表
+            self._thread_names = {t.ident: t.name for t in threading.enumerate()}
+            name = self._thread_names.setdefault(ident, f"Thread-{ident}")
+        return name
+
+    def sample(self, main_frame: Optional[FrameType] = None):
+        """采集一次所有线程的栈（main_frame: 信号模式下被中断的主线程栈帧）"""
+        start = time.perf_counter()
+        main_ident = threading.main_thread().ident
+        sampler_ident = self._sampler_thread.ident if self._sampler_thread else None
+        for ident, frame in sys._current_frames().items():
+            if ident == sampler_ident:
+                continue
+            if ident == main_ident and main_frame is not None:
+                frame = main_frame
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                label = self._label(frame.f_code)
+                if label is not None:
+                    stack.append(label)
+                frame = frame.f_back
+            if stack:
+                stack.append(self._thread_name(ident))
+                self.stacks[tuple(reversed(stack))] += 1
+        self.samples += 1
+        self.sample_seconds += time.perf_counter() - start
+
+    def _on_signal(self, signum, frame):
+        # 采样本身耗时超过间隔时，嵌套的信号直接丢弃，避免把采样器自己的栈记进去
+        if self._in_handler:
+            return
+        self._in_handler = True
+        try:
+            self.sample(frame)
+        finally:
+            self._in_handler = False
+
+    def _run_thread(self):
+        while not self._stop_event.wait(self.interval):
+            self.sample()
+
+    # ---- 启停 ----
+
+    def start(self):
+        self._started_at = time.perf_counter()
+        if self.mode == 'signal':
+            signum, timer = ((signal.SIGPROF, signal.ITIMER_PROF) if self.clock == 'cpu'
+                             else (signal.SIGALRM, signal.ITIMER_REAL))
+            self._previous_handler = signal.signal(signum, self._on_signal)
+            signal.setitimer(timer, self.interval, self.interval)
+        else:
+            self._stop_event.clear()
+            self._sampler_thread = threading.Thread(target=self._run_thread,
+                                                    name='stack-sampler', daemon=True)
+            self._sampler_thread.start()
+
+    def stop(self):
+        if self.mode == 'signal':
+            if self._previous_handler is None:
+                return
+            signum, timer = ((signal.SIGPROF, signal.ITIMER_PROF) if self.clock == 'cpu'
+                             else (signal.SIGALRM, signal.ITIMER_REAL))
+            signal.setitimer(timer, 0)
+            signal.signal(signum, self._previous_handler)
+            self._previous_handler = None
+        else:
+            if self._sampler_thread is None:
+                return
+            self._stop_event.set()
+            self._sampler_thread.join()
+            self._sampler_thread = None
+        self.wall_seconds += time.perf_counter() - self._started_at
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    # ---- 结果 ----
+
+    def write_collapsed(self, path: str) -> int:
+        """写折叠栈文件（flamegraph.pl / speedscope / inferno 通用格式），返回栈数"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(';'.join(part.replace(';', ',') for part in stack))
+                f.write(f" {count}\n")
+        return len(self.stacks)
+
+    def top_functions(self, n: int = 20) -> List[Tuple[str, int, int]]:
+        """[(函数, 自身采样数, 累计采样数)]，按自身采样数排序"""
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        for stack, count in self.stacks.items():
+            functions = stack[1:]
+            if not functions:
+                continue
+            self_counts[functions[-1]] += count
+            # 递归函数在同一个栈里只计一次
+            for function in set(functions):
+                total_counts[function] += count
+        ranked = sorted(total_counts, key=lambda f: (-self_counts[f], -total_counts[f]))
+        return [(function, self_counts[function], total_counts[function]) for function in ranked[:n]]
+
+    def print_report(self, top: int = 20):
+        """打印热点函数表"""
+        total = sum(self.stacks.values()) or 1
+        overhead = self.sample_seconds / self.wall_seconds * 100 if self.wall_seconds else 0.0
+        threads = {stack[0] for stack in self.stacks}
+        print(f"📊 {self.samples:,} samples, {len(threads)} thread(s), "
+              f"interval {self.interval * 1000:g} ms ({self.mode}/{self.clock}), "
+              f"sampler overhead {overhead:.1f}%")
+        rows = self.top_functions(top)
+        if not rows:
+            print("ℹ️  No samples collected (the script may have finished too quickly)")
+            return
+        print(f"\n🔥 Top {len(rows)} functions:")
+        print(f"  {'self%':>6} {'total%':>7} {'self':>7} {'total':>7}  function")
+        for function, self_count, total_count in rows:
+            print(f"  {self_count / total * 100:5.1f}% {total_count / total * 100:6.1f}% "
+                  f"{self_count:>7,} {total_count:>7,}  {function}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Statistical sampling profiler: collapsed-stack flamegraph output and hot function table',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Sample every 5 ms of CPU time, write profile.folded
+  python sampling_profiler.py demo.py
+
+  # Wall-clock sampling (includes time spent waiting on I/O and locks)
+  python sampling_profiler.py demo.py --clock wall --interval 10 -o demo.folded
+
+  # Pass arguments to the script after --
+  python sampling_profiler.py demo.py --top 30 -- --input data.csv
+
+  # Render
+  flamegraph.pl profile.folded > profile.svg
+        """
+    )
+    parser.add_argument('script', help='Python script to profile')
+    parser.add_argument('--interval', type=float, default=5.0,
+                       help='Sampling interval in milliseconds (default: 5)')
+    parser.add_argument('--clock', choices=['cpu', 'wall'], default='cpu',
+                       help='cpu: sample on consumed CPU time (SIGPROF); wall: sample on elapsed time '
+                            '(default: cpu)')
+    parser.add_argument('--mode', choices=['auto', 'signal', 'thread'], default='auto',
+                       help='Sampling driver (default: signal timer where available)')
+    parser.add_argument('-o', '--output', default='profile.folded',
+                       help='Collapsed-stack output file (default: profile.folded)')
+    parser.add_argument('--top', type=int, default=20,
+                       help='Number of hot functions to show (default: 20)')
+
+    # `--` 之后的参数原样传给脚本
+    argv = sys.argv[1:]
+    script_args = []
+    if '--' in argv:
+        split = argv.index('--')
+        argv, script_args = argv[:split], argv[split + 1:]
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.script):
+        print(f"❌ Error: Script not found: {args.script}")
+        return 1
+
+    try:
+        sampler = StackSampler(args.interval / 1000, clock=args.clock, mode=args.mode)
+    except (ValueError, RuntimeError) as e:
+        print(f"❌ Error: {e}")
+        return 1
+
+    output = os.path.abspath(args.output)
+
+    def report():
+        sampler.stop()
+        written = sampler.write_collapsed(output)
+        print(file=sys.stderr)
+        # 报告写到 stderr，不和脚本自己的输出混在一起
+        stdout, sys.stdout = sys.stdout, sys.stderr
+        try:
+            sampler.print_report(args.top)
+        finally:
+            sys.stdout = stdout
+        print(f"\n🔥 Flamegraph: {written} unique stack(s) written to {output}", file=sys.stderr)
+
+    # 即使脚本调用 sys.exit() 或抛出异常，也会在退出时写出结果
+    atexit.register(report)
+    sampler.start()
+    try:
+        run_script(args.script, script_args)
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
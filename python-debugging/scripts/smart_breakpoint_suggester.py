@@ -5,19 +5,359 @@
 import sys
 import os
 import ast
+import glob
+import json
+import hashlib
 import argparse
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Tuple, Set
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+
+Suggestion = Tuple[int, str, str]
+
+
+@dataclass(frozen=True)
+class SuggestionCategory:
+    """断点建议类别 - 声明关心的节点类型和对应的分析函数"""
+    name: str
+    node_types: Tuple[type, ...]
+    analyze: Callable[[ast.AST], List[Suggestion]]
+
+
+# 按注册顺序决定同一行多个建议时的优先级
+CATEGORIES: Dict[str, SuggestionCategory] = {}
+
+
+def register_category(name: str, node_types: Iterable[type],
+                      analyze: Callable[[ast.AST], List[Suggestion]]) -> SuggestionCategory:
+    """注册（或替换）一个建议类别，供单次遍历引擎分发"""
+    category = SuggestionCategory(name, tuple(node_types), analyze)
+    CATEGORIES[name] = category
+    return category
+
+
+def _suggest_function(node: ast.FunctionDef) -> List[Suggestion]:
+    # 跳过私有函数（保留特殊方法）
+    if node.name.startswith('_') and not node.name.startswith('__'):
+        return []
+
+    line = node.lineno
+    # 函数第一行可执行代码（跳过 docstring）
+    first_stmt_line = line + 1
+    if (node.body and
+        isinstance(node.body[0], ast.Expr) and
+        isinstance(node.body[0].value, ast.Constant) and
+        isinstance(node.body[0].value.value, str)):
+        first_stmt_line = node.body[0].lineno + 1
+    elif node.body:
+        first_stmt_line = node.body[0].lineno
+
+    return [(first_stmt_line, f"Function entry: {node.name}()", "函数入口 - 可以查看函数参数")]
+
+
+def _suggest_loop(node: ast.AST) -> List[Suggestion]:
+    kind = 'for' if isinstance(node, ast.For) else 'while'
+    return [(node.lineno, f"Loop start: {kind}", "循环开始 - 可以查看循环变量")]
+
+
+def _suggest_conditional(node: ast.If) -> List[Suggestion]:
+    suggestions = [(node.lineno, "Conditional branch", "条件分支 - 可以测试条件表达式")]
+    if node.orelse:
+        orelse_node = node.orelse[0]
+        if isinstance(orelse_node, ast.If):
+            suggestions.append((orelse_node.lineno, "Elif branch", "Elif 分支"))
+        else:
+            suggestions.append((
+                getattr(orelse_node, 'lineno', node.lineno + 1),
+                "Else branch",
+                "Else 分支"
+            ))
+    return suggestions
+
+
+def _suggest_exception(node: ast.Try) -> List[Suggestion]:
+    suggestions = [(node.lineno, "Try block start", "异常捕获开始 - 可以监控异常")]
+    for handler in node.handlers:
+        if handler.type is None:
+            caught = 'all'
+        elif isinstance(handler.type, ast.Name):
+            caught = handler.type.id
+        else:
+            caught = ast.unparse(handler.type)
+        suggestions.append((
+            handler.lineno,
+            f"Except handler: {caught}",
+            "异常处理 - 可以在异常时暂停"
+        ))
+    return suggestions
+
+
+def _suggest_return(node: ast.Return) -> List[Suggestion]:
+    return [(node.lineno, "Return statement", "返回语句 - 可以查看返回值")]
+
+
+IMPORTANT_VARIABLE_PATTERNS = (
+    'result', 'output', 'data', 'response', 'error',
+    'status', 'value', 'total', 'sum', 'count'
+)
+
+
+def _suggest_assignment(node: ast.Assign) -> List[Suggestion]:
+    # 只关注赋值给关键变量（计算结果、状态等）
+    for target in node.targets:
+        if isinstance(target, ast.Name):
+            var_name = target.id.lower()
+            if any(pattern in var_name for pattern in IMPORTANT_VARIABLE_PATTERNS):
+                return [(node.lineno, f"Variable assignment: {target.id}", "关键变量赋值 - 可以查看计算结果")]
+    return []
+
+
+register_category('functions', (ast.FunctionDef,), _suggest_function)
+register_category('loops', (ast.For, ast.While), _suggest_loop)
+register_category('conditionals', (ast.If,), _suggest_conditional)
+register_category('exceptions', (ast.Try,), _suggest_exception)
+register_category('returns', (ast.Return,), _suggest_return)
+register_category('assignments', (ast.Assign,), _suggest_assignment)
+
+
+class SuggestionVisitor:
+    """单次遍历引擎 - 一次 AST 遍历同时分发所有启用的类别（唯一入口：run / run_ranked）"""
+
+    def __init__(self, categories: Iterable[SuggestionCategory]):
+        self.categories = list(categories)
+        self.suggestions: List[Tuple[int, int, Suggestion]] = []
+        # 节点类型 -> [(优先级, 分析函数)]，避免每个节点做 isinstance 链
+        self._dispatch: Dict[type, List[Tuple[int, Callable]]] = {}
+        for priority, category in enumerate(self.categories):
+            for node_type in category.node_types:
+                self._dispatch.setdefault(node_type, []).append((priority, category.analyze))
+
+    def _handle(self, node: ast.AST):
+        handlers = self._dispatch.get(type(node))
+        if handlers:
+            for priority, analyze in handlers:
+                for suggestion in analyze(node):
+                    self.suggestions.append((suggestion[0], priority, suggestion))
+
+    def run(self, tree: ast.AST) -> List[Suggestion]:
+        """遍历整棵树，返回按行号排序、同一行去重后的建议"""
+        return [suggestion for _, suggestion in self.run_ranked(tree)]
+
+    def run_ranked(self, tree: ast.AST) -> List[Tuple[int, Suggestion]]:
+        """同 run()，但附带每条建议所属类别的优先级（类别列表中的下标）"""
+        self.suggestions = []
+        # 显式栈代替 visit() 递归，深层嵌套的大文件也不会触及递归上限
+        stack = [tree]
+        while stack:
+            node = stack.pop()
+            self._handle(node)
+            children = list(ast.iter_child_nodes(node))
+            children.reverse()
+            stack.extend(children)
+
+        seen_lines = set()
+        unique_suggestions = []
+        for line, priority, suggestion in sorted(self.suggestions, key=lambda x: (x[0], x[1])):
+            if line not in seen_lines:
+                seen_lines.add(line)
+                unique_suggestions.append((priority, suggestion))
+        return unique_suggestions
+
+
+# ---------------------------------------------------------------------------
+# 缓存：进程内 AST 缓存 + 按源码哈希持久化的建议缓存
+# ---------------------------------------------------------------------------
+
+CACHE_FORMAT_VERSION = 1
+AST_CACHE_SIZE = 32
+# 持久化建议缓存最多保留的条目数；超出时按最近使用时间（mtime）淘汰最旧的
+CACHE_MAX_ENTRIES = 2048
+
+# 源码哈希 -> AST（LRU）；返回的树是共享的，调用方不应修改
+_AST_CACHE: "OrderedDict[str, ast.Module]" = OrderedDict()
+# 文件路径 -> ((mtime_ns, size), 源码哈希)，文件未变化时无需重读
+_DIGEST_CACHE: Dict[str, Tuple[Tuple[int, int], str]] = {}
+
+
+def default_cache_dir() -> Path:
+    """持久化建议缓存目录（可用 BREAKPOINT_SUGGESTER_CACHE 覆盖）"""
+    override = os.environ.get('BREAKPOINT_SUGGESTER_CACHE')
+    if override:
+        return Path(override)
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return Path(base) / 'python-debugging' / 'suggestions'
+
+
+def prune_cache(cache_dir: Optional[Path] = None, max_entries: Optional[int] = None) -> int:
+    """只保留最近使用的 max_entries（默认 CACHE_MAX_ENTRIES）个建议缓存条目（命中时会刷新 mtime），
+    返回删除的条目数"""
+    cache_dir = Path(cache_dir or default_cache_dir())
+    if max_entries is None:
+        max_entries = CACHE_MAX_ENTRIES
+    entries = []
+    try:
+        with os.scandir(cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith('.json'):
+                    try:
+                        entries.append((entry.stat().st_mtime_ns, entry.path))
+                    except OSError:
+                        continue
+    except OSError:
+        return 0
+    if len(entries) <= max_entries:
+        return 0
+    entries.sort()
+    removed = 0
+    for _, path in entries[:len(entries) - max_entries]:
+        try:
+            os.unlink(path)
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def clear_cache(cache_dir: Optional[Path] = None) -> int:
+    """删除持久化缓存中的所有建议条目、残留临时文件和预运行 profile，返回删除的文件数"""
+    cache_dir = Path(cache_dir or default_cache_dir())
+    removed = 0
+    for pattern in ('*.json', '*.tmp', 'profiles/*.json'):
+        for path in cache_dir.glob(pattern):
+            try:
+                path.unlink()
+                removed += 1
+            except OSError:
+                pass
+    return removed
+
+
+def clear_ast_cache():
+    """清空进程内的 AST / 文件哈希缓存"""
+    _AST_CACHE.clear()
+    _DIGEST_CACHE.clear()
+
+
+def _file_signature(path: Path) -> Tuple[int, int]:
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def source_digest(path: Path) -> str:
+    """文件内容的 SHA-256；mtime 和大小未变时直接复用上次的结果"""
+    key = str(path.resolve())
+    signature = _file_signature(path)
+    cached = _DIGEST_CACHE.get(key)
+    if cached and cached[0] == signature:
+        return cached[1]
+    digest = hashlib.sha256(path.read_bytes()).hexdigest()
+    _DIGEST_CACHE[key] = (signature, digest)
+    return digest
+
+
+def parse_cached(path: Path) -> ast.Module:
+    """解析文件为 AST，按内容哈希缓存在进程内"""
+    digest = source_digest(path)
+    tree = _AST_CACHE.get(digest)
+    if tree is not None:
+        _AST_CACHE.move_to_end(digest)
+        return tree
+    source = path.read_bytes()
+    tree = ast.parse(source, filename=str(path))
+    # 读取和哈希之间文件可能被改写，以实际解析的内容为准
+    digest = hashlib.sha256(source).hexdigest()
+    _DIGEST_CACHE[str(path.resolve())] = (_file_signature(path), digest)
+    _AST_CACHE[digest] = tree
+    if len(_AST_CACHE) > AST_CACHE_SIZE:
+        _AST_CACHE.popitem(last=False)
+    return tree
+
+
+def _cache_key(digest: str, names: Tuple[str, ...]) -> str:
+    # 类别的分析函数也参与 key，替换同名类别后旧结果自动失效
+    parts = [str(CACHE_FORMAT_VERSION), digest, sys.version]
+    for name in names:
+        analyze = CATEGORIES[name].analyze
+        parts.append(f"{name}={analyze.__module__}.{analyze.__qualname__}")
+    return hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()
+
+
+def _load_cached(cache_dir: Path, key: str) -> Optional[List[Tuple[int, Suggestion]]]:
+    path = cache_dir / f"{key}.json"
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        # 合法 JSON 但结构不对（如 {} 或 [[1, 2]]）同样按未命中处理
+        if not isinstance(data, list):
+            return None
+        ranked = [(priority, (line, title, reason)) for priority, line, title, reason in data]
+    except (OSError, ValueError, TypeError):
+        return None
+    # mtime 记录最近一次使用，prune_cache() 据此淘汰
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return ranked
+
+
+def _store_cached(cache_dir: Path, key: str, ranked: List[Tuple[int, Suggestion]]):
+    payload = [[priority, line, title, reason] for priority, (line, title, reason) in ranked]
+    tmp_path = None
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_dir / f"{key}.json")
+    except (OSError, ValueError, TypeError):
+        # 写入或替换失败时不留下临时文件
+        if tmp_path is not None:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+
+def ranked_suggestions(path: Path, names: Tuple[str, ...], use_cache: bool = True,
+                       cache_dir: Optional[Path] = None, prune: bool = True) -> List[Tuple[int, Suggestion]]:
+    """分析单个文件，返回 [(类别优先级, 建议)]
+
+    结果按 (源码哈希, Python 版本, 启用的类别) 持久化缓存；命中时完全跳过读取和解析。
+    写入新条目后按 CACHE_MAX_ENTRIES 淘汰旧条目（批量调用方传 prune=False，最后统一 prune_cache()）。
+    """
+    path = Path(path)
+    if not use_cache:
+        tree = ast.parse(path.read_bytes(), filename=str(path))
+        return SuggestionVisitor([CATEGORIES[name] for name in names]).run_ranked(tree)
+
+    cache_dir = cache_dir or default_cache_dir()
+    key = _cache_key(source_digest(path), names)
+    ranked = _load_cached(cache_dir, key)
+    if ranked is not None:
+        return ranked
+    tree = parse_cached(path)
+    ranked = SuggestionVisitor([CATEGORIES[name] for name in names]).run_ranked(tree)
+    _store_cached(cache_dir, _cache_key(source_digest(path), names), ranked)
+    if prune:
+        prune_cache(cache_dir)
+    return ranked
 
 
 class BreakpointSuggester:
     """智能断点建议器"""
     
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, use_cache: bool = True, cache_dir: Optional[str] = None):
         self.file_path = Path(file_path)
         if not self.file_path.exists():
             raise FileNotFoundError(f"File not found: {file_path}")
         
+        self.use_cache = use_cache
+        self.cache_dir = Path(cache_dir) if cache_dir else None
         self.suggestions: List[Tuple[int, str, str]] = []
     
     def read_file(self) -> str:
@@ -26,186 +366,63 @@ class BreakpointSuggester:
             return f.read()
     
     def parse_code(self) -> ast.Module:
-        """解析代码为 AST"""
+        """解析代码为 AST（启用缓存时返回进程内共享的树，不要修改它）"""
+        if self.use_cache:
+            return parse_cached(self.file_path)
         code = self.read_file()
         return ast.parse(code)
     
+    def _analyze_category(self, tree: ast.Module, name: str) -> List[Suggestion]:
+        visitor = SuggestionVisitor([CATEGORIES[name]])
+        visitor.run(tree)
+        return [suggestion for _, _, suggestion in visitor.suggestions]
+    
     def analyze_function_definitions(self, tree: ast.Module) -> List[Tuple[int, str]]:
         """分析函数定义，建议在函数入口设置断点"""
-        suggestions = []
-        
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef):
-                # 跳过私有函数和特殊方法（可选）
-                if node.name.startswith('_') and not node.name.startswith('__'):
-                    continue
-                
-                # 函数定义行
-                line = node.lineno
-                # 函数第一行可执行代码（跳过 docstring）
-                first_stmt_line = line + 1
-                
-                # 如果有文档字符串，跳过它
-                if (node.body and 
-                    isinstance(node.body[0], ast.Expr) and 
-                    isinstance(node.body[0].value, ast.Constant) and
-                    isinstance(node.body[0].value.value, str)):
-                    first_stmt_line = node.body[0].lineno + 1 if node.body else line + 2
-                elif node.body:
-                    first_stmt_line = node.body[0].lineno
-                
-                suggestions.append((
-                    first_stmt_line,
-                    f"Function entry: {node.name}()",
-                    "函数入口 - 可以查看函数参数"
-                ))
-        
-        return suggestions
+        return self._analyze_category(tree, 'functions')
     
     def analyze_loops(self, tree: ast.Module) -> List[Tuple[int, str]]:
         """分析循环，建议在循环开始设置断点"""
-        suggestions = []
-        
-        for node in ast.walk(tree):
-            if isinstance(node, (ast.For, ast.While)):
-                # 循环的第一行
-                line = node.lineno
-                suggestions.append((
-                    line,
-                    f"Loop start: {'for' if isinstance(node, ast.For) else 'while'}",
-                    "循环开始 - 可以查看循环变量"
-                ))
-        return suggestions
+        return self._analyze_category(tree, 'loops')
     
     def analyze_conditionals(self, tree: ast.Module) -> List[Tuple[int, str]]:
         """分析条件语句，建议在分支处设置断点"""
-        suggestions = []
-        
-        for node in ast.walk(tree):
-            if isinstance(node, ast.If):
-                # if 语句行
-                line = node.lineno
-                suggestions.append((
-                    line,
-                    "Conditional branch",
-                    "条件分支 - 可以测试条件表达式"
-                ))
-                
-                # else/elif 分支
-                if node.orelse:
-                    orelse_node = node.orelse[0]
-                    if isinstance(orelse_node, ast.If):
-                        suggestions.append((
-                            orelse_node.lineno,
-                            "Elif branch",
-                            "Elif 分支"
-                        ))
-                    else:
-                        suggestions.append((
-                            orelse_node.lineno if hasattr(orelse_node, 'lineno') else line + 1,
-                            "Else branch",
-                            "Else 分支"
-                        ))
-        
-        return suggestions
+        return self._analyze_category(tree, 'conditionals')
     
     def analyze_exceptions(self, tree: ast.Module) -> List[Tuple[int, str]]:
         """分析异常处理，建议在 try/except 处设置断点"""
-        suggestions = []
-        
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Try):
-                # try 块开始
-                suggestions.append((
-                    node.lineno,
-                    "Try block start",
-                    "异常捕获开始 - 可以监控异常"
-                ))
-                
-                # except 块
-                for handler in node.handlers:
-                    suggestions.append((
-                        handler.lineno,
-                        f"Except handler: {handler.type.id if handler.type else 'all'}",
-                        "异常处理 - 可以在异常时暂停"
-                    ))
-        
-        return suggestions
+        return self._analyze_category(tree, 'exceptions')
     
     def analyze_return_statements(self, tree: ast.Module) -> List[Tuple[int, str]]:
         """分析返回语句，建议在返回前设置断点"""
-        suggestions = []
-        
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Return):
-                suggestions.append((
-                    node.lineno,
-                    "Return statement",
-                    "返回语句 - 可以查看返回值"
-                ))
-        
-        return suggestions
+        return self._analyze_category(tree, 'returns')
     
     def analyze_variable_assignments(self, tree: ast.Module) -> List[Tuple[int, str]]:
         """分析关键变量赋值（用户输入、计算结果等）"""
-        suggestions = []
-        important_patterns = [
-            'result', 'output', 'data', 'response', 'error', 
-            'status', 'value', 'total', 'sum', 'count'
-        ]
-        
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Assign):
-                # 检查是否赋值给重要变量
-                for target in node.targets:
-                    if isinstance(target, ast.Name):
-                        var_name = target.id.lower()
-                        if any(pattern in var_name for pattern in important_patterns):
-                            suggestions.append((
-                                node.lineno,
-                                f"Variable assignment: {target.id}",
-                                "关键变量赋值 - 可以查看计算结果"
-                            ))
-                            break
-        
-        return suggestions
+        return self._analyze_category(tree, 'assignments')
     
     def suggest_breakpoints(self, options: Set[str] = None) -> List[Tuple[int, str, str]]:
-        """生成断点建议"""
+        """生成断点建议（单次 AST 遍历分发所有启用的类别）"""
         if options is None:
-            options = {'functions', 'loops', 'conditionals', 'exceptions', 'returns', 'assignments'}
-        
-        tree = self.parse_code()
-        all_suggestions = []
-        
-        if 'functions' in options:
-            all_suggestions.extend(self.analyze_function_definitions(tree))
-        
-        if 'loops' in options:
-            all_suggestions.extend(self.analyze_loops(tree))
-        
-        if 'conditionals' in options:
-            all_suggestions.extend(self.analyze_conditionals(tree))
+            options = set(CATEGORIES)
         
-        if 'exceptions' in options:
-            all_suggestions.extend(self.analyze_exceptions(tree))
+        unknown = set(options) - set(CATEGORIES)
+        if unknown:
+            raise ValueError(f"Unknown suggestion categories: {sorted(unknown)}")
         
-        if 'returns' in options:
-            all_suggestions.extend(self.analyze_return_statements(tree))
+        names = tuple(name for name in CATEGORIES if name in options)
+        ranked = ranked_suggestions(self.file_path, names, self.use_cache, self.cache_dir)
         
-        if 'assignments' in options:
-            all_suggestions.extend(self.analyze_variable_assignments(tree))
-        
-        # 去重（同一行的建议合并）
-        seen_lines = set()
-        unique_suggestions = []
-        for line, title, reason in sorted(all_suggestions, key=lambda x: x[0]):
-            if line not in seen_lines:
-                seen_lines.add(line)
-                unique_suggestions.append((line, title, reason))
-        
-        self.suggestions = unique_suggestions
-        return unique_suggestions
+        self.suggestions = [suggestion for _, suggestion in ranked]
+        return self.suggestions
+    
+    def rank_by_profile(self, profile) -> List[Tuple[int, str, str]]:
+        """按一次实际运行的执行数据（hotpath_profiler.ExecutionProfile 或其 JSON 路径）重排建议"""
+        from hotpath_profiler import ExecutionProfile, rank_suggestions
+        if not isinstance(profile, ExecutionProfile):
+            profile = ExecutionProfile.load(str(profile))
+        self.suggestions = rank_suggestions(self.suggestions, profile, str(self.file_path))
+        return self.suggestions
     
     def print_suggestions(self, max_suggestions: int = 10):
         """打印断点建议"""
@@ -224,6 +441,122 @@ class BreakpointSuggester:
             print("(Use --max to see more)")
 
 
+# 项目模式默认跳过的目录
+SKIP_DIRS = {'.git', '.hg', '.svn', '.tox', '.nox', '.venv', 'venv', 'env',
+             '__pycache__', 'node_modules', 'build', 'dist', 'site-packages'}
+
+
+@dataclass(frozen=True)
+class ProjectSuggestion:
+    """项目模式下的一条建议，location 形如 path:line"""
+    file: str
+    line: int
+    category: str
+    title: str
+    reason: str
+
+    @property
+    def location(self) -> str:
+        return f"{self.file}:{self.line}"
+
+
+def collect_python_files(targets: Iterable[str]) -> List[Path]:
+    """展开文件、目录和 glob 模式为去重排序的 .py 文件列表"""
+    files = set()
+    for target in targets:
+        path = Path(target)
+        if path.is_file():
+            files.add(path)
+        elif path.is_dir():
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS and not d.startswith('.')]
+                for filename in filenames:
+                    if filename.endswith('.py'):
+                        files.add(Path(dirpath) / filename)
+        else:
+            matches = glob.glob(target, recursive=True)
+            files.update(Path(match) for match in matches
+                         if match.endswith('.py') and os.path.isfile(match))
+    return sorted(files)
+
+
+def _analyze_file(path: str, names: Tuple[str, ...], use_cache: bool = True,
+                  cache_dir: Optional[Path] = None):
+    """进程池 worker：解析并分析单个文件，失败时返回错误而不是抛出"""
+    try:
+        ranked = ranked_suggestions(Path(path), names, use_cache, cache_dir, prune=False)
+    except (SyntaxError, ValueError, OSError, UnicodeDecodeError) as e:
+        return path, None, f"{type(e).__name__}: {e}"
+    return path, ranked, None
+
+
+def suggest_project(targets: Iterable[str], options: Set[str] = None,
+                    workers: int = None, use_cache: bool = True,
+                    cache_dir: Optional[Path] = None) -> Tuple[List[ProjectSuggestion], List[Tuple[str, str]]]:
+    """跨多个文件并行生成断点建议
+
+    返回 (按类别优先级、文件、行号排序的建议列表, [(文件, 错误信息)])。
+    无法解析的文件会被跳过并记录在错误列表中。
+    """
+    if options is None:
+        options = set(CATEGORIES)
+    unknown = set(options) - set(CATEGORIES)
+    if unknown:
+        raise ValueError(f"Unknown suggestion categories: {sorted(unknown)}")
+    names = tuple(name for name in CATEGORIES if name in options)
+
+    files = [str(path) for path in collect_python_files(targets)]
+    workers = workers or os.cpu_count() or 1
+    results = []
+    if workers <= 1 or len(files) <= 1:
+        results = [_analyze_file(path, names, use_cache, cache_dir) for path in files]
+    else:
+        # 每个 worker 拿到若干批文件，摊薄进程间通信开销
+        chunksize = max(1, len(files) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_analyze_file, files, [names] * len(files),
+                                        [use_cache] * len(files), [cache_dir] * len(files),
+                                        chunksize=chunksize))
+    if use_cache:
+        prune_cache(cache_dir)
+
+    ranked = []
+    errors = []
+    for path, suggestions, error in results:
+        if error is not None:
+            errors.append((path, error))
+            continue
+        for priority, (line, title, reason) in suggestions:
+            ranked.append((priority, path, line, ProjectSuggestion(path, line, names[priority], title, reason)))
+    ranked.sort(key=lambda x: x[:3])
+    return [item[3] for item in ranked], errors
+
+
+def print_project_suggestions(suggestions: List[ProjectSuggestion],
+                              errors: List[Tuple[str, str]], max_suggestions: int = 10):
+    """打印项目模式的断点建议"""
+    if errors:
+        print(f"⚠️  Skipped {len(errors)} file(s) that failed to parse:")
+        for path, error in errors[:5]:
+            print(f"    {path}: {error}")
+        if len(errors) > 5:
+            print(f"    ... and {len(errors) - 5} more")
+        print()
+
+    if not suggestions:
+        print("ℹ️  No breakpoint suggestions found")
+        return
+
+    print(f"💡 Found {len(suggestions)} breakpoint suggestion(s):\n")
+    for i, suggestion in enumerate(suggestions[:max_suggestions], 1):
+        print(f"{i:2d}. {suggestion.location}: {suggestion.title}")
+        print(f"    └─ {suggestion.reason}\n")
+
+    if len(suggestions) > max_suggestions:
+        print(f"... and {len(suggestions) - max_suggestions} more suggestions")
+        print("(Use --max to see more)")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Smart breakpoint suggester - AI analyzes code and suggests breakpoint locations',
@@ -241,40 +574,81 @@ Examples:
   
   # Limit suggestions
   python smart_breakpoint_suggester.py demo.py --max 5
+  
+  # Whole package (directories/globs are analyzed in parallel)
+  python smart_breakpoint_suggester.py src/ --only functions --max 20
+  python smart_breakpoint_suggester.py "src/**/*.py" --workers 8
+  
+  # Rank by where a real run spent time or failed (see hotpath_profiler.py)
+  python smart_breakpoint_suggester.py demo.py --rank-profile profile.json
+  
+  # Empty the persistent cache
+  python smart_breakpoint_suggester.py --clear-cache
         """
     )
     
-    parser.add_argument('file', help='Python file to analyze')
+    parser.add_argument('paths', nargs='*', metavar='path',
+                       help='Python file, directory or glob pattern to analyze')
     parser.add_argument('--only', nargs='+',
-                       choices=['functions', 'loops', 'conditionals', 'exceptions', 'returns', 'assignments'],
+                       choices=list(CATEGORIES),
                        help='Only suggest specific types of breakpoints')
     parser.add_argument('--exclude', nargs='+',
-                       choices=['functions', 'loops', 'conditionals', 'exceptions', 'returns', 'assignments'],
+                       choices=list(CATEGORIES),
                        help='Exclude specific types of suggestions')
     parser.add_argument('--max', type=int, default=10,
                        help='Maximum number of suggestions to show (default: 10)')
+    parser.add_argument('--workers', type=int, default=None,
+                       help='Worker processes for directory/glob mode (default: CPU count)')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Ignore and do not update the persistent suggestion cache')
+    parser.add_argument('--clear-cache', action='store_true',
+                       help='Delete the persistent suggestion cache (and saved pre-run profiles) first')
+    parser.add_argument('--rank-profile', metavar='PROFILE',
+                       help='Re-rank single-file suggestions using a saved hotpath_profiler.py profile')
     
     args = parser.parse_args()
+    if not args.paths and not args.clear_cache:
+        parser.error('the following arguments are required: path')
     
-    if not os.path.exists(args.file):
-        print(f"❌ Error: File not found: {args.file}")
-        return 1
+    if args.clear_cache:
+        removed = clear_cache()
+        print(f"🧹 Removed {removed} cached file(s) from {default_cache_dir()}")
+        if not args.paths:
+            return 0
+    
+    # 确定要分析的选项
+    all_options = set(CATEGORIES)
+    
+    if args.only:
+        options = set(args.only)
+    elif args.exclude:
+        options = all_options - set(args.exclude)
+    else:
+        options = all_options
+    
+    if len(args.paths) > 1 or not os.path.isfile(args.paths[0]):
+        if args.rank_profile:
+            print("⚠️  --rank-profile only applies to a single file; ignoring it")
+        try:
+            suggestions, errors = suggest_project(args.paths, options, args.workers,
+                                                 use_cache=not args.no_cache)
+        except Exception as e:
+            print(f"❌ Error: {e}")
+            return 1
+        if not suggestions and not errors:
+            print(f"❌ Error: No Python files found in: {' '.join(args.paths)}")
+            return 1
+        print_project_suggestions(suggestions, errors, args.max)
+        return 0
     
+    args.file = args.paths[0]
     try:
-        suggester = BreakpointSuggester(args.file)
-        
-        # 确定要分析的选项
-        all_options = {'functions', 'loops', 'conditionals', 'exceptions', 'returns', 'assignments'}
-        
-        if args.only:
-            options = set(args.only)
-        elif args.exclude:
-            options = all_options - set(args.exclude)
-        else:
-            options = all_options
+        suggester = BreakpointSuggester(args.file, use_cache=not args.no_cache)
         
         # 生成建议
         suggester.suggest_breakpoints(options)
+        if args.rank_profile:
+            suggester.rank_by_profile(args.rank_profile)
         
         # 打印建议
         suggester.print_suggestions(args.max)
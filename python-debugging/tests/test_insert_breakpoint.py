@@ -0,0 +1,77 @@
+"""Tests for inserted breakpoints: batch line remapping, reported lines and removal."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+from insert_breakpoint import BreakpointManager, index_breakpoints  # noqa: E402
+
+SOURCE = """\
+a = 1
+b = 2
+c = 3
+DOC = '''
+import pdb; pdb.set_trace()  # AI breakpoint
+'''
+"""
+PDB_LINE = "import pdb; pdb.set_trace()  # AI breakpoint\n"
+
+
+@pytest.fixture
+def manager(tmp_path):
+    path = tmp_path / "target.py"
+    path.write_text(SOURCE)
+    return BreakpointManager(str(path))
+
+
+def test_batch_maps_original_lines_to_their_new_position(manager):
+    result = manager.insert_breakpoints([1, 3], method="pdb")
+
+    assert result.inserted == {1: 2, 3: 5}
+    lines = manager.read_file()
+    for line_num, new_line in result.inserted.items():
+        assert lines[new_line - 2] == PDB_LINE
+        assert lines[new_line - 1] == SOURCE.splitlines(keepends=True)[line_num - 1]
+
+
+def test_single_insert_reports_the_breakpoint_and_statement_lines(manager, capsys):
+    manager.insert_breakpoints([1], method="pdb")
+    assert manager.insert_breakpoint(3, method="pdb")
+
+    # Line 3 of the current file is `b = 2`, pushed down to line 4 by the new breakpoint
+    assert "breakpoint at line 3 (the statement from line 3 is now line 4)" in capsys.readouterr().out
+    assert manager.read_file()[2] == PDB_LINE
+
+
+def test_index_ignores_the_marker_inside_a_string(manager):
+    assert index_breakpoints(SOURCE) == {}
+    manager.insert_breakpoints([2], method="pdb")
+    assert manager.list_breakpoints() == [(2, "pdb")]
+
+
+def test_index_matches_whole_statement_lines_only():
+    source = (
+        "def f():\n"
+        "    import ipdb; ipdb.set_trace()  # AI breakpoint\r\n"
+        "    x = 1  # import pdb; pdb.set_trace()  # AI breakpoint\n"
+        "    import pdb; pdb.set_trace()\n"
+        "    import debugpy; debugpy.breakpoint()  # AI breakpoint\n"
+    )
+    assert index_breakpoints(source) == {2: "ipdb", 5: "debugpy"}
+
+
+def test_index_falls_back_to_line_matches_for_unparseable_files():
+    source = "def broken(:\n" + PDB_LINE
+    assert index_breakpoints(source) == {2: "pdb"}
+
+
+def test_remove_all_restores_the_original_file(manager):
+    manager.insert_breakpoints([1, 2, 3], method="pdb")
+
+    assert manager.remove_all_breakpoints() == 3
+    assert "".join(manager.read_file()) == SOURCE
@@ -0,0 +1,98 @@
+"""Tests for logpoints: parsing, the ring buffer, statistics and the log file formats."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+import logpoint  # noqa: E402
+from logpoint import LogpointRecorder, parse_logpoint, read_log, split_expressions  # noqa: E402
+from runtime_breakpoint import HAS_MONITORING, BreakpointTracer, RuntimeBreakpoint  # noqa: E402
+
+LOOP = """\
+total = 0
+for i in range(10):
+    total += i
+"""
+LOOP_LINE = 3
+BACKENDS = ["settrace"] + (["monitoring"] if HAS_MONITORING else [])
+
+
+@pytest.fixture
+def loop_script(tmp_path):
+    path = tmp_path / "loop.py"
+    path.write_text(LOOP)
+    return path
+
+
+def run_logged(path: Path, point: RuntimeBreakpoint, backend: str = "settrace") -> None:
+    code = compile(path.read_text(), str(path), "exec")
+    with BreakpointTracer([point], backend=backend):
+        exec(code, {"__name__": "__main__"})
+
+
+def test_split_expressions_keeps_commas_inside_calls_and_slices():
+    assert split_expressions("a, f(b, c), d[1:2]") == ["a", "f(b, c)", "d[1:2]"]
+    with pytest.raises(ValueError):
+        split_expressions("a, (")
+
+
+def test_parse_logpoint_with_and_without_a_file():
+    assert parse_logpoint("utils.py:40=len(rows), x", "main.py") == ("utils.py", 40, ["len(rows)", "x"])
+    assert parse_logpoint("12=total", "main.py") == ("main.py", 12, ["total"])
+    for spec in ("12", "12=", "abc=total"):
+        with pytest.raises(ValueError):
+            parse_logpoint(spec, "main.py")
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_values_are_recorded_without_stopping(loop_script, backend):
+    recorder = LogpointRecorder()
+    point = recorder.logpoint(str(loop_script), LOOP_LINE, ["i", "total", "missing"], condition="i >= 7")
+    run_logged(loop_script, point, backend)
+
+    assert [dict(record[5])["i"] for record in recorder.buffer] == ["7", "8", "9"]
+    assert [record[4] for record in recorder.buffer] == [1, 2, 3]
+    assert dict(recorder.buffer[0][5])["missing"] == "<NameError: name 'missing' is not defined>"
+
+
+def test_full_buffer_keeps_the_newest_records_and_counts_the_dropped(loop_script):
+    recorder = LogpointRecorder(capacity=4)
+    point = recorder.logpoint(str(loop_script), LOOP_LINE, ["i"], every=2)
+    run_logged(loop_script, point)
+
+    assert [dict(record[5])["i"] for record in recorder.buffer] == ["3", "5", "7", "9"]
+    stats = recorder.stats()
+    assert (stats["hits"], stats["fired"], stats["recorded"], stats["dropped"], stats["buffered"]) == (10, 5, 5, 1, 4)
+
+
+def test_sampled_out_hits_are_counted_but_not_recorded(loop_script, monkeypatch):
+    draws = iter([0.1, 0.9] * 5)
+    monkeypatch.setattr(logpoint.random, "random", lambda: next(draws))
+    recorder = LogpointRecorder(sample_rate=0.5)
+    point = recorder.logpoint(str(loop_script), LOOP_LINE, ["i"])
+    run_logged(loop_script, point)
+
+    assert [dict(record[5])["i"] for record in recorder.buffer] == ["0", "2", "4", "6", "8"]
+    stats = recorder.stats()
+    assert (stats["fired"], stats["recorded"], stats["sampled_out"]) == (10, 5, 5)
+
+
+@pytest.mark.parametrize("fmt", ["ndjson", "binary"])
+def test_flush_round_trips_through_read_log(loop_script, tmp_path, fmt):
+    recorder = LogpointRecorder(max_repr=10)
+    point = recorder.logpoint(str(loop_script), LOOP_LINE, ["i", "'x' * 50"], condition="i == 4")
+    run_logged(loop_script, point)
+
+    path = tmp_path / f"trace.{fmt}"
+    assert recorder.flush(str(path), fmt) == 1
+    [record] = read_log(str(path))
+    assert (record["file"], record["line"], record["hit"]) == (str(loop_script), LOOP_LINE, 1)
+    assert record["values"]["i"] == "4"
+    # Long values are cut down by reprlib
+    long_value = record["values"]["'x' * 50"]
+    assert "..." in long_value and len(long_value) <= 10
@@ -0,0 +1,76 @@
+"""Tests for remote attach: breakpoints set in a running debug_agent process, which keeps running after detach."""
+
+from __future__ import annotations
+
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[1] / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from remote_attach import RemoteBreakpoint, attach_and_watch, parse_breakpoint  # noqa: E402
+
+SERVICE = """\
+import time
+
+n = 0
+while True:
+    n += 1
+    print(n, flush=True)
+    time.sleep(0.01)
+"""
+SERVICE_LINE = 6
+
+
+def test_parse_breakpoint_maps_filters_to_dap_hit_conditions(tmp_path):
+    service = tmp_path / "service.py"
+    bp = parse_breakpoint(f"{service}:{SERVICE_LINE}, n > 3", None, every=5)
+    assert bp == RemoteBreakpoint(str(service.resolve()), SERVICE_LINE, "n > 3", "% 5")
+    assert bp.to_dap() == {"line": SERVICE_LINE, "condition": "n > 3", "hitCondition": "% 5"}
+    assert parse_breakpoint(str(SERVICE_LINE), str(service), hit_count=2).to_dap() == {
+        "line": SERVICE_LINE, "hitCondition": "2"}
+    with pytest.raises(ValueError, match="needs a file"):
+        parse_breakpoint(str(SERVICE_LINE), None)
+
+
+@pytest.fixture
+def agent(tmp_path):
+    pytest.importorskip("debugpy")
+    service = tmp_path / "service.py"
+    service.write_text(SERVICE)
+    process = subprocess.Popen(
+        [sys.executable, str(SCRIPTS_DIR / "debug_agent.py"), "--port", "0", str(service)],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+    )
+    try:
+        for line in process.stderr:
+            match = re.search(r"listening on ([\d.]+):(\d+)", line)
+            if match:
+                break
+        else:
+            pytest.fail("debug agent did not start")
+        yield service, (match.group(1), int(match.group(2))), process
+    finally:
+        process.kill()
+        process.wait()
+
+
+def test_conditional_breakpoint_in_running_process(agent, capsys):
+    service, address, process = agent
+    bp = parse_breakpoint(f"{service}:{SERVICE_LINE}, n % 5 == 0", None)
+
+    hits = attach_and_watch(address, [bp], ["n * 2"], max_hits=2, timeout=30.0)
+
+    assert hits == 2
+    output = capsys.readouterr().out
+    values = [int(value) for value in re.findall(r"🔎 n \* 2 = (\d+)", output)]
+    assert len(values) == 2 and all(value % 10 == 0 for value in values)
+    assert f"{service}:{SERVICE_LINE}" in output
+    # Detaching removed the breakpoints: the process keeps counting on its own
+    last = int(process.stdout.readline())
+    assert [int(process.stdout.readline()) for _ in range(20)] == list(range(last + 1, last + 21))
+    assert process.poll() is None
@@ -0,0 +1,130 @@
+"""Tests for runtime breakpoints: hit filters on both backends and the pdb command line."""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[1] / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from runtime_breakpoint import HAS_MONITORING, BreakpointTracer, RuntimeBreakpoint  # noqa: E402
+
+LOOP = """\
+total = 0
+for i in range(20):
+    total += i
+print("done", total)
+"""
+LOOP_LINE = 3
+BACKENDS = ["settrace"] + (["monitoring"] if HAS_MONITORING else [])
+
+
+@pytest.fixture
+def loop_script(tmp_path):
+    path = tmp_path / "loop.py"
+    path.write_text(LOOP)
+    return path
+
+
+def run_traced(path: Path, backend: str, **options) -> tuple[list[int], RuntimeBreakpoint]:
+    fired: list[int] = []
+    bp = RuntimeBreakpoint(str(path), LOOP_LINE, action=lambda frame, bp: fired.append(frame.f_locals["i"]),
+                           **options)
+    code = compile(path.read_text(), str(path), "exec")
+    with BreakpointTracer([bp], backend=backend):
+        exec(code, {"__name__": "__main__", "print": lambda *args: None})
+    return fired, bp
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_every_counts_only_passes_where_the_condition_held(loop_script, backend):
+    fired, bp = run_traced(loop_script, backend, condition="i % 2 == 0", every=3)
+    assert fired == [4, 10, 16]
+    assert bp.hits == 10
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_hit_count_fires_once_on_the_nth_hit(loop_script, backend):
+    fired, bp = run_traced(loop_script, backend, hit_count=5)
+    assert fired == [4]
+    assert bp.hits == 5
+
+
+FUNCTIONS = """\
+import threading
+
+def step(n):
+    return n * 2
+
+for n in range(3):
+    step(n)
+worker = threading.Thread(target=step, args=(10,))
+worker.start()
+worker.join()
+"""
+STEP_LINE = 4
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_hits_inside_functions_and_other_threads(tmp_path, backend):
+    path = tmp_path / "functions.py"
+    path.write_text(FUNCTIONS)
+    fired: list[int] = []
+    traced = RuntimeBreakpoint(str(path), STEP_LINE, action=lambda frame, bp: fired.append(frame.f_locals["n"]))
+    doubled = RuntimeBreakpoint(str(path), STEP_LINE, action=lambda frame, bp: fired.append(-frame.f_locals["n"]),
+                                condition="n >= 2")
+    with BreakpointTracer([traced, doubled], backend=backend):
+        exec(compile(FUNCTIONS, str(path), "exec"), {"__name__": "__main__"})
+
+    # Both breakpoints on the line are checked on every pass, including in the worker thread
+    assert sorted(fired) == [-10, -2, 0, 1, 2, 10]
+    assert (traced.hits, doubled.hits) == (4, 2)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_breakpoint_removed_while_tracing_stops_firing(loop_script, backend):
+    fired: list[int] = []
+
+    def fire_once(frame, bp):
+        fired.append(frame.f_locals["i"])
+        tracer.remove(bp)
+
+    tracer = BreakpointTracer([RuntimeBreakpoint(str(loop_script), LOOP_LINE, action=fire_once)], backend=backend)
+    with tracer:
+        exec(compile(LOOP, str(loop_script), "exec"), {"__name__": "__main__", "print": lambda *args: None})
+
+    assert fired == [0]
+    assert tracer.breakpoints == []
+
+
+def test_failing_condition_counts_as_a_hit(loop_script):
+    fired, bp = run_traced(loop_script, "settrace", condition="undefined_name > 0", hit_count=2)
+    assert fired == [1]
+
+
+def test_every_on_the_pdb_command_line(loop_script):
+    # `p i` then `continue` at each stop; the settrace backend drives pdb's own breakpoints
+    result = subprocess.run(
+        [sys.executable, str(SCRIPTS_DIR / "runtime_breakpoint.py"), str(loop_script),
+         "--break", f"{LOOP_LINE}, i % 2 == 0", "--every", "3", "--backend", "settrace"],
+        input="p i\nc\n" * 4, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    stops = [line[len("(Pdb) "):] for line in result.stdout.splitlines()
+             if line.startswith("(Pdb) ") and line[len("(Pdb) "):].isdigit()]
+    assert stops == ["4", "10", "16"]
+    assert "done 190" in result.stdout
+
+
+def test_conditional_runtime_rejects_other_debuggers(loop_script):
+    result = subprocess.run(
+        [sys.executable, str(SCRIPTS_DIR / "conditional_breakpoint.py"), str(loop_script),
+         "--line", str(LOOP_LINE), "--condition", "i > 1", "--runtime", "--method", "ipdb"],
+        capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 2
+    assert "--runtime always stops in pdb" in result.stderr
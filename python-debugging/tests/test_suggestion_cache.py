@@ -0,0 +1,80 @@
+"""Tests for the persistent suggestion cache of smart_breakpoint_suggester.py."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[1] / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from smart_breakpoint_suggester import CATEGORIES, prune_cache, ranked_suggestions  # noqa: E402
+
+NAMES = tuple(CATEGORIES)
+
+
+@pytest.fixture
+def sources(tmp_path):
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"module_{i}.py"
+        path.write_text(f"def func_{i}(x):\n    for item in x:\n        print(item)\n    return {i}\n")
+        paths.append(path)
+    return paths
+
+
+def cache_entries(cache_dir: Path) -> set[str]:
+    return {path.name for path in cache_dir.glob("*.json")}
+
+
+def age(cache_dir: Path, names: set[str], seconds: float):
+    for name in names:
+        stat = (cache_dir / name).stat()
+        os.utime(cache_dir / name, ns=(stat.st_atime_ns, stat.st_mtime_ns - int(seconds * 1e9)))
+
+
+def test_prune_removes_the_least_recently_used_entry(tmp_path, sources):
+    cache_dir = tmp_path / "cache"
+    written = []
+    for path in sources:
+        ranked_suggestions(path, NAMES, cache_dir=cache_dir, prune=False)
+        written.append(cache_entries(cache_dir) - set().union(*written))
+    stale, used, fresh = written
+    age(cache_dir, stale | used, 3600)
+
+    # A cache hit refreshes the entry, so only the untouched one is stale
+    ranked_suggestions(sources[1], NAMES, cache_dir=cache_dir, prune=False)
+    assert prune_cache(cache_dir, max_entries=2) == 1
+    assert cache_entries(cache_dir) == used | fresh
+
+
+def test_new_entries_are_pruned_to_the_cap(tmp_path, sources, monkeypatch):
+    import smart_breakpoint_suggester
+
+    monkeypatch.setattr(smart_breakpoint_suggester, "CACHE_MAX_ENTRIES", 2)
+    cache_dir = tmp_path / "cache"
+    written = []
+    for path in sources:
+        before = cache_entries(cache_dir)
+        ranked_suggestions(path, NAMES, cache_dir=cache_dir)
+        written.append(cache_entries(cache_dir) - before)
+        if len(written) < 3:
+            age(cache_dir, written[-1], 3600 * (3 - len(written)))
+    assert cache_entries(cache_dir) == written[1] | written[2]
+
+
+def test_clear_cache_flag_empties_the_cache(tmp_path, sources):
+    cache_dir = tmp_path / "cache"
+    ranked_suggestions(sources[0], NAMES, cache_dir=cache_dir)
+    (cache_dir / "profiles").mkdir()
+    (cache_dir / "profiles" / "demo-0123.json").write_text("{}")
+    env = dict(os.environ, BREAKPOINT_SUGGESTER_CACHE=str(cache_dir))
+    result = subprocess.run([sys.executable, str(SCRIPTS_DIR / "smart_breakpoint_suggester.py"), "--clear-cache"],
+                            capture_output=True, text=True, env=env, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert "Removed 2 cached file(s)" in result.stdout
+    assert not list(cache_dir.rglob("*.json"))